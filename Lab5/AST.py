@@ -161,6 +161,11 @@ class Literal(Node):
     def string(value, lineno=None):
         return Literal(value, "string", lineno)
 
+class Colon(Node):
+    """A lone ':' index, selecting a whole dimension."""
+    def __init__(self, lineno=None):
+        super().__init__(lineno)
+
 class MatrixIndex(Node):
     def __init__(self, matrix: Variable, indices: list[Expr], lineno=None):
         super().__init__(lineno)
@@ -177,4 +182,23 @@ class Assign(Node):
         super().__init__(lineno)
         self.lvalue = lvalue
         self.operator = operator
-        self.expr = expr
\ No newline at end of file
+        self.expr = expr
+        # Set by the in-place update pass when the old value is not shared.
+        self.inplace = False
+        # Set to "sparse" by the sparse storage pass when the value assigned
+        # should be kept as a SparseMatrix.
+        self.storage = None
+
+class MatMulChain(Node):
+    factors: List[Expr]
+
+    def __init__(self, factors, lineno=None):
+        super().__init__(lineno)
+        self.factors = factors
+
+class Release(Node):
+    names: List[str]
+
+    def __init__(self, names, lineno=None):
+        super().__init__(lineno)
+        self.names = names
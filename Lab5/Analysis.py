@@ -0,0 +1,57 @@
+import AST
+from PassManager import walk
+from TypeChecker import TypeChecker
+
+
+def assigned_names(node):
+    """Names of variables that may be (re)bound or stored into under node."""
+    names = set()
+    for n in walk(node):
+        if isinstance(n, AST.Assign):
+            target = n.lvalue.matrix if isinstance(n.lvalue, AST.MatrixIndex) else n.lvalue
+            names.add(target.name)
+        elif isinstance(n, AST.For):
+            names.add(n.var.name)
+    return names
+
+
+def used_names(node):
+    """Names of variables read under node."""
+    nodes = list(walk(node))
+    written = set()
+    for n in nodes:
+        if isinstance(n, AST.Assign) and isinstance(n.lvalue, AST.Variable) and n.operator == '=':
+            written.add(id(n.lvalue))
+        elif isinstance(n, AST.For):
+            written.add(id(n.var))
+    return {n.name for n in nodes if isinstance(n, AST.Variable) and id(n) not in written}
+
+
+class TypeRecorder(TypeChecker):
+    """A quiet TypeChecker that remembers the type it inferred for each node."""
+
+    def __init__(self):
+        super().__init__(quiet=True)
+        self.types = {}
+
+    def visit(self, node):
+        result = super().visit(node)
+        # Keep the node alive so its id cannot be reused by a new node.
+        self.types[id(node)] = (node, result)
+        return result
+
+    def type_of(self, node):
+        entry = self.types.get(id(node))
+        return entry[1] if entry is not None and entry[0] is node else None
+
+
+def static_types(program):
+    """Type the program statement by statement; statements the TypeChecker
+    cannot handle leave their remaining nodes untyped."""
+    recorder = TypeRecorder()
+    for statement in program.statements:
+        try:
+            recorder.visit(statement)
+        except Exception:
+            pass
+    return recorder
@@ -0,0 +1,255 @@
+import numpy as np
+
+from IntMatMul import int_matmul
+from Values import DENSE, ELEMENTWISE, MatrixValue, check_index, dense, is_matrix, scalar
+
+
+def offsets(sizes):
+    """Start of each block along an axis, followed by the total size."""
+    return np.concatenate([[0], np.cumsum(sizes)]).astype(int).tolist()
+
+
+class BlockMatrix(MatrixValue):
+    """A matrix of matrices, such as [A, B; C, D], kept as one contiguous
+    buffer of its total shape together with the heights of its block rows
+    and the widths of its block columns.
+
+    Indexing works on blocks, which are views of the buffer; every block
+    of a block row has the same height and every block of a block column
+    the same width. Operators work on the buffer in a single NumPy (BLAS)
+    call: the block product of two matrices whose inner partitions match
+    is the product of their buffers, and elementwise operators on two
+    matrices with equal partitions or with a scalar keep the partition.
+    Anything else is done on the buffer as a plain matrix. Stores into a
+    block change the buffer in place; the MemoryStack copies a shared one
+    first, as it does ndarrays.
+    """
+
+    mutable = True
+
+    def __init__(self, buffer, heights, widths):
+        self.buffer = buffer
+        self.heights = tuple(heights)
+        self.widths = tuple(widths)
+        self.row_offsets = offsets(self.heights)
+        self.col_offsets = offsets(self.widths)
+
+    @staticmethod
+    def from_blocks(rows):
+        """The block matrix with these rows of matrices, or None if they do
+        not form a grid of 2-D numeric blocks."""
+        rows = [[dense(value) for value in row] for row in rows]
+        if not rows or not rows[0] or any(len(row) != len(rows[0]) for row in rows):
+            return None
+        if not all(isinstance(block, np.ndarray) and block.ndim == 2 and block.dtype.kind in 'biuf'
+                   for row in rows for block in row):
+            return None
+        heights = [row[0].shape[0] for row in rows]
+        widths = [block.shape[1] for block in rows[0]]
+        if any(block.shape != (height, width)
+               for row, height in zip(rows, heights) for block, width in zip(row, widths)):
+            return None
+        # Each block is copied once, straight into its place in the buffer.
+        buffer = np.empty((sum(heights), sum(widths)),
+                          np.result_type(*[block.dtype for row in rows for block in row]))
+        matrix = BlockMatrix(buffer, heights, widths)
+        for i, row in enumerate(rows):
+            for j, block in enumerate(row):
+                matrix.block(i, j)[...] = block
+        return matrix
+
+    @property
+    def shape(self):
+        return self.buffer.shape
+
+    @property
+    def dtype(self):
+        return self.buffer.dtype
+
+    def owner(self):
+        return self.buffer
+
+    def to_ndarray(self):
+        return self.buffer
+
+    def tolist(self):
+        return [[self.block(i, j).tolist() for j in range(len(self.widths))] for i in range(len(self.heights))]
+
+    def copy(self):
+        return BlockMatrix(self.buffer.copy(), self.heights, self.widths)
+
+    def block(self, i, j):
+        return self.buffer[self.row_offsets[i]:self.row_offsets[i + 1], self.col_offsets[j]:self.col_offsets[j + 1]]
+
+    def partitioned(self, buffer, heights=None, widths=None):
+        """buffer with the partition of self, or the given one."""
+        return BlockMatrix(buffer, self.heights if heights is None else heights,
+                           self.widths if widths is None else widths)
+
+    def transpose(self):
+        return BlockMatrix(self.buffer.T, self.widths, self.heights)
+
+    @staticmethod
+    def selected(part, count, axis):
+        """The blocks an int, slice or int array selects along an axis of
+        count blocks: one block number for an int, else a list of them."""
+        if isinstance(part, slice):
+            return list(range(count))[part]
+        if isinstance(part, np.ndarray):
+            return [check_index(i, count, axis) for i in part.tolist()]
+        return check_index(part, count, axis)
+
+    @staticmethod
+    def span(offsets, blocks):
+        """The slice of the buffer that consecutive blocks cover, else None."""
+        if not blocks:
+            return slice(0, 0)
+        if blocks != list(range(blocks[0], blocks[-1] + 1)):
+            return None
+        return slice(offsets[blocks[0]], offsets[blocks[-1] + 1])
+
+    def submatrix(self, rows, cols):
+        """The blocks in these block rows and columns, as a view of the
+        buffer when both are consecutive."""
+        heights = [self.heights[i] for i in rows]
+        widths = [self.widths[j] for j in cols]
+        row_span, col_span = self.span(self.row_offsets, rows), self.span(self.col_offsets, cols)
+        if row_span is not None and col_span is not None:
+            return BlockMatrix(self.buffer[row_span, col_span], heights, widths)
+        buffer = np.empty((sum(heights), sum(widths)), self.dtype)
+        matrix = BlockMatrix(buffer, heights, widths)
+        for a, i in enumerate(rows):
+            for b, j in enumerate(cols):
+                matrix.block(a, b)[...] = self.block(i, j)
+        return matrix
+
+    def __getitem__(self, index):
+        if type(index) is not tuple:
+            index = (index, slice(None))
+        elif len(index) != 2:
+            return self.buffer[index]
+        rows = self.selected(index[0], len(self.heights), 0)
+        cols = self.selected(index[1], len(self.widths), 1)
+        if type(rows) is int and type(cols) is int:
+            return self.block(rows, cols)
+        return self.submatrix([rows] if type(rows) is int else rows, [cols] if type(cols) is int else cols)
+
+    def with_item(self, index, value):
+        """Store value into the selected blocks in place: into one block
+        broadcasting it as NumPy would, into several a scalar or a matrix
+        of their total shape. None for any other store."""
+        if type(index) is not tuple or len(index) != 2:
+            return None
+        rows = self.selected(index[0], len(self.heights), 0)
+        cols = self.selected(index[1], len(self.widths), 1)
+        value = dense(value)
+        if type(rows) is int and type(cols) is int:
+            self.block(rows, cols)[...] = value
+            return self
+        rows = [rows] if type(rows) is int else rows
+        cols = [cols] if type(cols) is int else cols
+        shape = (sum(self.heights[i] for i in rows), sum(self.widths[j] for j in cols))
+        if np.ndim(value) == 2 and value.shape != shape:
+            raise ValueError(f"cannot store a {value.shape[0]}x{value.shape[1]} matrix "
+                             f"into blocks of total shape {shape[0]}x{shape[1]}")
+        top = 0
+        for i in rows:
+            left = 0
+            for j in cols:
+                height, width = self.heights[i], self.widths[j]
+                self.block(i, j)[...] = value[top:top + height, left:left + width] if np.ndim(value) == 2 else value
+                left += width
+            top += self.heights[i]
+        return self
+
+    def __neg__(self):
+        return self.partitioned(-self.buffer)
+
+    def binary(self, op, other, reflected=False):
+        symbol = ELEMENTWISE.get(op)
+        if symbol is None:
+            return NotImplemented
+
+        if scalar(other) is not None:
+            if op[0] == '.':
+                return NotImplemented
+            result = DENSE[symbol](other, self.buffer) if reflected else DENSE[symbol](self.buffer, other)
+            return self.partitioned(result)
+
+        if not isinstance(other, BlockMatrix):
+            return NotImplemented
+        a, b = (other, self) if reflected else (self, other)
+        if op == '*':
+            if a.widths != b.heights:
+                return NotImplemented
+            if a.dtype == np.int64 and b.dtype == np.int64:
+                return a.partitioned(int_matmul(a.buffer, b.buffer), widths=b.widths)
+            return a.partitioned(a.buffer @ b.buffer, widths=b.widths)
+        if a.heights != b.heights or a.widths != b.widths:
+            return NotImplemented
+        return a.partitioned(DENSE[symbol](a.buffer, b.buffer))
+
+    def __repr__(self):
+        return f"BlockMatrix({self.shape[0]}x{self.shape[1]}, {len(self.heights)}x{len(self.widths)} blocks)"
+
+
+def has_blocks(rows):
+    """Whether any element of a matrix literal's rows is itself a matrix."""
+    return any(is_matrix(value) for row in rows for value in row)
+
+
+def is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+def concatenate(rows):
+    """The matrix that lays out each row of matrices and scalars side by
+    side and the rows one below the other, or None if an element is
+    neither. The output shape is worked out first and every element is
+    copied once into its place; raises ValueError if the pieces do not fit.
+    """
+    rows = [[dense(value) for value in row] for row in rows]
+    shapes = []
+    for row in rows:
+        row_shapes = []
+        for value in row:
+            if isinstance(value, np.ndarray) and value.ndim == 2 and value.dtype.kind in 'biuf':
+                row_shapes.append(value.shape)
+            elif is_number(value):
+                row_shapes.append((1, 1))
+            else:
+                return None
+        shapes.append(row_shapes)
+
+    heights = []
+    for i, row_shapes in enumerate(shapes):
+        if any(shape[0] != row_shapes[0][0] for shape in row_shapes):
+            raise ValueError(f"row {i} of a matrix concatenation joins matrices of different heights: "
+                             + ", ".join(str(shape[0]) for shape in row_shapes))
+        heights.append(row_shapes[0][0])
+    widths = [sum(shape[1] for shape in row_shapes) for row_shapes in shapes]
+    if any(width != widths[0] for width in widths):
+        raise ValueError("rows of a matrix concatenation have different widths: "
+                         + ", ".join(str(width) for width in widths))
+
+    out = np.empty((sum(heights), widths[0]), np.result_type(*[value for row in rows for value in row]))
+    top = 0
+    for row, row_shapes, height in zip(rows, shapes, heights):
+        left = 0
+        for value, (_, width) in zip(row, row_shapes):
+            out[top:top + height, left:left + width] = value
+            left += width
+        top += height
+    return out
+
+
+def assemble(rows):
+    """The value of a matrix literal with matrices among its elements: a
+    BlockMatrix if they form a grid of blocks of one shape, otherwise their
+    concatenation; None if some element is neither a matrix nor a number."""
+    shapes = {value.shape if is_matrix(value) else None for row in rows for value in row}
+    if len(shapes) == 1 and None not in shapes and len({len(row) for row in rows}) == 1:
+        blocks = BlockMatrix.from_blocks(rows)
+        if blocks is not None:
+            return blocks
+    return concatenate(rows)
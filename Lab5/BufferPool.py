@@ -0,0 +1,99 @@
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+# Matrices smaller than this are cheaper to allocate than to look up.
+MIN_POOLED_BYTES = 1 << 20
+
+# Bytes of idle buffers the pool keeps before evicting the least recently used.
+DEFAULT_LIMIT = 128 << 20
+
+@lru_cache(maxsize=None)
+def ufunc_dtype(ufunc, *dtypes):
+    """Element type ufunc produces for operands of the given types."""
+    return ufunc(*[np.empty(0, dtype) for dtype in dtypes]).dtype
+
+
+class BufferPool(object):
+    """Idle matrix buffers kept for reuse, keyed by shape and element type.
+
+    Ownership is explicit: a buffer enters the pool only when its owner
+    releases it (the MemoryStack once no variable, view included, uses
+    it; a kernel once a step is done) and leaves it, owned again, through
+    acquire(). A buffer released twice is pooled once, and holders that
+    remember buffers without owning them forget the ones released. The
+    pool holds at most limit bytes and evicts the least recently used
+    shape first.
+    """
+
+    def __init__(self, limit=DEFAULT_LIMIT, min_bytes=MIN_POOLED_BYTES):
+        self.limit = limit
+        self.min_bytes = min_bytes
+        self.buffers = OrderedDict()
+        self.size = 0
+        self.stats = Counter()
+        # Ids of the buffers in the pool, which hand each out once.
+        self.idle = set()
+        # Whatever remembers buffers it does not own, such as the room
+        # behind a grown matrix; each forgets a buffer the pool takes.
+        self.holders = []
+
+    def acquire(self, shape, dtype):
+        """An uninitialized array of the given shape and type."""
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if nbytes < self.min_bytes:
+            return np.empty(shape, dtype)
+        self.stats["requests"] += 1
+        key = (tuple(shape), dtype)
+        arrays = self.buffers.get(key)
+        if arrays:
+            array = arrays.pop()
+            if arrays:
+                self.buffers.move_to_end(key)
+            else:
+                del self.buffers[key]
+            self.idle.discard(id(array))
+            self.size -= nbytes
+            self.stats["reused"] += 1
+            return array
+        self.stats["allocated"] += 1
+        return np.empty(shape, dtype)
+
+    def release(self, array):
+        """Offer array, whose owner no longer needs it, for reuse."""
+        if array.nbytes < self.min_bytes or array.nbytes > self.limit:
+            return
+        if not (array.flags.owndata and array.flags.c_contiguous and array.flags.writeable):
+            return
+        if id(array) in self.idle:
+            return
+        while self.size + array.nbytes > self.limit:
+            self.evict()
+        for holder in self.holders:
+            holder.forget(array)
+        key = (array.shape, array.dtype)
+        self.buffers.setdefault(key, []).append(array)
+        self.buffers.move_to_end(key)
+        self.idle.add(id(array))
+        self.size += array.nbytes
+        self.stats["returned"] += 1
+
+    def evict(self):
+        key, arrays = next(iter(self.buffers.items()))
+        array = arrays.pop(0)
+        if not arrays:
+            del self.buffers[key]
+        self.idle.discard(id(array))
+        self.size -= array.nbytes
+        self.stats["evicted"] += 1
+
+    def reuse_rate(self):
+        return self.stats["reused"] / self.stats["requests"] if self.stats["requests"] else 0.0
+
+    def report(self):
+        print(f"buffer pool: {self.stats['requests']} requests, {self.stats['reused']} reused "
+              f"({self.reuse_rate():.0%}), {self.stats['allocated']} allocated, "
+              f"{self.stats['returned']} returned, {self.stats['evicted']} evicted; "
+              f"{self.size / 2**20:.1f} MiB idle")
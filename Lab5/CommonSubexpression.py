@@ -0,0 +1,163 @@
+from collections import Counter, defaultdict
+
+import numpy as np
+
+import AST
+from Analysis import assigned_names
+from PassManager import Pass, walk, count_nodes
+
+CANDIDATES = (AST.Apply, AST.OpExpr, AST.UnaryExpr, AST.Transpose, AST.Matrix, AST.MatrixIndex)
+
+
+def get(slot):
+    container, key = slot
+    return container[key] if isinstance(container, list) else getattr(container, key)
+
+
+def put(slot, value):
+    container, key = slot
+    if isinstance(container, list):
+        container[key] = value
+    else:
+        setattr(container, key, value)
+
+
+def operand_slots(expr):
+    if isinstance(expr, AST.Apply):
+        return [(expr.args, i) for i in range(len(expr.args))]
+    if isinstance(expr, AST.OpExpr):
+        return [(expr, 'left'), (expr, 'right')]
+    if isinstance(expr, AST.UnaryExpr):
+        return [(expr, 'expr')]
+    if isinstance(expr, AST.Transpose):
+        return [(expr, 'matrix')]
+    if isinstance(expr, AST.Matrix):
+        return [(row, i) for row in expr.rows for i in range(len(row))]
+    if isinstance(expr, AST.MatrixIndex):
+        return [(expr.indices, i) for i in range(len(expr.indices))]
+    if isinstance(expr, AST.Range):
+        return [(expr, 'start'), (expr, 'end')] + ([(expr, 'step')] if expr.step is not None else [])
+    return []
+
+
+def statement_slots(statement):
+    """Slots of the expressions a statement evaluates exactly once, in order."""
+    if isinstance(statement, AST.Assign):
+        slots = [(statement, 'expr')]
+        if isinstance(statement.lvalue, AST.MatrixIndex):
+            slots += operand_slots(statement.lvalue)
+        return slots
+    if isinstance(statement, AST.Print):
+        return [(statement.printlist, i) for i in range(len(statement.printlist))]
+    if isinstance(statement, AST.If):
+        return [(statement, 'condition')]
+    if isinstance(statement, AST.For):
+        rng = statement._range
+        if not isinstance(rng, AST.Range):
+            return [(statement, '_range')]
+        return [(rng, 'start'), (rng, 'end')] + ([(rng, 'step')] if rng.step is not None else [])
+    if isinstance(statement, AST.Return) and statement.value is not None:
+        return [(statement, 'value')]
+    return []
+
+
+class Occurrence(object):
+    def __init__(self, index, slot, node):
+        self.index = index
+        self.slot = slot
+        self.node = node
+
+
+class CommonSubexpressionElimination(Pass):
+    """Computes expressions repeated within a basic block once.
+
+    A statement list is scanned in order and every pure subexpression is
+    keyed by its structure and the current version of each variable it
+    reads; assigning a variable, or storing into it by index, starts a new
+    version. Keys seen more than once get a __cse temporary assigned right
+    before the statement of their first occurrence, largest expressions
+    first.
+    """
+    name = "common-subexpression-elimination"
+
+    def __init__(self):
+        super().__init__()
+        self.temporaries = 0
+
+    def visit_Block(self, node):
+        node = self.generic_visit(node)
+        if isinstance(node.statements, list):
+            node.statements = self.eliminate(node.statements)
+        return node
+
+    def visit_Statements(self, node):
+        return self.visit_Block(node)
+
+    def key(self, expr, versions):
+        if isinstance(expr, AST.Variable):
+            return ('var', expr.name, versions[expr.name])
+        if isinstance(expr, AST.Literal):
+            value = expr.value
+            if isinstance(value, np.ndarray):
+                value = (value.shape, value.dtype.str, value.tobytes())
+            return ('literal', expr.typename, type(expr.value).__name__, value)
+        if isinstance(expr, AST.OpExpr):
+            label = expr.op
+        elif isinstance(expr, AST.UnaryExpr):
+            label = expr.op
+        elif isinstance(expr, AST.Apply):
+            label = expr.ref
+        elif isinstance(expr, AST.Matrix):
+            label = tuple(len(row) for row in expr.rows)
+        elif isinstance(expr, AST.MatrixIndex):
+            label = self.key(expr.matrix, versions)
+        else:
+            label = None
+        return (type(expr).__name__, label) + tuple(self.key(get(s), versions) for s in operand_slots(expr))
+
+    def collect(self, slot, index, versions, found):
+        expr = get(slot)
+        if not isinstance(expr, CANDIDATES):
+            return
+        for child in operand_slots(expr):
+            self.collect(child, index, versions, found)
+        found[self.key(expr, versions)].append(Occurrence(index, slot, expr))
+
+    def eliminate(self, statements):
+        versions = Counter()
+        found = defaultdict(list)
+        for index, statement in enumerate(statements):
+            for slot in statement_slots(statement):
+                self.collect(slot, index, versions, found)
+            for name in assigned_names(statement):
+                versions[name] += 1
+
+        inserts = defaultdict(list)
+        dead = set()
+        # Stable sort: larger expressions first, so a repeated subexpression
+        # of a repeated expression is only shared when it also occurs elsewhere.
+        for occurrences in sorted(found.values(), key=lambda o: -count_nodes(o[0].node)):
+            live = [o for o in occurrences if id(o.node) not in dead]
+            if len(live) < 2:
+                continue
+
+            first = live[0]
+            name = f"__cse{self.temporaries}"
+            self.temporaries += 1
+            lineno = first.node.lineno
+            # Inner temporaries are created later but must be computed first.
+            inserts[first.index].insert(0, AST.Assign(AST.Variable(name, lineno), '=', first.node, lineno))
+            for o in live:
+                if o is not first:
+                    dead.update(id(n) for n in walk(o.node))
+                put(o.slot, AST.Variable(name, o.node.lineno))
+            self.stats["temporaries"] += 1
+            self.stats["eliminated"] += len(live) - 1
+
+        if not inserts:
+            return statements
+        result = []
+        for index, statement in enumerate(statements):
+            result += inserts[index]
+            result.append(statement)
+        return result
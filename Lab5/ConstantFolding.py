@@ -0,0 +1,207 @@
+import numpy as np
+
+import AST
+from Analysis import assigned_names
+from Interpreter import Interpreter
+from PassManager import Pass, count_nodes
+from TypeChecker import TypeChecker
+from Values import MatrixValue
+
+# Folding zeros(10000) would put an 800 MB constant into the tree.
+MAX_FOLDED_ELEMENTS = 4096
+
+
+def operands(node):
+    if isinstance(node, AST.Apply):
+        return node.args
+    if isinstance(node, AST.OpExpr):
+        return [node.left, node.right]
+    if isinstance(node, AST.UnaryExpr):
+        return [node.expr]
+    if isinstance(node, AST.Transpose):
+        return [node.matrix]
+    if isinstance(node, AST.Matrix):
+        return [elem for row in node.rows for elem in row]
+    return None
+
+
+def constant(value):
+    """value as a Literal holds it, matrices as an ndarray (the Interpreter
+    makes a small one a SmallMatrix again); None if it cannot be one.
+    SmallMatrix and structured values such as zeros(n) are converted."""
+    if isinstance(value, MatrixValue):
+        value = value.to_ndarray()
+    if isinstance(value, np.ndarray):
+        if value.ndim == 2 and value.dtype.kind in "iuf" and value.size <= MAX_FOLDED_ELEMENTS:
+            return value
+        return None
+    return value if type(value) in (int, float, bool, str) else None
+
+
+def truth(node):
+    """The truth value of a scalar Literal as the Interpreter sees it, else None."""
+    if isinstance(node, AST.Literal) and not isinstance(node.value, np.ndarray):
+        return bool(node.value)
+    return None
+
+
+class ConstantFolding(Pass):
+    """Evaluates expressions whose operands are all known at compile time.
+
+    Operands are literals or variables whose value is known at that point
+    (a scalar constant assigned on every path and not reassigned since).
+    Folding runs the Interpreter itself on the subtree, so results match
+    the runtime exactly; anything that raises is left for the runtime. The
+    folded Literal keeps the type the TypeChecker inferred for the subtree.
+    """
+    name = "constant-folding"
+
+    def __init__(self):
+        super().__init__()
+        self.interpreter = Interpreter()
+        self.env = {}
+
+    def fold(self, node):
+        children = operands(node)
+        if children is None or not all(isinstance(c, AST.Literal) for c in children):
+            return node
+
+        checker = TypeChecker(quiet=True)
+        ty = checker.visit(node)
+        if any(d.severity == "error" for d in checker.diagnostics):
+            return node
+        try:
+            with np.errstate(all='raise'):
+                value = node.accept(self.interpreter)
+        except Exception:
+            return node
+        value = constant(value)
+        if value is None:
+            return node
+
+        self.stats["folded"] += count_nodes(node) - 1
+        return AST.Literal(value, ty, node.lineno)
+
+    def visit_Apply(self, node):
+        return self.fold(self.generic_visit(node))
+
+    def visit_OpExpr(self, node):
+        return self.fold(self.generic_visit(node))
+
+    def visit_UnaryExpr(self, node):
+        return self.fold(self.generic_visit(node))
+
+    def visit_Transpose(self, node):
+        return self.fold(self.generic_visit(node))
+
+    def visit_Matrix(self, node):
+        return self.fold(self.generic_visit(node))
+
+    def visit_Variable(self, node):
+        known = self.env.get(node.name)
+        if known is None:
+            return node
+        self.stats["propagated"] += 1
+        return AST.Literal(known.value, known.typename, node.lineno)
+
+    def visit_MatrixIndex(self, node):
+        node.indices = self.visit_list(node.indices)
+        return node
+
+    def visit_Assign(self, node):
+        node.expr = self.visit(node.expr)
+        if isinstance(node.lvalue, AST.MatrixIndex):
+            node.lvalue = self.visit(node.lvalue)
+            self.env.pop(node.lvalue.matrix.name, None)
+            return node
+
+        name = node.lvalue.name
+        if node.operator != '=' and name in self.env and isinstance(node.expr, AST.Literal):
+            folded = self.fold(AST.Apply(node.operator[:-1], [self.env[name], node.expr], node.lineno))
+            if isinstance(folded, AST.Literal):
+                node.operator, node.expr = '=', folded
+
+        if node.operator == '=' and isinstance(node.expr, AST.Literal) and not isinstance(node.expr.value, np.ndarray):
+            self.env[name] = node.expr
+        else:
+            self.env.pop(name, None)
+        return node
+
+    def visit_If(self, node):
+        node.condition = self.visit(node.condition)
+        taken = truth(node.condition)
+        before = self.env
+
+        self.env = dict(before)
+        node.block = self.visit(node.block)
+        after_then = self.env
+
+        self.env = dict(before)
+        if node._else is not None:
+            node._else = self.visit(node._else)
+        after_else = self.env
+
+        if taken is True:
+            self.env = after_then
+        elif taken is False:
+            self.env = after_else
+        else:
+            self.env = {k: v for k, v in after_then.items() if after_else.get(k) is v}
+        return node
+
+    def _loop(self, node, killed, visit_body):
+        for name in killed:
+            self.env.pop(name, None)
+        outside = dict(self.env)
+        visit_body()
+        self.env = outside
+        return node
+
+    def visit_While(self, node):
+        def body():
+            node.condition = self.visit(node.condition)
+            node.block = self.visit(node.block)
+        return self._loop(node, assigned_names(node), body)
+
+    def visit_For(self, node):
+        node._range = self.visit(node._range)
+
+        def body():
+            node.statement = self.visit(node.statement)
+        return self._loop(node, assigned_names(node), body)
+
+
+class DeadCodeElimination(Pass):
+    """Removes branches and loops with constant conditions and statements
+    that follow an unconditional break, continue or return."""
+    name = "dead-code-elimination"
+
+    def visit_If(self, node):
+        node = self.generic_visit(node)
+        taken = truth(node.condition)
+        if taken is None:
+            return node
+        self.stats["pruned-branches"] += 1
+        return node.block if taken else node._else
+
+    def visit_While(self, node):
+        node = self.generic_visit(node)
+        if truth(node.condition) is False:
+            self.stats["pruned-loops"] += 1
+            return None
+        return node
+
+    def visit_list(self, items):
+        result = super().visit_list(items)
+        for i, item in enumerate(result):
+            if self.terminates(item):
+                self.stats["unreachable-statements"] += len(result) - i - 1
+                return result[:i + 1]
+        return result
+
+    def terminates(self, node):
+        if isinstance(node, (AST.Break, AST.Continue, AST.Return)):
+            return True
+        if isinstance(node, AST.Block):
+            return any(self.terminates(s) for s in node.statements)
+        return False
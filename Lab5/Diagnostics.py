@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class Diagnostic:
+    line: Optional[int]
+    message: str
+    severity: str = "error"
+    source: str = "typechecker"
+
+    def __str__(self):
+        if self.line is not None:
+            return f"[line {self.line}] {self.message}"
+        return self.message
@@ -0,0 +1,124 @@
+import weakref
+from collections import Counter
+
+import numpy as np
+
+import AST
+from Block import concatenate, is_number
+from Memory import root
+from Values import dense
+
+# Length, along the growing axis, of the first buffer an appended matrix gets.
+MIN_CAPACITY = 16
+
+
+def self_append(node):
+    """The axis node appends along if it is `v = [v, x, ...]` (1) or
+    `v = [v; x, y; ...]` (0), else None."""
+    if node.operator != '=' or not isinstance(node.lvalue, AST.Variable) or not isinstance(node.expr, AST.Matrix):
+        return None
+    rows = node.expr.rows
+    if not rows or not rows[0]:
+        return None
+    first = rows[0][0]
+    if not isinstance(first, AST.Variable) or first.name != node.lvalue.name:
+        return None
+    if len(rows) == 1 and len(rows[0]) > 1:
+        return 1
+    if len(rows) > 1 and len(rows[0]) == 1:
+        return 0
+    return None
+
+
+def leading(buffer, axis, length):
+    """The first length rows (axis 0) or columns (axis 1) of buffer."""
+    return buffer[:length] if axis == 0 else buffer[:, :length]
+
+
+class GrowthBuffers(object):
+    """Spare room behind matrices a script grows by appending to them.
+
+    The value of `v` after `v = [v, x]` is a view of the leading columns
+    (rows, for `v = [v; x]`) of a larger buffer, so indexing, printing and
+    every operator see an ordinary ndarray. The next append writes x into
+    the room after the view when v is still the longest view of its
+    buffer, and moves to a buffer twice as long when the room runs out,
+    which makes appending amortized O(1). A shorter view of the same
+    buffer, left in another variable, stays valid: appending to it copies.
+    """
+
+    def __init__(self):
+        # Length in use of each buffer, by id, with a weak reference to it.
+        self.used = {}
+        self.stats = Counter()
+
+    def _forget(self, key):
+        return lambda _: self.used.pop(key, None)
+
+    def forget(self, buffer):
+        """Stop treating buffer as room to grow into, e.g. when the buffer
+        pool takes it back to hand to another matrix."""
+        self.used.pop(id(buffer), None)
+
+    def _room(self, current, axis, dtype):
+        """The buffer behind current if current is the longest view of it
+        and it has room for more."""
+        buffer = root(current)
+        entry = self.used.get(id(buffer))
+        if entry is None or entry[0]() is not buffer or buffer.dtype != dtype:
+            return None
+        if entry[1] != current.shape[axis] or entry[2] != axis or current.base is None:
+            return None
+        view = leading(buffer, axis, entry[1])
+        if current.shape != view.shape or current.strides != view.strides \
+                or current.__array_interface__['data'][0] != buffer.__array_interface__['data'][0]:
+            return None
+        return buffer
+
+    def append(self, rows, axis):
+        """The value of the literal [v, x, ...] (axis 1) or [v; x, y; ...]
+        (axis 0) with these rows of values, as a view of a buffer with room
+        to grow; None if they are not numeric matrices and scalars that
+        fit together, which the ordinary literal then reports."""
+        current = dense(rows[0][0])
+        try:
+            pieces = [dense(piece) for piece in rows[0][1:]] if axis == 1 else \
+                [dense(row[0]) if len(row) == 1 else concatenate([row]) for row in rows[1:]]
+        except ValueError:
+            return None
+        if not isinstance(current, np.ndarray) or current.ndim != 2 or current.dtype.kind not in 'biuf':
+            return None
+        extent = current.shape[1 - axis]
+        added = []
+        for piece in pieces:
+            if isinstance(piece, np.ndarray) and piece.ndim == 2 and piece.dtype.kind in 'biuf':
+                if piece.shape[1 - axis] != extent:
+                    return None
+                added.append(piece.shape[axis])
+            elif is_number(piece) and extent == 1:
+                added.append(1)
+            else:
+                return None
+
+        dtype = np.result_type(current, *pieces)
+        length = current.shape[axis]
+        total = length + sum(added)
+        buffer = self._room(current, axis, dtype)
+        if buffer is None or buffer.shape[axis] < total:
+            capacity = max(MIN_CAPACITY, 2 * total)
+            buffer = np.empty((capacity, extent) if axis == 0 else (extent, capacity), dtype)
+            leading(buffer, axis, length)[...] = current
+            self.used[id(buffer)] = (weakref.ref(buffer, self._forget(id(buffer))), length, axis)
+            self.stats["grown"] += 1
+        else:
+            self.stats["in place"] += 1
+
+        position = length
+        for piece, size in zip(pieces, added):
+            if axis == 0:
+                buffer[position:position + size] = piece
+            else:
+                buffer[:, position:position + size] = piece
+            position += size
+        self.used[id(buffer)] = (self.used[id(buffer)][0], total, axis)
+        return leading(buffer, axis, total)
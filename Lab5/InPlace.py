@@ -0,0 +1,44 @@
+import AST
+from Analysis import static_types
+from PassManager import Pass
+from TypeChecker import is_scalar
+
+# Operators of `A = A op B` that the Interpreter can apply to A in place.
+SELF_UPDATES = {'+', '-', '/', '.+', '.-', '.*', './'}
+
+
+def is_self_update(node):
+    expr = node.expr
+    return (node.operator == '=' and isinstance(expr, AST.Apply) and expr.ref in SELF_UPDATES
+            and len(expr.args) == 2 and isinstance(expr.args[0], AST.Variable)
+            and expr.args[0].name == node.lvalue.name)
+
+
+class InPlaceUpdate(Pass):
+    """Marks `A op= B` and `A = A op B` for in-place evaluation.
+
+    The Interpreter checks at run time that A is a matrix no other variable
+    shares and that the result keeps its shape and element type, and
+    builds a new matrix otherwise.
+    """
+    name = "in-place-update"
+
+    def __init__(self):
+        super().__init__()
+        self.types = None
+
+    def run(self, ast):
+        self.types = static_types(ast)
+        return self.visit(ast)
+
+    def visit_Assign(self, node):
+        if not isinstance(node.lvalue, AST.Variable):
+            return node
+        if node.operator == '=' and not is_self_update(node):
+            return node
+        # The TypeChecker types an assignment as its target.
+        if is_scalar(self.types.type_of(node)):
+            return node
+        node.inplace = True
+        self.stats["marked"] += 1
+        return node
@@ -0,0 +1,108 @@
+import numpy as np
+
+from Block import BlockMatrix
+from Ranges import LazyRange
+from Values import check_index, dense, is_matrix
+
+
+def index_part(value, size, axis):
+    """An index along an axis of this size as an int, a slice or an int
+    array: a range becomes a slice, and so does ':' (which the Interpreter
+    passes as slice(None)). Raises IndexError for anything else."""
+    if isinstance(value, slice):
+        return value
+    if isinstance(value, LazyRange):
+        if value.is_float:
+            raise IndexError("range indices must be integers")
+        if not value.count:
+            return slice(0, 0)
+        last = value.start + (value.count - 1) * value.step
+        for end in (value.start, last):
+            if not 0 <= end < size:
+                raise IndexError(f"index {end} is out of bounds for axis {axis} with size {size}")
+        stop = value.start + value.count * value.step
+        return slice(value.start, stop if stop >= 0 else None, value.step)
+    if is_matrix(value):
+        positions = np.asarray(dense(value)).ravel()
+        if positions.dtype == np.bool_:
+            if positions.size != size:
+                raise IndexError(f"mask of {positions.size} elements for axis {axis} with size {size}")
+            return np.flatnonzero(positions)
+        if positions.dtype.kind not in 'iu':
+            raise IndexError(f"matrix indices must be integers, got {positions.dtype}")
+        return positions
+    if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, np.integer)):
+        raise IndexError(f"indices must be integers, got {type(value).__name__}")
+    return int(value)
+
+
+def is_mask(matrix, values):
+    """Whether values is a single bool matrix of the shape of matrix,
+    which selects the elements where it is true."""
+    if len(values) != 1 or not is_matrix(values[0]):
+        return False
+    mask = values[0]
+    return mask.dtype == np.bool_ and mask.shape == np.shape(matrix) and len(mask.shape) == 2
+
+
+def selects_submatrix(values):
+    """Whether index values include a range, ':' or an index array."""
+    return any(isinstance(value, (slice, LazyRange)) or is_matrix(value) for value in values)
+
+
+def index_parts(matrix, values):
+    """The index along each axis of matrix that values select, with
+    BlockMatrix axes counted in blocks."""
+    if is_mask(matrix, values):
+        if isinstance(matrix, BlockMatrix):
+            raise IndexError("a block matrix is indexed by blocks, not by a mask")
+        return (np.asarray(dense(values[0])),)
+    if isinstance(matrix, BlockMatrix):
+        sizes = (len(matrix.heights), len(matrix.widths))
+    else:
+        sizes = np.shape(matrix)
+    return tuple(index_part(value, sizes[axis] if axis < len(sizes) else 0, axis)
+                 for axis, value in enumerate(values))
+
+
+def masks(parts):
+    """Whether parts, from index_parts, are a mask of the whole matrix."""
+    return len(parts) == 1 and isinstance(parts[0], np.ndarray) and parts[0].ndim == 2
+
+
+def numpy_key(matrix, parts):
+    """parts as a NumPy key that keeps a submatrix two-dimensional: an int
+    next to a slice or array becomes a one-element slice, and two arrays
+    select the rows and columns they list (np.ix_), not pairs of them."""
+    if len(parts) != 2 or all(type(part) is int for part in parts):
+        return parts[0] if len(parts) == 1 else parts
+    key = []
+    for axis, part in enumerate(parts):
+        if type(part) is int:
+            i = check_index(part, np.shape(matrix)[axis], axis)
+            part = slice(i, i + 1)
+        key.append(part)
+    if all(isinstance(part, np.ndarray) for part in key):
+        return np.ix_(*key)
+    return tuple(key)
+
+
+def select(matrix, parts):
+    """The submatrix of matrix that parts select: a view of it where NumPy
+    can give one (ints and slices), a copy for index arrays."""
+    if isinstance(matrix, BlockMatrix):
+        return matrix[parts if len(parts) == 2 else parts[0]]
+    matrix = dense(matrix)
+    if masks(parts):
+        return matrix[parts[0]].reshape(1, -1)
+    return matrix[numpy_key(matrix, parts)]
+
+
+def assign(matrix, parts, value):
+    """Store value, a scalar or a matrix of the selection's shape, into the
+    part of the ndarray matrix that parts select, in one NumPy store."""
+    value = dense(value)
+    if masks(parts):
+        matrix[parts[0]] = value.ravel() if isinstance(value, np.ndarray) else value
+        return
+    matrix[numpy_key(matrix, parts)] = value
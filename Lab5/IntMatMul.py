@@ -0,0 +1,46 @@
+import numpy as np
+
+# Integers up to this magnitude are exact in float64.
+EXACT = 1 << 53
+
+# A blocked product with fewer inner terms per block than this spends more
+# time converting partial results than the native integer loop would.
+MIN_BLOCK = 64
+
+
+def magnitude(matrix):
+    """Largest absolute value in an integer matrix, as a Python int."""
+    if matrix.size == 0:
+        return 0
+    return max(abs(int(matrix.min())), abs(int(matrix.max())))
+
+
+def int_matmul(a, b, out=None):
+    """a @ b for int64 matrices, computed with float64 BLAS.
+
+    Every partial sum of the product is at most max|a| * max|b| * k in
+    magnitude; when that bound is below 2**53 the float64 product is exact
+    and is converted back. Otherwise the inner dimension is split into
+    blocks small enough to be exact and the block products are summed in
+    int64, which wraps on overflow exactly like the native product. Falls
+    back to the native loop when even single terms may not be exact.
+    """
+    if a.dtype != np.int64 or b.dtype != np.int64 or a.ndim != 2 or b.ndim != 2:
+        return np.matmul(a, b, out=out)
+    k = a.shape[1]
+    term = magnitude(a) * magnitude(b)
+    if out is None:
+        out = np.empty((a.shape[0], b.shape[1]), np.int64)
+    if term * k < EXACT:
+        np.copyto(out, np.matmul(a.astype(np.float64), b.astype(np.float64)), casting='unsafe')
+        return out
+
+    block = (EXACT - 1) // term if term else k
+    if block < MIN_BLOCK:
+        return np.matmul(a, b, out=out)
+    out[...] = 0
+    for start in range(0, k, block):
+        stop = min(start + block, k)
+        partial = np.matmul(a[:, start:stop].astype(np.float64), b[start:stop].astype(np.float64))
+        out += partial.astype(out.dtype)
+    return out
@@ -3,60 +3,163 @@ from SymbolTable import SymbolTable
 from Memory import *
 from Exceptions import  *
 from visit import *
+from MatrixChain import ChainPlans, multiply
+from Kernels import Kernel, is_elementwise
+from BufferPool import BufferPool, ufunc_dtype
+from IntMatMul import int_matmul
+from Values import ConstantMatrix, IdentityMatrix, MatrixValue, SmallMatrix, StructuredMatrix, dense
+from Sparse import sparsify
+from Block import BlockMatrix, assemble, has_blocks
+from Growth import GrowthBuffers, self_append
+from Rope import Rope, concat, flat
+from Ranges import LazyRange
+from Indexing import assign, index_parts, select, selects_submatrix
 import sys
+import builtins
 import operator
+from collections import Counter
 import numpy as np
 
 sys.setrecursionlimit(10000)
 
+# ufuncs applying `A op= B` and `A = A op B` to the matrix in A.
+IN_PLACE = {
+    '+=': np.add, '-=': np.subtract, '*=': np.multiply, '/=': np.true_divide,
+    '+': np.add, '-': np.subtract, '/': np.true_divide,
+    '.+': np.add, '.-': np.subtract, '.*': np.multiply, './': np.true_divide,
+}
+
+COMPOUND = {'+=': operator.add, '-=': operator.sub, '*=': operator.mul, '/=': operator.truediv}
+
 class Interpreter(object):
 
     def __init__(self):
-        self.memory_stack = MemoryStack()
+        self.pool = BufferPool()
+        self.memory_stack = MemoryStack(pool=self.pool)
         self.memory_stack.push(Memory("global"))
 
         self.builtins = {
             'zeros': self._zeros,
             'ones': self._ones,
             'eye': self._eye,
+            'any': self._any,
+            'all': self._all,
+            'find': self._find,
+            'count': self._count,
+            'sum': self._reduction(np.sum),
+            'prod': self._reduction(np.prod),
+            'min': self._reduction(np.min, needs_elements=True),
+            'max': self._reduction(np.max, needs_elements=True),
+            'mean': self._reduction(np.mean, needs_elements=True),
         }
 
+        self.chain_plans = ChainPlans()
+        self.kernels = {}
+        self.small_literals = {}
+        self.growth = GrowthBuffers()
+        self.pool.holders.append(self.growth)
+        self.fuse_elementwise = True
+        self.update_in_place = True
+        self.small_matrices = True
+        self.structured_matrices = True
+        self.sparse_matrices = True
+        self.grow_appends = True
+        self.ropes = True
+        self.stats = Counter()
+
         self.operators = {
             '+': self._add,
             '-': self._sub,
             '*': self._mul,
             '/': self._div,
-            '==': operator.eq,
-            '!=': operator.ne,
-            '<': operator.lt,
-            '<=': operator.le,
-            '>': operator.gt,
-            '>=': operator.ge,
+            '==': self._comparison(operator.eq),
+            '!=': self._comparison(operator.ne),
+            '<': self._comparison(operator.lt),
+            '<=': self._comparison(operator.le),
+            '>': self._comparison(operator.gt),
+            '>=': self._comparison(operator.ge),
             '.+': self._elem_add,
             '.-': self._elem_sub,
             '.*': self._elem_mul,
             './': self._elem_div,
         }
 
+    @staticmethod
+    def _shape(n, args):
+        m = int(args[0]) if args else n
+        if n < 0 or m < 0:
+            raise ValueError("negative dimensions are not allowed")
+        return n, m
+
     def _zeros(self, n, *args):
-        if args:
-            m = int(args[0])
-            return np.zeros((n, m), dtype=int)
-        return np.zeros((n, n), dtype=int)
+        return ConstantMatrix(*self._shape(n, args), 0)
 
     def _ones(self, n, *args):
-        if args:
-            m = int(args[0])
-            return np.ones((n, m), dtype=int)
-        return np.ones((n, n), dtype=int)
+        return ConstantMatrix(*self._shape(n, args), 1)
 
     def _eye(self, n, *args):
-        if args:
-            m = int(args[0])
-            return np.eye(n, m, dtype=int)
-        return np.eye(n, dtype=int)
+        return IdentityMatrix(*self._shape(n, args), 1)
+
+    # Masks: a matrix read as the set of its nonzero elements.
+    @staticmethod
+    def _any(mask):
+        return bool(np.any(dense(mask)))
+
+    @staticmethod
+    def _all(mask):
+        return bool(np.all(dense(mask)))
+
+    @staticmethod
+    def _find(mask):
+        """Positions of the nonzero elements, counted along the rows, as a
+        row vector; for a row vector mask they are its column indices."""
+        return np.flatnonzero(dense(mask)).reshape(1, -1)
+
+    @staticmethod
+    def _count(mask):
+        return int(np.count_nonzero(dense(mask)))
+
+    # Reductions: a matrix folded to one number, or along an axis.
+    @staticmethod
+    def _reduction(reduce, needs_elements=False):
+        """reduce over the elements of a matrix, giving a scalar, or over
+        one axis: 0 folds each column into a row vector, 1 each row into a
+        column vector."""
+        def apply(matrix, *axis):
+            if not isinstance(matrix, (np.ndarray, MatrixValue)):
+                raise TypeError(f"{reduce.__name__} expects a matrix, got {type(matrix).__name__}")
+            array = dense(matrix)
+            if len(axis) > 1 or (axis and axis[0] not in (0, 1)):
+                raise IndexError(f"{reduce.__name__} takes axis 0 or 1, got {', '.join(map(str, axis))}")
+            if needs_elements and (array.shape[axis[0]] if axis else array.size) == 0:
+                raise DimensionError(f"{reduce.__name__} of an empty matrix")
+            if axis:
+                return reduce(array, axis=axis[0], keepdims=True)
+            return reduce(array).item()
+        return apply
+
+    @staticmethod
+    def _comparison(compare):
+        """compare applied elementwise to matrices, giving a bool mask."""
+        def apply(a, b):
+            try:
+                return compare(a, b)
+            except ValueError as e:
+                raise DimensionError(f"Cannot compare: {e}") from e
+        return apply
+
+    @staticmethod
+    def _truth(value):
+        """Whether a condition holds; a matrix holds if it has elements and
+        all of them are nonzero."""
+        if isinstance(value, (np.ndarray, MatrixValue)):
+            array = dense(value)
+            return array.size > 0 and bool(array.all())
+        return bool(value)
 
     def _add(self, a, b):
+        if self.ropes and isinstance(a, (str, Rope)) and isinstance(b, (str, Rope)):
+            return concat(a, b)
         try:
             return a + b
         except (DimensionError, TypeError) as e:
@@ -65,9 +168,39 @@ class Interpreter(object):
     def _sub(self, a, b):
         return a - b
 
+    def _binary(self, op, a, b):
+        """a op b, on small matrices without NumPy where they allow it."""
+        if op != '+' and (type(a) is Rope or type(b) is Rope):
+            a, b = flat(a), flat(b)
+        if isinstance(a, MatrixValue) or isinstance(b, MatrixValue):
+            result = a.binary(op, b) if isinstance(a, MatrixValue) else NotImplemented
+            if result is NotImplemented and isinstance(b, MatrixValue):
+                result = b.binary(op, a, reflected=True)
+            if result is not NotImplemented:
+                return result
+            a, b = dense(a), dense(b)
+        return self.operators[op](a, b)
+
+    def _pooled(self, ufunc, a, b):
+        """ufunc(a, b) for two matrices, into a buffer from the pool."""
+        if a.dtype.kind not in 'biuf' or b.dtype.kind not in 'biuf' \
+                or max(a.nbytes, b.nbytes) < self.pool.min_bytes:
+            return ufunc(a, b)
+        out = self.pool.acquire(np.broadcast_shapes(a.shape, b.shape), ufunc_dtype(ufunc, a.dtype, b.dtype))
+        return ufunc(a, b, out=out)
+
+    def _matmul(self, a, b):
+        if a.ndim != 2 or b.ndim != 2 or a.shape[1] != b.shape[0] \
+                or a.dtype.kind not in 'biuf' or b.dtype.kind not in 'biuf':
+            return a @ b
+        out = self.pool.acquire((a.shape[0], b.shape[1]), ufunc_dtype(np.matmul, a.dtype, b.dtype))
+        if a.dtype.kind == 'i' and b.dtype.kind == 'i':
+            return int_matmul(a, b, out)
+        return np.matmul(a, b, out=out)
+
     def _mul(self, a, b):
         if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
-            return a @ b
+            return self._matmul(a, b)
         elif isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
             return np.multiply(a, b)
         else:
@@ -94,7 +227,7 @@ class Interpreter(object):
     def _elem_add(self, a, b):
         if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
             try:
-                return a + b
+                return self._pooled(np.add, a, b)
             except ValueError as e:
                 raise DimensionError(f"Matrix dimensions incompatible for element-wise addition: {e}")
         else:
@@ -103,7 +236,7 @@ class Interpreter(object):
     def _elem_sub(self, a, b):
         if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
             try:
-                return a - b
+                return self._pooled(np.subtract, a, b)
             except ValueError as e:
                 raise DimensionError(f"Matrix dimensions incompatible for element-wise subtraction: {e}")
         else:
@@ -112,7 +245,7 @@ class Interpreter(object):
     def _elem_mul(self, a, b):
         if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
             try:
-                return a * b
+                return self._pooled(np.multiply, a, b)
             except ValueError as e:
                 raise DimensionError(f"Matrix dimensions incompatible for element-wise multiplication: {e}")
         else:
@@ -121,7 +254,7 @@ class Interpreter(object):
     def _elem_div(self, a, b):
         if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
             try:
-                return a / b
+                return self._pooled(np.true_divide, a, b)
             except ValueError as e:
                 raise DimensionError(f"Matrix dimensions incompatible for element-wise division: {e}")
         else:
@@ -162,19 +295,90 @@ class Interpreter(object):
 
     @when(AST.Literal)
     def visit(self, node):
+        if isinstance(node.value, np.ndarray) and self.small_matrices:
+            entry = self.small_literals.get(id(node))
+            if entry is None or entry[0] is not node:
+                entry = self.small_literals[id(node)] = (node, SmallMatrix.from_ndarray(node.value))
+            if entry[1] is not None:
+                return entry[1]
+        if isinstance(node.value, np.ndarray):
+            # a store through a variable copies the folded constant first
+            self.memory_stack.pin(node.value)
         return node.value
 
     @when(AST.Variable)
     def visit(self, node):
         return self.memory_stack.get(node.name)
 
+    def _can_update(self, op, current, value):
+        if not isinstance(current, np.ndarray) or not current.flags.writeable:
+            return False
+        if not self.memory_stack.exclusive(current):
+            return False
+        if op.startswith('.') and not isinstance(value, np.ndarray):
+            return False
+        try:
+            # The result must keep the shape and element type of current.
+            probe = IN_PLACE[op](np.empty(0, current.dtype),
+                                 np.empty(0, value.dtype) if isinstance(value, np.ndarray) else value)
+            shape = np.broadcast_shapes(current.shape, np.shape(value))
+        except Exception:
+            return False
+        return probe.dtype == current.dtype and shape == current.shape
+
+    def _update_in_place(self, node):
+        name = node.lvalue.name
+        if node.operator == '=':
+            op = node.expr.ref
+            current = node.expr.args[0].accept(self)
+            value = node.expr.args[1].accept(self)
+        else:
+            op = node.operator
+            value = node.expr.accept(self)
+            current = self.memory_stack.get(name)
+        if isinstance(current, np.ndarray):
+            value = dense(value)
+
+        if self.update_in_place and self._can_update(op, current, value):
+            IN_PLACE[op](current, value, out=current)
+            self.stats["in-place"] += 1
+            return current
+
+        if node.operator == '=':
+            result = self._binary(op, current, value)
+        else:
+            result = COMPOUND[op](current, value)
+        self.stats["copied"] += 1
+        self.memory_stack.set(name, result)
+        return result
+
+    def _append(self, node, axis):
+        """`v = [v, x]` or `v = [v; x]`, written into spare room behind v
+        when there is some."""
+        rows = [[elem.accept(self) for elem in row] for row in node.expr.rows]
+        result = self.growth.append(rows, axis)
+        if result is None:
+            result = self._literal(rows, node.expr)
+        self.memory_stack.set(node.lvalue.name, result)
+        return result
+
     @when(AST.Assign)
     def visit(self, node):
+        if node.inplace:
+            return self._update_in_place(node)
+        if self.grow_appends:
+            axis = self_append(node)
+            if axis is not None:
+                return self._append(node, axis)
+
         value = node.expr.accept(self)
 
         if isinstance(node.lvalue, AST.MatrixIndex):
-            matrix = self.memory_stack.get(node.lvalue.matrix.name)
-            indices = [idx.accept(self) for idx in node.lvalue.indices]
+            name = node.lvalue.matrix.name
+            matrix = self.memory_stack.writable(name)
+            indices = [self._index(idx) for idx in node.lvalue.indices]
+            if selects_submatrix(indices):
+                return self._store_submatrix(node, matrix, indices, value)
 
             if node.operator == '=':
                 result = value
@@ -213,6 +417,15 @@ class Interpreter(object):
             else:
                 raise UnknownOperatorError(f"Unknown assignment operator: {node.operator}")
 
+            if isinstance(matrix, MatrixValue):
+                stored = matrix.with_item(tuple(indices), result)
+                if stored is not None:
+                    if stored is not matrix:
+                        self.memory_stack.set(name, stored)
+                    return result
+                matrix = matrix.to_ndarray()
+                self.memory_stack.set(name, matrix)
+
             if len(indices) == 1:
                 matrix[indices[0]] = result
             elif len(indices) == 2:
@@ -223,7 +436,7 @@ class Interpreter(object):
             return result
 
         if node.operator == '=':
-            result = value
+            result = sparsify(value) if node.storage == "sparse" and self.sparse_matrices else value
         elif node.operator == '+=':
             current = self.memory_stack.get(node.lvalue.name)
             result = current + value
@@ -247,11 +460,34 @@ class Interpreter(object):
 
         return result
 
+    def _store_submatrix(self, node, matrix, indices, value):
+        """A[rows, cols] op= value for ranges, ':' and index arrays, as one
+        vectorized store into the selected part of A."""
+        name = node.lvalue.matrix.name
+        try:
+            parts = index_parts(matrix, indices)
+            if len(parts) not in (1, 2):
+                raise IndexError(f"Invalid number of indices: expected 1 or 2, got {len(parts)}", node.lineno)
+            if node.operator != '=':
+                value = COMPOUND[node.operator](select(matrix, parts), value)
+            if isinstance(matrix, BlockMatrix):
+                matrix.with_item(parts if len(parts) == 2 else parts + (slice(None),), value)
+                return value
+            if isinstance(matrix, MatrixValue):
+                matrix = matrix.to_ndarray()
+                self.memory_stack.set(name, matrix)
+            assign(matrix, parts, value)
+        except ValueError as e:
+            raise DimensionError(f"Cannot store into {name}: {e}", node.lineno) from e
+        except builtins.IndexError as e:
+            raise IndexError(f"Index out of bounds: {e}", node.lineno) from e
+        return value
+
     @when(AST.If)
     def visit(self, node):
         condition = node.condition.accept(self)
 
-        if condition:
+        if self._truth(condition):
             return node.block.accept(self)
         elif node._else:
             return node._else.accept(self)
@@ -262,7 +498,7 @@ class Interpreter(object):
     def visit(self, node):
         result = None
         try:
-            while node.condition.accept(self):
+            while self._truth(node.condition.accept(self)):
                 try:
                     result = node.block.accept(self)
                 except ContinueException:
@@ -276,10 +512,19 @@ class Interpreter(object):
 
     @when(AST.For)
     def visit(self, node):
-        range_vals = node._range.accept(self)
+        matrix = None
+        if isinstance(node._range, AST.Range):
+            range_vals = self._range(node._range)
+        else:
+            matrix, range_vals = self._rows(node._range.accept(self), node)
         self.memory_stack.push(Memory("for"))
         result = None
         try:
+            if matrix is not None:
+                # Bound for the whole loop, so that stores into the matrix
+                # in the body copy it and leave the rows still to come, and
+                # the buffer the rows view stays owned until the loop ends.
+                self.memory_stack.insert(f"for {node.var.name}", matrix)
             for val in range_vals:
                 self.memory_stack.insert(node.var.name, val)
                 try:
@@ -292,13 +537,42 @@ class Interpreter(object):
             self.memory_stack.pop()
         return result
 
-    @when(AST.Range)
-    def visit(self, node):
+    def _rows(self, matrix, node):
+        """The value the rows come from and the rows, as 1 x n views of
+        it; a block matrix gives its block rows, any other matrix value
+        the rows of its dense array, which is then what they view."""
+        if isinstance(matrix, BlockMatrix):
+            return matrix, (matrix[i] for i in range(len(matrix.heights)))
+        array = dense(matrix)
+        if not isinstance(array, np.ndarray):
+            raise TypeError(f"For loop needs a range or a matrix, got {type(matrix).__name__}", node.lineno)
+        return array, array[None, None] if array.ndim == 1 else array[:, None]
+
+    def _range(self, node):
+        """The elements of a range, computed as they are iterated."""
         start = node.start.accept(self)
         end = node.end.accept(self)
         step = node.step.accept(self) if node.step else 1
 
-        return list(range(start, end + 1, step))
+        try:
+            elements = LazyRange.from_bounds(start, end, step)
+        except ValueError as e:
+            raise RuntimeError(str(e), node.lineno) from e
+        if elements is None:
+            raise TypeError("Range bounds must be numbers", node.lineno)
+        return elements
+
+    @when(AST.Range)
+    def visit(self, node):
+        vector = self._range(node).to_ndarray()
+        if self.small_matrices and SmallMatrix.fits_shape(*vector.shape):
+            return SmallMatrix.from_ndarray(vector)
+        return vector
+
+    @when(AST.Release)
+    def visit(self, node):
+        for name in node.names:
+            self.memory_stack.release(name)
 
     @when(AST.Break)
     def visit(self, node):
@@ -318,22 +592,44 @@ class Interpreter(object):
         values = [elem.accept(self) for elem in node.printlist]
         formatted_values = []
         for val in values:
-            if isinstance(val, np.ndarray):
+            if isinstance(val, (np.ndarray, MatrixValue)):
                 formatted_values.append(val.tolist())
             else:
                 formatted_values.append(val)
         print(*formatted_values)
         return None
 
+    def _elementwise(self, kernel):
+        values = [leaf.accept(self) for leaf in kernel.leaves]
+        result = kernel.evaluate(values, self.pool) if self.fuse_elementwise else None
+        if result is not None:
+            return result
+        for op, inputs in kernel.steps:
+            args = [values[i] for i in inputs]
+            values.append(-args[0] if op == 'neg' else self._binary(op, *args))
+        return values[-1]
+
     @when(AST.Apply)
     def visit(self, node):
+        if is_elementwise(node):
+            entry = self.kernels.get(id(node))
+            if entry is None or entry[0] is not node:
+                entry = self.kernels[id(node)] = (node, Kernel(node))
+            if len(entry[1].steps) > 1:
+                return self._elementwise(entry[1])
+
         if node.ref in self.builtins:
             args = [arg.accept(self) for arg in node.args]
-            return self.builtins[node.ref](*args)
+            result = self.builtins[node.ref](*args)
+            if not isinstance(result, StructuredMatrix):
+                return result
+            if self.small_matrices and SmallMatrix.fits_shape(*result.shape):
+                return SmallMatrix.from_ndarray(result.to_ndarray())
+            return result if self.structured_matrices else result.to_ndarray()
 
         if node.ref in self.operators:
             args = [arg.accept(self) for arg in node.args]
-            return self.operators[node.ref](*args)
+            return self._binary(node.ref, *args)
 
         raise UnknownFunctionError(f"Unknown function or operator: {node.ref}")
 
@@ -343,10 +639,23 @@ class Interpreter(object):
         right = node.right.accept(self)
 
         if node.op in self.operators:
-            return self.operators[node.op](left, right)
+            return self._binary(node.op, left, right)
         else:
             raise UnknownOperatorError(f"Unknown operator: {node.op}")
 
+    @when(AST.MatMulChain)
+    def visit(self, node):
+        factors = [factor.accept(self) for factor in node.factors]
+        if all(isinstance(f, np.ndarray) and f.ndim == 2 for f in factors) and \
+                all(a.shape[1] == b.shape[0] for a, b in zip(factors, factors[1:])):
+            dims = tuple(f.shape[0] for f in factors) + (factors[-1].shape[1],)
+            return multiply(self.chain_plans.plan(dims), factors, self._matmul)
+
+        result = factors[0]
+        for factor in factors[1:]:
+            result = self._binary('*', result, factor)
+        return result
+
     @when(AST.UnaryExpr)
     def visit(self, node):
         value = node.expr.accept(self)
@@ -365,22 +674,49 @@ class Interpreter(object):
             for elem in row:
                 row_values.append(elem.accept(self))
             result.append(row_values)
-        return np.array(result)
+        return self._literal(result, node)
+
+    def _literal(self, result, node):
+        """The matrix a literal with these rows of values stands for."""
+        small = SmallMatrix.from_rows(result) if self.small_matrices else None
+        if small is not None:
+            return small
+        if has_blocks(result):
+            try:
+                matrix = assemble(result)
+            except ValueError as e:
+                raise DimensionError(str(e), node.lineno) from e
+            if matrix is not None:
+                return matrix
+        return np.array([[dense(value) for value in row] for row in result])
 
     @when(AST.Transpose)
     def visit(self, node):
         matrix = node.matrix.accept(self)
+        if isinstance(matrix, MatrixValue):
+            return matrix.transpose()
         if not isinstance(matrix, np.ndarray):
             raise TypeError("Transpose requires a matrix")
 
         return matrix.T
 
+    @when(AST.Colon)
+    def visit(self, node):
+        return slice(None)
+
+    def _index(self, node):
+        """The value of an index: a range stays a LazyRange, which selects
+        a slice rather than a vector of positions."""
+        return self._range(node) if isinstance(node, AST.Range) else node.accept(self)
+
     @when(AST.MatrixIndex)
     def visit(self, node):
         matrix = self.memory_stack.get(node.matrix.name)
-        indices = [idx.accept(self) for idx in node.indices]
+        indices = [self._index(idx) for idx in node.indices]
 
         try:
+            if selects_submatrix(indices) and len(indices) in (1, 2):
+                return select(matrix, index_parts(matrix, indices))
             if len(indices) == 1:
                 return matrix[indices[0]]
             elif len(indices) == 2:
@@ -0,0 +1,102 @@
+import numpy as np
+
+import AST
+
+UFUNCS = {
+    '.+': np.add,
+    '.-': np.subtract,
+    '.*': np.multiply,
+    './': np.true_divide,
+    # Unary minus, a step of its own that no binary operator maps to.
+    'neg': np.negative,
+}
+
+# Binary operators a kernel fuses.
+ELEMENTWISE = {'.+', '.-', '.*', './'}
+
+# Rows are processed in chunks of about this many elements, so that the
+# intermediates of a chunk stay in cache.
+CHUNK_ELEMENTS = 1 << 15
+
+# Below this many result elements the plain operators are faster.
+MIN_FUSED_ELEMENTS = 1 << 14
+
+
+def is_elementwise(node):
+    return isinstance(node, AST.Apply) and node.ref in ELEMENTWISE and len(node.args) == 2
+
+
+class Kernel(object):
+    """An elementwise operator tree (.+ .- .* ./ and unary minus below
+    them) flattened into steps over the values of its leaves.
+
+    Slot i < len(leaves) holds the value of leaf i; step j computes slot
+    len(leaves) + j by applying its operator to earlier slots. The last
+    step is the root.
+    """
+
+    def __init__(self, root):
+        self.leaves = []
+        steps = []
+        self._collect(root, steps)
+        slot = {}
+        for j, (node, _, _) in enumerate(steps):
+            slot[id(node)] = len(self.leaves) + j
+        self.steps = [(op, [slot[ref[1]] if ref[0] == 'step' else ref[1] for ref in refs])
+                      for _, op, refs in steps]
+        self._dtypes = {}
+
+    def _collect(self, node, steps):
+        if is_elementwise(node):
+            op, operands = node.ref, node.args
+        elif isinstance(node, AST.UnaryExpr) and node.op == '-':
+            op, operands = 'neg', [node.expr]
+        else:
+            self.leaves.append(node)
+            return ('leaf', len(self.leaves) - 1)
+        refs = [self._collect(operand, steps) for operand in operands]
+        steps.append((node, op, refs))
+        return ('step', id(node))
+
+    def dtypes(self, values):
+        """Element types of every step, found by running the steps on empty arrays."""
+        key = tuple(v.dtype for v in values)
+        dtypes = self._dtypes.get(key)
+        if dtypes is None:
+            slots = [np.empty(0, dtype) for dtype in key]
+            for op, inputs in self.steps:
+                slots.append(UFUNCS[op](*[slots[i] for i in inputs]))
+            dtypes = self._dtypes[key] = [s.dtype for s in slots[len(values):]]
+        return dtypes
+
+    def evaluate(self, values, pool=None):
+        """The value of the tree in one pass over row chunks, reusing a
+        buffer per step, or None when the leaves are not matrices that
+        broadcast together or the result is too small to be worth it.
+        The result and step buffers come from pool if one is given."""
+        if not all(isinstance(v, np.ndarray) and v.ndim == 2 for v in values):
+            return None
+        try:
+            rows, cols = np.broadcast_shapes(*[v.shape for v in values])
+        except ValueError:
+            return None
+        if rows * cols < MIN_FUSED_ELEMENTS:
+            return None
+
+        dtypes = self.dtypes(values)
+        chunk = max(1, CHUNK_ELEMENTS // max(cols, 1))
+        empty = pool.acquire if pool is not None else np.empty
+        result = empty((rows, cols), dtypes[-1])
+        buffers = [empty((min(chunk, rows), cols), dtype) for dtype in dtypes[:-1]]
+        last = len(self.steps) - 1
+        for start in range(0, rows, chunk):
+            stop = min(start + chunk, rows)
+            slots = [v[start:stop] if v.shape[0] == rows else v for v in values]
+            for j, (op, inputs) in enumerate(self.steps):
+                out = result[start:stop] if j == last else buffers[j][:stop - start]
+                UFUNCS[op](*[slots[i] for i in inputs], out=out)
+                slots.append(out)
+        if pool is not None:
+            for buffer in buffers:
+                pool.release(buffer)
+        return result
@@ -0,0 +1,436 @@
+import sys
+import json
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from heapq import heappush, heappop
+
+import numpy as np
+
+import AST
+from scanner import Scanner
+from parser import Mparser
+from TypeChecker import TypeChecker
+from Diagnostics import Diagnostic
+
+OPENERS = {'(', '[', '{'}
+CLOSERS = {')', ']', '}'}
+TERMINATORS = {';', '}'}
+
+# How many following segments an unterminated edit region may swallow before
+# we give up and let the parser report the error locally. Without a bound an
+# unclosed '{' typed at the top of a file would re-parse everything below it.
+MAX_ABSORB = 2
+
+SEVERITY = {"error": 1, "warning": 2, "info": 3, "hint": 4}
+
+MISSING = object()
+
+
+class Segment(object):
+    """One or more top-level statements of a document spanning whole lines.
+
+    Line numbers of the parsed statements and of all diagnostics are relative
+    to the segment (the first line of the segment is line 1), so segments
+    following an edit can be reused without touching their ASTs.
+    """
+
+    def __init__(self, text, first_type, clean):
+        self.text = text
+        self.newlines = text.count("\n")
+        self.first_type = first_type
+        self.clean = clean
+        self.key = None
+        self.statements = []
+        self.names = set()
+        self.syntax = []
+        self.semantic = []
+        self.reads = {}
+        self.writes = {}
+        self.dirty = True
+
+
+def split_segments(text):
+    """Split source text into line-aligned top-level statements without parsing it.
+
+    A statement ends on a ';' or '}' outside any bracket, unless the next
+    token is 'else'. Statements sharing a line stay in one segment.
+    """
+    tokens = list(Scanner(quiet=True).tokenize(text))
+    cuts = [0]
+    firsts = [tokens[0].type if tokens else None]
+    depth = 0
+    for i, tok in enumerate(tokens):
+        if tok.type in OPENERS:
+            depth += 1
+        elif tok.type in CLOSERS:
+            depth = max(depth - 1, 0)
+        if depth == 0 and tok.type in TERMINATORS and i + 1 < len(tokens):
+            following = tokens[i + 1]
+            if following.type != 'ELSE' and following.lineno > tok.lineno:
+                cuts.append(text.rfind("\n", 0, following.index) + 1)
+                firsts.append(following.type)
+
+    clean = not tokens or (depth == 0 and tokens[-1].type in TERMINATORS)
+    bounds = cuts + [len(text)]
+    return [Segment(text[bounds[k]:bounds[k + 1]], firsts[k], clean or k + 1 < len(cuts))
+            for k in range(len(cuts))]
+
+
+def referenced_names(node, names):
+    if isinstance(node, list):
+        for item in node:
+            referenced_names(item, names)
+    elif isinstance(node, AST.Node):
+        if isinstance(node, AST.Variable):
+            names.add(node.name)
+        for value in vars(node).values():
+            referenced_names(value, names)
+    return names
+
+
+class Document(object):
+    """Incrementally analysed source file.
+
+    Segments are kept in document order together with two parallel arrays:
+    the first line of every segment and an order key used to address it from
+    the per-variable indexes. A segment is type checked against only the
+    variables it references, each looked up as the type left by the closest
+    preceding segment that changed it, so an edit re-checks just the edited
+    segments and the later segments that read a variable whose type changed.
+    """
+
+    def __init__(self, uri, text, version=0):
+        self.uri = uri
+        self.version = version
+        self.segments = []
+        self.lines = np.zeros(0, dtype=np.int64)
+        self.keys = np.zeros(0)
+        self.by_key = {}
+        self.readers = defaultdict(list)
+        self.writers = defaultdict(list)
+        self.pending = []
+        self.flagged = set()
+        self._splice(0, 0, split_segments(text))
+
+    @property
+    def text(self):
+        return "".join(seg.text for seg in self.segments)
+
+    def locate(self, position):
+        """Map an LSP position to (segment index, offset into that segment)."""
+        line = position["line"]
+        i = max(int(np.searchsorted(self.lines, line, side='right')) - 1, 0)
+        text = self.segments[i].text
+        offset = -1
+        for _ in range(line - int(self.lines[i])):
+            offset = text.find("\n", offset + 1)
+            if offset < 0:
+                return i, len(text)
+        end = text.find("\n", offset + 1)
+        end = len(text) if end < 0 else end
+        return i, min(offset + 1 + position["character"], end)
+
+    def apply_change(self, change):
+        if "range" not in change:
+            self._splice(0, len(self.segments), split_segments(change["text"]))
+            return
+
+        i, a = self.locate(change["range"]["start"])
+        j, b = self.locate(change["range"]["end"])
+        lo = max(i - 1, 0)
+        hi = j + 1
+        region = ("".join(seg.text for seg in self.segments[lo:i])
+                  + self.segments[i].text[:a] + change["text"] + self.segments[j].text[b:])
+
+        absorbed = 0
+        while True:
+            fresh = split_segments(region)
+            more = hi < len(self.segments)
+            if more and self.segments[hi].first_type == 'ELSE':
+                pass
+            elif more and not fresh[-1].clean and absorbed < MAX_ABSORB:
+                absorbed += 1
+            else:
+                break
+            region += self.segments[hi].text
+            hi += 1
+        self._splice(lo, hi, fresh)
+
+    def _splice(self, lo, hi, fresh):
+        """Replace segments[lo:hi] by fresh ones and schedule what they affect."""
+        fresh = [seg for seg in fresh if seg.text] or ([] if self.segments[:lo] + self.segments[hi:] else fresh)
+        removed = self.segments[lo:hi]
+        for seg in removed:
+            self._unregister(seg)
+
+        first = int(self.lines[lo]) if lo < len(self.lines) else (
+            int(self.lines[-1]) + self.segments[-1].newlines if self.segments else 0)
+        counts = np.array([seg.newlines for seg in fresh], dtype=np.int64)
+        starts = first + np.concatenate(([0], np.cumsum(counts)[:-1])) if len(fresh) else counts
+        delta = int(counts.sum()) - sum(seg.newlines for seg in removed)
+        self.lines = np.concatenate((self.lines[:lo], starts, self.lines[hi:] + delta))
+
+        left = self.keys[lo - 1] if lo > 0 else 0.0
+        right = self.keys[hi] if hi < len(self.keys) else left + len(fresh) + 1.0
+        step = (right - left) / (len(fresh) + 1)
+        self.keys = np.concatenate((self.keys[:lo], left + step * np.arange(1, len(fresh) + 1), self.keys[hi:]))
+        self.segments[lo:hi] = fresh
+        for seg in fresh:
+            self._parse(seg)
+        if fresh and step < 1e-9:
+            self._renumber()
+            return
+
+        for seg, key in zip(fresh, self.keys[lo:lo + len(fresh)]):
+            seg.key = float(key)
+            self._register(seg)
+
+    def _renumber(self):
+        self.keys = np.arange(1.0, len(self.segments) + 1)
+        self.by_key = {}
+        self.readers.clear()
+        self.writers.clear()
+        self.flagged = set()
+        self.pending = []
+        for seg, key in zip(self.segments, self.keys):
+            seg.key = float(key)
+            seg.writes = {}
+            seg.dirty = True
+            self._register(seg)
+
+    def _register(self, seg):
+        self.by_key[seg.key] = seg
+        for name in seg.names:
+            insort(self.readers[name], seg.key)
+        heappush(self.pending, seg.key)
+
+    def _unregister(self, seg):
+        del self.by_key[seg.key]
+        self.flagged.discard(seg.key)
+        for name in seg.names:
+            self.readers[name].remove(seg.key)
+        for name in seg.writes:
+            self.writers[name].remove(seg.key)
+            self._schedule(name, seg.key)
+
+    def _schedule(self, name, key):
+        """Queue readers of name after key, up to the next segment redefining it."""
+        writers = self.writers[name]
+        j = bisect_right(writers, key)
+        stop = writers[j] if j < len(writers) else float("inf")
+        readers = self.readers[name]
+        for i in range(bisect_right(readers, key), len(readers)):
+            if readers[i] > stop:
+                break
+            heappush(self.pending, readers[i])
+
+    def _type_before(self, name, key):
+        writers = self.writers[name]
+        j = bisect_left(writers, key) - 1
+        if j < 0:
+            return MISSING
+        return self.by_key[writers[j]].writes[name]
+
+    def _parse(self, seg):
+        seg.statements = []
+        seg.syntax = []
+        seg.names = set()
+        if seg.first_type is None:
+            return
+        scanner = Scanner(quiet=True)
+        parser = Mparser(quiet=True)
+        try:
+            result = parser.parse(scanner.tokenize(seg.text))
+        except Exception as e:
+            result = None
+            parser.diagnostics.append(Diagnostic(None, f"Syntax error: {e}", source="parser"))
+        if isinstance(result, AST.Statements):
+            seg.statements = [s for s in result.statements if isinstance(s, AST.Node)]
+        seg.syntax = scanner.diagnostics + parser.diagnostics
+        seg.names = referenced_names(seg.statements, set())
+
+    def _check(self, seg, entry):
+        checker = TypeChecker(quiet=True)
+        checker.st.symbol_table = dict(entry)
+        for statement in seg.statements:
+            try:
+                checker.visit(statement)
+            except Exception as e:
+                checker.diagnostics.append(Diagnostic(statement.lineno, f"Internal type checker error: {e}"))
+
+        writes = {name: t for name, t in checker.st.symbol_table.items()
+                  if name not in entry or entry[name] != t}
+        for name in set(seg.writes) | set(writes):
+            if name not in writes:
+                self.writers[name].remove(seg.key)
+            elif name not in seg.writes:
+                insort(self.writers[name], seg.key)
+            elif writes[name] == seg.writes[name]:
+                continue
+            self._schedule(name, seg.key)
+
+        seg.reads = entry
+        seg.writes = writes
+        seg.semantic = checker.diagnostics
+        seg.dirty = False
+        if seg.syntax or seg.semantic:
+            self.flagged.add(seg.key)
+        else:
+            self.flagged.discard(seg.key)
+
+    def analyze(self):
+        seen = set()
+        while self.pending:
+            key = heappop(self.pending)
+            seg = self.by_key.get(key)
+            if seg is None or key in seen:
+                continue
+            seen.add(key)
+            entry = {}
+            for name in seg.names:
+                t = self._type_before(name, key)
+                if t is not MISSING:
+                    entry[name] = t
+            if seg.dirty or entry != seg.reads:
+                self._check(seg, entry)
+
+    def diagnostics(self):
+        self.analyze()
+        result = []
+        keys = sorted(self.flagged)
+        for i in np.searchsorted(self.keys, keys).tolist():
+            seg, line = self.segments[i], int(self.lines[i])
+            for diagnostic in seg.syntax + seg.semantic:
+                rel = diagnostic.line if isinstance(diagnostic.line, int) else 1
+                at = line + min(max(rel - 1, 0), seg.newlines)
+                result.append({
+                    "range": {
+                        "start": {"line": at, "character": 0},
+                        "end": {"line": at, "character": 2 ** 31 - 1},
+                    },
+                    "severity": SEVERITY.get(diagnostic.severity, 1),
+                    "source": diagnostic.source,
+                    "message": diagnostic.message,
+                })
+        return result
+
+
+class LanguageServer(object):
+    """Minimal LSP server over stdio, see the Language Server Protocol spec."""
+
+    def __init__(self, reader=None, writer=None):
+        self.reader = reader or sys.stdin.buffer
+        self.writer = writer or sys.stdout.buffer
+        self.documents = {}
+        self.running = True
+        self.handlers = {
+            'initialize': self.initialize,
+            'initialized': lambda params: None,
+            'shutdown': lambda params: None,
+            'exit': self.exit,
+            'textDocument/didOpen': self.did_open,
+            'textDocument/didChange': self.did_change,
+            'textDocument/didClose': self.did_close,
+            'textDocument/diagnostic': self.pull_diagnostics,
+        }
+
+    def read_message(self):
+        length = None
+        while True:
+            line = self.reader.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if not line:
+                break
+            name, _, value = line.decode("ascii").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        if length is None:
+            return None
+        return json.loads(self.reader.read(length).decode("utf-8"))
+
+    def send(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.writer.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+        self.writer.flush()
+
+    def notify(self, method, params):
+        self.send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def log(self, message, severity=1):
+        self.notify('window/logMessage', {"type": severity, "message": message})
+
+    def publish(self, document):
+        self.notify('textDocument/publishDiagnostics', {
+            "uri": document.uri,
+            "version": document.version,
+            "diagnostics": document.diagnostics(),
+        })
+
+    def initialize(self, params):
+        return {
+            "capabilities": {
+                "textDocumentSync": {"openClose": True, "change": 2},
+                "diagnosticProvider": {"interFileDependencies": False, "workspaceDiagnostics": False},
+            },
+            "serverInfo": {"name": "m-language-server"},
+        }
+
+    def exit(self, params):
+        self.running = False
+
+    def did_open(self, params):
+        item = params["textDocument"]
+        document = Document(item["uri"], item["text"], item.get("version", 0))
+        self.documents[document.uri] = document
+        self.publish(document)
+
+    def did_change(self, params):
+        document = self.documents[params["textDocument"]["uri"]]
+        document.version = params["textDocument"].get("version", document.version)
+        for change in params["contentChanges"]:
+            document.apply_change(change)
+        self.publish(document)
+
+    def did_close(self, params):
+        self.documents.pop(params["textDocument"]["uri"], None)
+
+    def pull_diagnostics(self, params):
+        document = self.documents[params["textDocument"]["uri"]]
+        return {"kind": "full", "items": document.diagnostics()}
+
+    def handle(self, message):
+        method = message.get("method")
+        handler = self.handlers.get(method)
+        if "id" not in message:
+            # A notification has no response to carry an error, and one bad
+            # edit must not stop the server: log it to the client instead.
+            if handler is not None:
+                try:
+                    handler(message.get("params"))
+                except Exception as e:
+                    self.log(f"{method} failed: {type(e).__name__}: {e}")
+            return
+        if handler is None:
+            self.send({"jsonrpc": "2.0", "id": message["id"],
+                       "error": {"code": -32601, "message": f"Method not found: {method}"}})
+            return
+        try:
+            result = handler(message.get("params"))
+        except Exception as e:
+            self.send({"jsonrpc": "2.0", "id": message["id"],
+                       "error": {"code": -32603, "message": str(e)}})
+            return
+        self.send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+    def serve(self):
+        while self.running:
+            message = self.read_message()
+            if message is None:
+                break
+            self.handle(message)
+
+
+if __name__ == '__main__':
+    LanguageServer().serve()
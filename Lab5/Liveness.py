@@ -0,0 +1,140 @@
+import AST
+from Analysis import assigned_names, static_types, used_names
+from PassManager import Pass, walk
+from TypeChecker import is_scalar
+
+
+def killed(node):
+    """Name an assignment rebinds without reading its old value, if any."""
+    if isinstance(node, AST.Assign) and isinstance(node.lvalue, AST.Variable) and node.operator == '=':
+        return node.lvalue.name
+    return None
+
+
+class Loop(object):
+    """Variables live where a break or continue inside a loop jumps to."""
+
+    def __init__(self, exit, head):
+        self.exit = exit
+        self.head = head
+
+
+def statements_of(node):
+    if isinstance(node, (AST.Block, AST.Statements)) and isinstance(node.statements, list):
+        return node.statements
+    return None
+
+
+def live_in(node, out, loop):
+    """Variables whose value may be read after control reaches node, given
+    the variables live after it falls through."""
+    statements = statements_of(node)
+    if statements is not None:
+        for statement in reversed(statements):
+            out = live_in(statement, out, loop)
+        return out
+    if isinstance(node, AST.Assign):
+        return (out - {killed(node)}) | used_names(node)
+    if isinstance(node, AST.If):
+        taken = live_in(node.block, out, loop)
+        skipped = live_in(node._else, out, loop) if node._else is not None else out
+        return used_names(node.condition) | taken | skipped
+    if isinstance(node, AST.While):
+        return while_head(node, out)
+    if isinstance(node, AST.For):
+        return used_names(node._range) | for_head(node, out) | out
+    if isinstance(node, AST.Break):
+        return loop.exit if loop is not None else set()
+    if isinstance(node, AST.Continue):
+        return loop.head if loop is not None else set()
+    if isinstance(node, AST.Return):
+        return used_names(node.value) if node.value is not None else set()
+    return out | used_names(node)
+
+
+def while_head(node, out):
+    """Variables live each time the condition of a while loop is evaluated."""
+    head = used_names(node.condition) | out
+    while True:
+        new = head | live_in(node.block, head, Loop(out, head))
+        if new == head:
+            return head
+        head = new
+
+
+def for_head(node, out):
+    """Variables live at the start of an iteration of a for loop, before
+    its variable is bound."""
+    head = set()
+    while True:
+        after = head | out
+        new = live_in(node.statement, after, Loop(out, after)) - {node.var.name}
+        if new == head:
+            return head
+        head = new
+
+
+class Liveness(Pass):
+    """Releases each matrix variable right after the statement that last
+    uses it, so the Interpreter can free its buffer early.
+
+    A backward dataflow analysis over the statement lists finds the
+    variables live after every statement; a Release of the variables that
+    were live or assigned in a statement but are dead after it is inserted
+    behind it. Variables the TypeChecker proved are always scalars and
+    loop variables are left alone.
+    """
+    name = "liveness"
+
+    def __init__(self):
+        super().__init__()
+        self.scalars = set()
+
+    def run(self, ast):
+        self.scalars = self.scalar_names(ast, static_types(ast))
+        self.annotate(ast, set(), None, top=True)
+        return ast
+
+    @staticmethod
+    def scalar_names(ast, types):
+        names, matrices, loop_vars = set(), set(), set()
+        for node in walk(ast):
+            if isinstance(node, AST.For):
+                loop_vars.add(node.var.name)
+            elif isinstance(node, AST.Assign):
+                target = node.lvalue.matrix if isinstance(node.lvalue, AST.MatrixIndex) else node.lvalue
+                names.add(target.name)
+                if target is not node.lvalue or not is_scalar(types.type_of(node)):
+                    matrices.add(target.name)
+        return (names - matrices) | loop_vars
+
+    def annotate(self, node, out, loop, top=False):
+        """Insert Releases into the statement lists under node, which falls
+        through with the variables in out live."""
+        statements = statements_of(node)
+        if statements is not None:
+            annotated = []
+            for i in range(len(statements) - 1, -1, -1):
+                statement = statements[i]
+                after = out
+                self.annotate(statement, after, loop)
+                out = live_in(statement, after, loop)
+                if top and i == len(statements) - 1:
+                    annotated.append(statement)
+                    continue
+                dead = (out | assigned_names(statement)) - after - self.scalars
+                if dead and not isinstance(statement, (AST.Break, AST.Continue, AST.Return)):
+                    self.stats["released"] += len(dead)
+                    annotated.append(AST.Release(sorted(dead), statement.lineno))
+                annotated.append(statement)
+            node.statements = annotated[::-1]
+        elif isinstance(node, AST.If):
+            self.annotate(node.block, out, loop)
+            if node._else is not None:
+                self.annotate(node._else, out, loop)
+        elif isinstance(node, AST.While):
+            head = while_head(node, out)
+            self.annotate(node.block, head, Loop(out, head))
+        elif isinstance(node, AST.For):
+            after = for_head(node, out) | out
+            self.annotate(node.statement, after, Loop(out, after))
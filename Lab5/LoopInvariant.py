@@ -0,0 +1,148 @@
+import copy
+
+import AST
+from Analysis import assigned_names, used_names
+from PassManager import Pass, walk
+from Ranges import LazyRange
+
+HOISTABLE = (AST.Apply, AST.OpExpr, AST.UnaryExpr, AST.Transpose, AST.Matrix, AST.MatrixIndex)
+
+
+def returns(node):
+    return any(isinstance(n, AST.Return) for n in walk(node))
+
+
+def prints(node):
+    return any(isinstance(n, AST.Print) for n in walk(node))
+
+
+def trip_count(rng):
+    """Number of iterations of a range with literal bounds, else None."""
+    parts = [rng.start, rng.end] + ([rng.step] if rng.step is not None else [])
+    if not all(isinstance(p, AST.Literal) and type(p.value) is int for p in parts):
+        return None
+    step = rng.step.value if rng.step is not None else 1
+    if step == 0:
+        return None
+    return len(LazyRange(rng.start.value, rng.end.value, step))
+
+
+class LoopInvariantCodeMotion(Pass):
+    """Moves expressions that do not depend on anything a loop assigns into
+    temporaries computed once before the loop.
+
+    Only expressions evaluated on every iteration before the first
+    statement that may leave it or print are moved, so a hoisted expression
+    that fails does so before the same output as in the loop; unless the
+    loop provably
+    runs at least once the hoisted code is guarded by its entry condition,
+    so no expression is evaluated that the original program would skip.
+    """
+    name = "loop-invariant-code-motion"
+
+    def __init__(self):
+        super().__init__()
+        self.temporaries = 0
+
+    def temporary(self, expr, out):
+        name = f"__licm{self.temporaries}"
+        self.temporaries += 1
+        out.append(AST.Assign(AST.Variable(name, expr.lineno), '=', expr, expr.lineno))
+        self.stats["hoisted"] += 1
+        return AST.Variable(name, expr.lineno)
+
+    def hoist(self, expr, variant, out):
+        if not isinstance(expr, HOISTABLE):
+            return expr
+        if not (used_names(expr) & variant):
+            return self.temporary(expr, out)
+        if isinstance(expr, AST.Apply):
+            expr.args = [self.hoist(a, variant, out) for a in expr.args]
+        elif isinstance(expr, AST.OpExpr):
+            expr.left = self.hoist(expr.left, variant, out)
+            expr.right = self.hoist(expr.right, variant, out)
+        elif isinstance(expr, AST.UnaryExpr):
+            expr.expr = self.hoist(expr.expr, variant, out)
+        elif isinstance(expr, AST.Transpose):
+            expr.matrix = self.hoist(expr.matrix, variant, out)
+        elif isinstance(expr, AST.Matrix):
+            expr.rows = [[self.hoist(e, variant, out) for e in row] for row in expr.rows]
+        return expr
+
+    def hoist_statements(self, node, variant, out):
+        """Hoist from statements run on every iteration; False once one may
+        leave it or print, after which nothing more may move."""
+        if isinstance(node, AST.Block):
+            for statement in node.statements:
+                if not self.hoist_statements(statement, variant, out):
+                    return False
+            return True
+        if isinstance(node, AST.Assign):
+            node.expr = self.hoist(node.expr, variant, out)
+            return True
+        if isinstance(node, AST.Print):
+            node.printlist = [self.hoist(e, variant, out) for e in node.printlist]
+            return False
+        if isinstance(node, AST.If):
+            node.condition = self.hoist(node.condition, variant, out)
+            return not (prints(node) or any(isinstance(n, (AST.Break, AST.Continue, AST.Return))
+                                            for n in walk(node)))
+        if isinstance(node, AST.For) and not isinstance(node._range, AST.Range):
+            node._range = self.hoist(node._range, variant, out)
+            return not (returns(node) or prints(node))
+        if isinstance(node, AST.For):
+            node._range.start = self.hoist(node._range.start, variant, out)
+            node._range.end = self.hoist(node._range.end, variant, out)
+            if node._range.step is not None:
+                node._range.step = self.hoist(node._range.step, variant, out)
+            return not (returns(node) or prints(node))
+        if isinstance(node, AST.While):
+            node.condition = self.hoist(node.condition, variant, out)
+            return not (returns(node) or prints(node))
+        return isinstance(node, AST.Empty)
+
+    def guarded(self, guard, hoisted, loop):
+        if not hoisted:
+            return loop
+        if guard is None:
+            return hoisted + [loop]
+        self.stats["guarded"] += 1
+        return AST.If(guard, AST.Block(hoisted + [loop], loop.lineno), None, loop.lineno)
+
+    def visit_While(self, node):
+        node = self.generic_visit(node)
+        variant = assigned_names(node)
+
+        # The condition runs at least once, so its invariant parts need no guard.
+        before = []
+        node.condition = self.hoist(node.condition, variant, before)
+        hoisted = []
+        self.hoist_statements(node.block, variant, hoisted)
+        result = self.guarded(copy.deepcopy(node.condition), hoisted, node)
+        if not before:
+            return result
+        return before + (result if isinstance(result, list) else [result])
+
+    def visit_For(self, node):
+        node = self.generic_visit(node)
+        rng = node._range
+        # A loop over the rows of a matrix may run no times, which no
+        # guard here can test.
+        if not isinstance(rng, AST.Range):
+            return node
+        trips = trip_count(rng)
+        if trips == 0:
+            return node
+
+        guard = None
+        if trips is None:
+            if rng.step is None or (isinstance(rng.step, AST.Literal) and rng.step.value > 0):
+                guard = AST.OpExpr('<=', copy.deepcopy(rng.start), copy.deepcopy(rng.end), node.lineno)
+            elif isinstance(rng.step, AST.Literal) and rng.step.value < 0:
+                guard = AST.OpExpr('>=', copy.deepcopy(rng.start), copy.deepcopy(rng.end), node.lineno)
+            else:
+                return node
+
+        hoisted = []
+        self.hoist_statements(node.statement, assigned_names(node), hoisted)
+        return self.guarded(guard, hoisted, node)
@@ -0,0 +1,147 @@
+import AST
+from Analysis import static_types
+from PassManager import Pass
+from TypeChecker import is_matrix, is_scalar, total_shape
+
+
+def chain_order(dims):
+    """Cheapest parenthesization of a product whose i-th factor is
+    dims[i] x dims[i + 1], as a tree of factor indices and (left, right)
+    pairs, together with its cost in scalar multiplications."""
+    n = len(dims) - 1
+    cost = [[0] * n for _ in range(n)]
+    split = [[0] * n for _ in range(n)]
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            cost[i][j] = None
+            for k in range(i, j):
+                c = cost[i][k] + cost[k + 1][j] + dims[i] * dims[k + 1] * dims[j + 1]
+                if cost[i][j] is None or c < cost[i][j]:
+                    cost[i][j], split[i][j] = c, k
+
+    def tree(i, j):
+        if i == j:
+            return i
+        return (tree(i, split[i][j]), tree(split[i][j] + 1, j))
+    return tree(0, n - 1), cost[0][n - 1]
+
+
+def left_to_right(n):
+    tree = 0
+    for i in range(1, n):
+        tree = (tree, i)
+    return tree
+
+
+def chain_cost(tree, dims):
+    """Rows, columns and multiplication count of evaluating tree."""
+    if isinstance(tree, int):
+        return dims[tree], dims[tree + 1], 0
+    lr, lc, left = chain_cost(tree[0], dims)
+    _, rc, right = chain_cost(tree[1], dims)
+    return lr, rc, left + right + lr * lc * rc
+
+
+class ChainPlans(object):
+    """Multiplication orders of chains whose shapes are only known at run
+    time, cached by the dimensions of their factors."""
+
+    def __init__(self):
+        self.plans = {}
+        self.hits = 0
+        self.misses = 0
+
+    def plan(self, dims):
+        tree = self.plans.get(dims)
+        if tree is None:
+            self.misses += 1
+            tree, _ = chain_order(dims)
+            self.plans[dims] = tree
+        else:
+            self.hits += 1
+        return tree
+
+
+def multiply(tree, factors, matmul):
+    if isinstance(tree, int):
+        return factors[tree]
+    return matmul(multiply(tree[0], factors, matmul), multiply(tree[1], factors, matmul))
+
+
+def is_product(node):
+    return isinstance(node, AST.Apply) and node.ref == '*' and len(node.args) == 2
+
+
+def chain_factors(node):
+    """Factors of a left-nested product A * B * C ..., as the parser builds it."""
+    factors = []
+    while is_product(node):
+        factors.append(node.args[1])
+        node = node.args[0]
+    factors.append(node)
+    return factors[::-1]
+
+
+def build(tree, factors, lineno):
+    if isinstance(tree, int):
+        return factors[tree]
+    return AST.Apply('*', [build(tree[0], factors, lineno), build(tree[1], factors, lineno)], lineno)
+
+
+class MatrixChainReordering(Pass):
+    """Reassociates products of three or more matrices into the order that
+    needs the fewest scalar multiplications.
+
+    When the TypeChecker knows the shape of every factor the product is
+    rebuilt in the optimal order at compile time. Otherwise it becomes a
+    MatMulChain that the Interpreter plans once per distinct combination of
+    factor shapes; chains whose factors turn out not to be matrices are
+    evaluated left to right as written.
+    """
+    name = "matrix-chain"
+
+    def __init__(self):
+        super().__init__()
+        self.types = None
+
+    def run(self, ast):
+        self.types = static_types(ast)
+        return self.visit(ast)
+
+    def static_dims(self, factors):
+        dims = []
+        for factor in factors:
+            ty = self.types.type_of(factor)
+            if not is_matrix(ty):
+                return None
+            rows, cols = total_shape(ty)
+            if rows is None or cols is None or (dims and dims[-1] != rows):
+                return None
+            dims[-1:] = [rows, cols]
+        return dims
+
+    def visit_Apply(self, node):
+        if not is_product(node):
+            return self.generic_visit(node)
+        written = chain_factors(node)
+        dims = self.static_dims(written)
+        scalar = any(is_scalar(self.types.type_of(f)) for f in written)
+        factors = [self.visit(f) for f in written]
+        if len(factors) < 3:
+            node.args = factors
+            return node
+
+        if dims is None:
+            if scalar:
+                return build(left_to_right(len(factors)), factors, node.lineno)
+            self.stats["runtime-planned"] += 1
+            return AST.MatMulChain(factors, node.lineno)
+
+        tree, cost = chain_order(dims)
+        *_, as_written = chain_cost(left_to_right(len(factors)), dims)
+        if cost == as_written:
+            return build(left_to_right(len(factors)), factors, node.lineno)
+        self.stats["reordered"] += 1
+        self.stats["multiplications-saved"] += as_written - cost
+        return build(tree, factors, node.lineno)
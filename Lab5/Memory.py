@@ -1,3 +1,26 @@
+import numpy as np
+
+
+def root(matrix):
+    """The array that owns the buffer a matrix value (possibly a view) uses."""
+    while isinstance(matrix.base, np.ndarray):
+        matrix = matrix.base
+    return matrix
+
+
+def owner(value):
+    """What variables sharing value share: the root array of an ndarray,
+    or what a value that can be stored into in place names as its owner;
+    None for values no store changes."""
+    if getattr(value, "mutable", False):
+        value = value.owner()
+        if not isinstance(value, np.ndarray):
+            return value
+    if isinstance(value, np.ndarray):
+        return root(value)
+    return None
+
+
 class Memory:
     def __init__(self, name):
         self.name = name
@@ -15,8 +38,49 @@ class Memory:
         self.values[name] = value
 
 class MemoryStack:
-    def __init__(self, memory=None):
+    """Variable scopes with copy-on-write matrices.
+
+    Assigning a matrix shares its buffer (for a SparseMatrix, the object
+    itself); the stack counts how many variables use each buffer, and
+    writable() copies a matrix before a store if any other variable (or a
+    pinned literal) still uses it.
+    """
+
+    def __init__(self, memory=None, pool=None):
         self.stack = [memory] if memory is not None else []
+        # Number of variables using each buffer, keyed by id of its owner().
+        self.owners = {}
+        self.buffers = {}
+        self.pinned = set()
+        # Receives buffers no variable uses any more.
+        self.pool = pool
+
+    def _bind(self, value):
+        buffer = owner(value)
+        if buffer is not None:
+            key = id(buffer)
+            self.owners[key] = self.owners.get(key, 0) + 1
+            self.buffers[key] = buffer
+
+    def _unbind(self, value):
+        buffer = owner(value)
+        if buffer is not None:
+            key = id(buffer)
+            count = self.owners[key] - 1
+            if count:
+                self.owners[key] = count
+            else:
+                del self.owners[key]
+                buffer = self.buffers.pop(key)
+                if self.pool is not None and isinstance(buffer, np.ndarray):
+                    self.pool.release(buffer)
+
+    def _put(self, memory, name, value):
+        # Bind first, so a new view of the old value's buffer keeps it owned.
+        self._bind(value)
+        if memory.has_key(name):
+            self._unbind(memory.values[name])
+        memory.put(name, value)
 
     def get(self, name):
         for memory in self.stack:
@@ -27,15 +91,49 @@ class MemoryStack:
     def insert(self, name, value):
         if not self.stack:
             raise Exception("No memory scope available")
-        self.stack[-1].put(name, value)
+        self._put(self.stack[-1], name, value)
 
     def set(self, name, value):
         for i, memory in enumerate(self.stack):
             if memory.has_key(name):
-                self.stack[i].put(name, value)
+                self._put(memory, name, value)
                 return
         raise Exception(f"Variable '{name}' not defined")
 
+    def delete(self, name):
+        for memory in self.stack:
+            if memory.has_key(name):
+                self._unbind(memory.values.pop(name))
+                return
+
+    def release(self, name):
+        """Drop the value of name but keep the name in the scope defining
+        it, so that assigning it again inside a nested scope (a loop body)
+        still rebinds it there instead of in the nested scope."""
+        for memory in self.stack:
+            if memory.has_key(name):
+                self._put(memory, name, None)
+                return
+
+    def pin(self, matrix):
+        """Count matrix as permanently shared, e.g. the value of a literal."""
+        if id(matrix) not in self.pinned:
+            self.pinned.add(id(matrix))
+            self._bind(matrix)
+
+    def exclusive(self, matrix):
+        """Whether no variable but the one holding matrix uses its buffer."""
+        return self.owners.get(id(owner(matrix)), 0) <= 1
+
+    def writable(self, name):
+        """The value of name, copied first if its buffer is shared, so that
+        storing into it changes no other variable."""
+        value = self.get(name)
+        if owner(value) is not None and not self.exclusive(value):
+            value = value.copy()
+            self.set(name, value)
+        return value
+
     def push(self, memory):
         self.stack.append(memory)
 
@@ -43,4 +141,7 @@ class MemoryStack:
     def pop(self):
         if not self.stack:
             raise Exception("Cannot pop from empty memory stack")
-        return self.stack.pop()
\ No newline at end of file
+        memory = self.stack.pop()
+        for value in memory.values.values():
+            self._unbind(value)
+        return memory
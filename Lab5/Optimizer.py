@@ -0,0 +1,36 @@
+import AST
+from PassManager import Pass, PassManager
+from ConstantFolding import ConstantFolding, DeadCodeElimination
+from CommonSubexpression import CommonSubexpressionElimination
+from InPlace import InPlaceUpdate
+from Liveness import Liveness
+from LoopInvariant import LoopInvariantCodeMotion
+from MatrixChain import MatrixChainReordering
+from Simplification import AlgebraicSimplification
+from Storage import SparseStorage
+
+
+class RemoveEmpty(Pass):
+    """Drops empty statements (stray ';') from statement lists."""
+    name = "remove-empty"
+
+    def visit_list(self, items):
+        kept = [item for item in items if not isinstance(item, AST.Empty)]
+        self.stats["removed"] += len(items) - len(kept)
+        return super().visit_list(kept)
+
+
+# Passes run at each -O level, in order.
+PIPELINES = {
+    0: [],
+    1: [RemoveEmpty, ConstantFolding, DeadCodeElimination],
+    2: [RemoveEmpty, ConstantFolding, DeadCodeElimination, CommonSubexpressionElimination,
+        LoopInvariantCodeMotion, SparseStorage, InPlaceUpdate, Liveness],
+    3: [RemoveEmpty, ConstantFolding, DeadCodeElimination, AlgebraicSimplification,
+        CommonSubexpressionElimination, LoopInvariantCodeMotion, MatrixChainReordering, SparseStorage,
+        InPlaceUpdate, Liveness],
+}
+
+
+def optimizer(level, verify=True):
+    return PassManager([p() for p in PIPELINES[level]], verify)
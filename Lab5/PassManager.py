@@ -0,0 +1,153 @@
+import copy
+import time
+from collections import Counter
+
+import AST
+from TypeChecker import TypeChecker
+
+
+def walk(node):
+    """Yield every AST node reachable from node, parents before children."""
+    if isinstance(node, list):
+        for item in node:
+            yield from walk(item)
+    elif isinstance(node, AST.Node):
+        yield node
+        for value in vars(node).values():
+            if isinstance(value, (AST.Node, list)):
+                yield from walk(value)
+
+
+def count_nodes(node):
+    return sum(1 for _ in walk(node))
+
+
+class NodeTransformer(object):
+    """Rebuilds the tree from what visit_<Class> methods return.
+
+    Returning None from a visit removes the node from the enclosing list (or
+    replaces it with Empty where a single node is required); returning a list
+    splices its items into the enclosing list.
+    """
+
+    def visit(self, node):
+        method = 'visit_' + node.__class__.__name__
+        visitor = getattr(self, method, self.generic_visit)
+        return visitor(node)
+
+    def generic_visit(self, node):
+        for name, value in vars(node).items():
+            if isinstance(value, AST.Node):
+                result = self.visit(value)
+                if isinstance(result, list):
+                    result = AST.Block(result, value.lineno)
+                setattr(node, name, result if result is not None else AST.Empty(value.lineno))
+            elif isinstance(value, list):
+                setattr(node, name, self.visit_list(value))
+        return node
+
+    def visit_list(self, items):
+        result = []
+        for item in items:
+            if isinstance(item, AST.Node):
+                item = self.visit(item)
+                if item is None:
+                    continue
+                if isinstance(item, list):
+                    result.extend(item)
+                    continue
+            elif isinstance(item, list):
+                item = self.visit_list(item)
+            result.append(item)
+        return result
+
+
+class Pass(NodeTransformer):
+    """An AST-to-AST transformation run by the PassManager.
+
+    Subclasses set name and bump self.stats counters to describe what they
+    changed; run() receives and returns the whole program.
+    """
+    name = "pass"
+
+    def __init__(self):
+        self.stats = Counter()
+
+    def run(self, ast):
+        return self.visit(ast)
+
+
+class PassStats(object):
+    def __init__(self, name, seconds, nodes_before, nodes_after, counters, verify_seconds=0.0, rejected=None):
+        self.name = name
+        self.seconds = seconds
+        self.nodes_before = nodes_before
+        self.nodes_after = nodes_after
+        self.counters = counters
+        self.verify_seconds = verify_seconds
+        self.rejected = rejected
+
+
+def check(ast):
+    """Run the TypeChecker quietly and return its diagnostics as a Counter of messages."""
+    checker = TypeChecker(quiet=True)
+    messages = Counter()
+    for statement in ast.statements:
+        try:
+            checker.visit(statement)
+        except Exception as e:
+            messages[f"internal error: {e}"] += 1
+    messages.update(d.message for d in checker.diagnostics if d.severity == "error")
+    return messages
+
+
+class PassManager(object):
+    """Runs a pipeline of passes over a program.
+
+    With verify enabled the TypeChecker is re-run after every pass; a pass
+    that introduces new type errors is rolled back and reported instead of
+    reaching the Interpreter.
+    """
+
+    def __init__(self, passes, verify=True):
+        self.passes = passes
+        self.verify = verify
+        self.stats = []
+
+    def run(self, ast):
+        self.stats = []
+        known = check(ast) if self.verify else None
+        for p in self.passes:
+            backup = copy.deepcopy(ast) if self.verify else None
+            before = count_nodes(ast)
+            start = time.perf_counter()
+            ast = p.run(ast)
+            elapsed = time.perf_counter() - start
+
+            verify_elapsed = 0.0
+            rejected = None
+            if self.verify:
+                start = time.perf_counter()
+                found = check(ast)
+                verify_elapsed = time.perf_counter() - start
+                introduced = found - known
+                if introduced:
+                    rejected = sorted(introduced)
+                    ast = backup
+                else:
+                    known = found
+
+            self.stats.append(PassStats(p.name, elapsed, before, count_nodes(ast), dict(p.stats),
+                                        verify_elapsed, rejected))
+        return ast
+
+    def report(self):
+        print(f"{'pass':<34}{'time [ms]':>10}{'verify [ms]':>13}{'nodes':>16}  details")
+        for s in self.stats:
+            nodes = f"{s.nodes_before}->{s.nodes_after} ({s.nodes_after - s.nodes_before:+d})"
+            details = ", ".join(f"{k}={v}" for k, v in sorted(s.counters.items()))
+            if s.rejected:
+                details = "REJECTED, introduced: " + "; ".join(s.rejected)
+            print(f"{s.name:<34}{s.seconds * 1000:>10.3f}{s.verify_seconds * 1000:>13.3f}{nodes:>16}  {details}")
+        total = sum(s.seconds for s in self.stats)
+        print(f"{'total':<34}{total * 1000:>10.3f}")
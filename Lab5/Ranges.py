@@ -0,0 +1,79 @@
+from fractions import Fraction
+from math import lcm
+
+import numpy as np
+
+from Values import EXACT, scalar
+
+
+def decimal(value):
+    """value as the fraction its shortest decimal representation reads,
+    which for a float literal is the number written in the script."""
+    return Fraction(repr(value)) if type(value) is float else Fraction(value)
+
+
+class LazyRange(object):
+    """start:end:step, kept as its first element, step and number of
+    elements, which it computes one at a time as a loop asks for them.
+
+    Integer ranges iterate a Python range, so `for i = 1:100000000` takes
+    constant memory. With a float among the bounds the count and the
+    elements are exact in decimal: 0:1:0.1 has eleven elements, the k-th
+    being the float nearest to k/10, as the literals read. Both are
+    worked out on integers over a common denominator, falling back to
+    start + k * step when those would not fit a float exactly.
+    """
+
+    __slots__ = ('start', 'step', 'count', 'is_float', 'numerator', 'increment', 'denominator')
+
+    def __init__(self, start, end, step=1):
+        if step == 0:
+            raise ValueError("range step must not be zero")
+        self.start = start
+        self.step = step
+        self.is_float = float in (type(start), type(step), type(end))
+        self.denominator = None
+        if not self.is_float:
+            self.count = max(0, (end - start) // step + 1)
+            return
+
+        a, b = decimal(start), decimal(step)
+        self.count = max(0, int((decimal(end) - a) // b) + 1)
+        d = lcm(a.denominator, b.denominator)
+        self.numerator, self.increment = int(a * d), int(b * d)
+        last = self.numerator + (self.count - 1) * self.increment
+        if d < EXACT and abs(self.numerator) < EXACT and abs(last) < EXACT:
+            self.denominator = d
+
+    @staticmethod
+    def from_bounds(start, end, step=1):
+        """The range start:end:step, or None if a bound is not a number."""
+        start, end, step = scalar(start), scalar(end), scalar(step)
+        if start is None or end is None or step is None:
+            return None
+        return LazyRange(start, end, step)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        if not self.is_float:
+            return iter(range(self.start, self.start + self.count * self.step, self.step))
+        if self.denominator is not None:
+            a, b, d = self.numerator, self.increment, self.denominator
+            return ((a + k * b) / d for k in range(self.count))
+        start, step = float(self.start), float(self.step)
+        return (start + k * step for k in range(self.count))
+
+    def to_ndarray(self):
+        """The elements as a 1 x count row vector."""
+        if not self.is_float:
+            array = np.arange(self.start, self.start + self.count * self.step, self.step, dtype=np.int64)
+        elif self.denominator is not None:
+            array = (self.numerator + np.arange(self.count, dtype=np.int64) * self.increment) / self.denominator
+        else:
+            array = float(self.start) + np.arange(self.count) * float(self.step)
+        return array.reshape(1, self.count)
+
+    def __repr__(self):
+        return f"LazyRange({self.start}, {self.step}, count={self.count})"
@@ -0,0 +1,102 @@
+# Shortest result of `+` on strings worth keeping as a Rope; shorter
+# strings are cheaper to copy.
+MIN_ROPE = 256
+
+
+class Rope(object):
+    """A string built by `s = s + t`, kept as the list of its pieces until
+    it is printed, compared or otherwise needs its characters.
+
+    Like a growth buffer, the list has room after the pieces a Rope uses:
+    appending to the Rope that uses the whole list appends to the list,
+    so a string built in a loop costs O(1) per step instead of a copy of
+    everything built so far. A Rope holding fewer pieces than its list, as
+    a variable left behind by another that kept appending, copies its own
+    pieces first. The characters are joined once and cached.
+    """
+
+    __slots__ = ('pieces', 'count', 'length', 'flat')
+
+    def __init__(self, pieces, count, length):
+        self.pieces = pieces
+        self.count = count
+        self.length = length
+        self.flat = None
+
+    def __str__(self):
+        if self.flat is None:
+            self.flat = "".join(self.pieces[:self.count])
+        return self.flat
+
+    def append(self, text):
+        text = str(text)
+        pieces = self.pieces
+        if len(pieces) != self.count:
+            pieces = pieces[:self.count]
+        pieces.append(text)
+        return Rope(pieces, self.count + 1, self.length + len(text))
+
+    def __len__(self):
+        return self.length
+
+    # Anything but string concatenation works on the characters, and
+    # fails exactly as it would on a str.
+    def __add__(self, other):
+        if isinstance(other, (str, Rope)):
+            return self.append(other)
+        return str(self) + other
+
+    def __radd__(self, other):
+        if isinstance(other, str):
+            return Rope([other] + self.pieces[:self.count], self.count + 1, len(other) + self.length)
+        return other + str(self)
+
+    def __mul__(self, other):
+        return str(self) * other
+
+    def __rmul__(self, other):
+        return other * str(self)
+
+    def __neg__(self):
+        return -str(self)
+
+    def __eq__(self, other):
+        return str(self) == flat(other)
+
+    def __ne__(self, other):
+        return str(self) != flat(other)
+
+    def __lt__(self, other):
+        return str(self) < flat(other)
+
+    def __le__(self, other):
+        return str(self) <= flat(other)
+
+    def __gt__(self, other):
+        return str(self) > flat(other)
+
+    def __ge__(self, other):
+        return str(self) >= flat(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __repr__(self):
+        return repr(str(self))
+
+
+def flat(value):
+    """value, as a str if it is a Rope."""
+    return str(value) if isinstance(value, Rope) else value
+
+
+def concat(a, b):
+    """a + b for two strings, as a Rope once the result is long enough."""
+    if isinstance(a, Rope):
+        return a.append(b)
+    if isinstance(b, Rope) or len(a) + len(b) >= MIN_ROPE:
+        return Rope([a], 1, len(a)) + b
+    return a + b
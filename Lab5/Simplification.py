@@ -0,0 +1,192 @@
+import numpy as np
+
+import AST
+from Analysis import static_types
+from PassManager import Pass
+from TypeChecker import base_elem, is_matrix, is_numeric, total_shape
+
+
+class Rule(object):
+    """An identity `pattern -> result` applied when guard(facts, bindings) holds.
+
+    Patterns are nested tuples: ("'", p) is a transpose, ("neg", p) a unary
+    minus, (op, p, q) a binary operator; a string binds any expression to
+    that name and an int matches that integer literal. The result uses the
+    same notation with the bound names.
+    """
+
+    def __init__(self, name, pattern, result, guard=None):
+        self.name = name
+        self.pattern = pattern
+        self.result = result
+        self.guard = guard
+
+    def match(self, pattern, node, bindings):
+        if isinstance(pattern, str):
+            bindings[pattern] = node
+            return True
+        if isinstance(pattern, int):
+            return isinstance(node, AST.Literal) and type(node.value) is int and node.value == pattern
+        tag, *parts = pattern
+        if tag == "'":
+            return isinstance(node, AST.Transpose) and self.match(parts[0], node.matrix, bindings)
+        if tag == "neg":
+            return isinstance(node, AST.UnaryExpr) and node.op == '-' and self.match(parts[0], node.expr, bindings)
+        return (isinstance(node, AST.Apply) and node.ref == tag and len(node.args) == len(parts)
+                and all(self.match(p, a, bindings) for p, a in zip(parts, node.args)))
+
+    def build(self, template, bindings, lineno):
+        if isinstance(template, str):
+            return bindings[template]
+        tag, *parts = template
+        args = [self.build(p, bindings, lineno) for p in parts]
+        if tag == "'":
+            return AST.Transpose(args[0], lineno)
+        if tag == "neg":
+            return AST.UnaryExpr('-', args[0], lineno)
+        return AST.Apply(tag, args, lineno)
+
+    def apply(self, node, facts):
+        bindings = {}
+        if not self.match(self.pattern, node, bindings):
+            return None
+        if self.guard is not None and not self.guard(facts, bindings):
+            return None
+        return self.build(self.result, bindings, node.lineno)
+
+
+def constant_shape(node, kind):
+    """Shape of node if it is an int zeros/ones/eye matrix (a call with
+    literal sizes or an already folded literal), else None."""
+    if isinstance(node, AST.Apply) and node.ref == kind and 1 <= len(node.args) <= 2:
+        if not all(isinstance(a, AST.Literal) and type(a.value) is int for a in node.args):
+            return None
+        rows = node.args[0].value
+        cols = node.args[-1].value
+        if kind == "eye" and rows != cols:
+            return None
+        return rows, cols
+    if isinstance(node, AST.Literal) and isinstance(node.value, np.ndarray):
+        value = node.value
+        if value.ndim != 2 or value.dtype.kind != 'i':
+            return None
+        if kind == "zeros":
+            expected = np.zeros_like(value)
+        elif kind == "ones":
+            expected = np.ones_like(value)
+        elif value.shape[0] == value.shape[1]:
+            expected = np.eye(value.shape[0], dtype=value.dtype)
+        else:
+            return None
+        return value.shape if np.array_equal(value, expected) else None
+    return None
+
+
+class Facts(object):
+    """What the TypeChecker inferred about the expressions of a program."""
+
+    def __init__(self, types):
+        self.types = types
+
+    def type_of(self, node):
+        return self.types.type_of(node)
+
+    def shape(self, node):
+        ty = self.type_of(node)
+        if not is_matrix(ty):
+            return None
+        shape = total_shape(ty)
+        return shape if None not in shape else None
+
+    def matrix(self, node):
+        return is_matrix(self.type_of(node))
+
+    def numeric(self, node):
+        """Whether node is a number or a matrix of numbers; a bool mask
+        is not, as arithmetic turns it into numbers."""
+        return is_numeric(base_elem(self.type_of(node)))
+
+    def integral(self, node):
+        """Whether node is an int or a matrix of ints, which have no
+        inf, nan or -0.0 for an identity to treat differently."""
+        return base_elem(self.type_of(node)) == "int"
+
+
+def identity_matmul(matrix, identity, side):
+    # The product adds 0 * x for every x beside the diagonal, which is nan
+    # for an infinite x, so only int matrices.
+    def guard(facts, b):
+        shape, size = facts.shape(b[matrix]), constant_shape(b[identity], "eye")
+        return facts.integral(b[matrix]) and shape is not None and size is not None and shape[side] == size[0]
+    return guard
+
+
+def same_shape_as(matrix, constant, kind, elements="numeric"):
+    def guard(facts, b):
+        shape = facts.shape(b[matrix])
+        return getattr(facts, elements)(b[matrix]) and shape is not None and shape == constant_shape(b[constant], kind)
+    return guard
+
+
+def both_matrices(facts, b):
+    return facts.matrix(b["A"]) and facts.matrix(b["B"])
+
+
+RULES = [
+    Rule("double-transpose", ("'", ("'", "A")), "A", lambda f, b: f.matrix(b["A"])),
+    Rule("double-negation", ("neg", ("neg", "A")), "A", lambda f, b: f.numeric(b["A"])),
+    Rule("identity-product", ("*", "A", "I"), "A", identity_matmul("A", "I", 1)),
+    Rule("identity-product", ("*", "I", "A"), "A", identity_matmul("A", "I", 0)),
+    # As for add-zero below, A .+ zeros turns -0.0 into 0.0: only ints.
+    Rule("add-zeros", (".+", "A", "Z"), "A", same_shape_as("A", "Z", "zeros", "integral")),
+    Rule("add-zeros", (".+", "Z", "A"), "A", same_shape_as("A", "Z", "zeros", "integral")),
+    Rule("subtract-zeros", (".-", "A", "Z"), "A", same_shape_as("A", "Z", "zeros", "integral")),
+    Rule("multiply-ones", (".*", "A", "O"), "A", same_shape_as("A", "O", "ones")),
+    Rule("multiply-ones", (".*", "O", "A"), "A", same_shape_as("A", "O", "ones")),
+    Rule("multiply-one", ("*", "x", 1), "x", lambda f, b: f.numeric(b["x"])),
+    Rule("multiply-one", ("*", 1, "x"), "x", lambda f, b: f.numeric(b["x"])),
+    Rule("subtract-zero", ("-", "x", 0), "x", lambda f, b: f.numeric(b["x"])),
+    # x + 0 turns -0.0 into 0.0, so only integers.
+    Rule("add-zero", ("+", "x", 0), "x", lambda f, b: f.type_of(b["x"]) == "int"),
+    Rule("add-zero", ("+", 0, "x"), "x", lambda f, b: f.type_of(b["x"]) == "int"),
+    # (A' * B)' = B' * A and (A * B')' = B * A' save a transpose.
+    Rule("transpose-product", ("'", ("*", ("'", "A"), "B")), ("*", ("'", "B"), "A"), both_matrices),
+    Rule("transpose-product", ("'", ("*", "A", ("'", "B"))), ("*", "B", ("'", "A")), both_matrices),
+]
+
+
+class AlgebraicSimplification(Pass):
+    """Rewrites matrix and scalar expressions with the identities in RULES.
+
+    Guards use the types and shapes the TypeChecker inferred, so an
+    identity only applies where it holds for the values the program
+    computes, including their element type.
+    """
+    name = "algebraic-simplification"
+
+    def __init__(self, rules=RULES):
+        super().__init__()
+        self.rules = rules
+        self.facts = None
+
+    def run(self, ast):
+        self.facts = Facts(static_types(ast))
+        return self.visit(ast)
+
+    def simplify(self, node):
+        for rule in self.rules:
+            result = rule.apply(node, self.facts)
+            if result is None:
+                continue
+            self.stats[rule.name] += 1
+            return self.visit(result) if result is not node else node
+        return node
+
+    def visit_Apply(self, node):
+        return self.simplify(self.generic_visit(node))
+
+    def visit_Transpose(self, node):
+        return self.simplify(self.generic_visit(node))
+
+    def visit_UnaryExpr(self, node):
+        return self.simplify(self.generic_visit(node))
@@ -0,0 +1,305 @@
+import numpy as np
+
+from Values import (DENSE, ELEMENTWISE, INT_MAX, INT_MIN, IdentityMatrix, ConstantMatrix, MatrixValue,
+                    StructuredMatrix, check_index, combine, positive_zero, scalar, zero_filled)
+
+# Share of stored elements above which a sparse matrix is converted to an
+# ndarray. A dense matrix is only made sparse at half this share, so that
+# a matrix near the threshold does not flip back and forth.
+MAX_FILL = 0.1
+
+# Smallest matrix, in elements, worth converting to sparse storage.
+MIN_ELEMENTS = 1 << 10
+
+# Most intermediate products a sparse product expands into at once.
+CHUNK = 1 << 20
+
+
+def nonzero(array):
+    """Positions of the elements of array a sparse matrix has to store:
+    everything but positive zeros."""
+    mask = array != 0
+    if array.dtype.kind == 'f':
+        mask |= np.signbit(array)
+    return np.nonzero(mask)
+
+
+def finite(values):
+    return values.dtype.kind in 'iub' or np.isfinite(values).all()
+
+
+class SparseMatrix(MatrixValue):
+    """An int64 or float64 matrix kept in compressed sparse row (CSR) form:
+    the column indices and values of the stored elements of row i are
+    indices[indptr[i]:indptr[i + 1]] and data[indptr[i]:indptr[i + 1]],
+    sorted by column. Elements not stored are positive zeros.
+
+    Indexed stores go into a dictionary of pending elements (coordinate
+    form) that is merged into the CSR arrays when an operation needs them,
+    so a matrix can be filled one element at a time. Stores change the
+    matrix in place; the MemoryStack copies a shared one first, as it does
+    ndarrays.
+
+    Operators whose zeros stay zero give sparse results, converted to an
+    ndarray when they fill more than MAX_FILL of their elements; the rest
+    give ndarrays computed from the stored elements only. Results are those
+    NumPy computes on the dense matrices, except that float sums of products
+    may round differently and zero elements of products may differ in sign.
+    """
+
+    mutable = True
+
+    def __init__(self, rows, cols, indptr, indices, data):
+        self.rows = rows
+        self.cols = cols
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.pending = {}
+
+    @staticmethod
+    def from_coo(rows, cols, row, col, data):
+        """The matrix with data[k] at (row[k], col[k]); positions must be distinct."""
+        order = np.argsort(row * cols + col, kind='stable')
+        indptr = np.zeros(rows + 1, np.int64)
+        np.cumsum(np.bincount(row, minlength=rows), out=indptr[1:])
+        return SparseMatrix(rows, cols, indptr, col[order].astype(np.int64), data[order])
+
+    @staticmethod
+    def from_ndarray(array):
+        if array.ndim != 2 or array.dtype not in (np.int64, np.float64):
+            return None
+        row, col = nonzero(array)
+        return SparseMatrix.from_coo(array.shape[0], array.shape[1], row, col, array[row, col])
+
+    @staticmethod
+    def from_structured(matrix):
+        """zeros(n, m) or eye(n, m) as a SparseMatrix; None for other constants."""
+        rows, cols = matrix.shape
+        if isinstance(matrix, IdentityMatrix):
+            d = matrix.diagonal()
+            return SparseMatrix.from_coo(rows, cols, d, d, np.full(len(d), matrix.value, matrix.dtype))
+        if isinstance(matrix, ConstantMatrix) and positive_zero(matrix.value):
+            empty = np.zeros(0, np.int64)
+            return SparseMatrix.from_coo(rows, cols, empty, empty, np.zeros(0, matrix.dtype))
+        return None
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nnz(self):
+        """Number of stored elements; pending stores count even when they
+        replace a stored element."""
+        return len(self.data) + len(self.pending)
+
+    def fill(self):
+        size = self.rows * self.cols
+        return self.nnz / size if size else 1.0
+
+    def row_ids(self):
+        return np.repeat(np.arange(self.rows), np.diff(self.indptr))
+
+    def flush(self):
+        """Merge the pending stores into the CSR arrays."""
+        if not self.pending:
+            return
+        positions = np.array(list(self.pending.keys()), np.int64).reshape(-1, 2)
+        values = np.array(list(self.pending.values()), self.dtype)
+        keys = self.row_ids() * self.cols + self.indices
+        kept = ~np.isin(keys, positions[:, 0] * self.cols + positions[:, 1])
+        merged = SparseMatrix.from_coo(self.rows, self.cols,
+                                       np.concatenate([self.row_ids()[kept], positions[:, 0]]),
+                                       np.concatenate([self.indices[kept], positions[:, 1]]),
+                                       np.concatenate([self.data[kept], values]))
+        self.indptr, self.indices, self.data = merged.indptr, merged.indices, merged.data
+        self.pending = {}
+
+    def to_ndarray(self):
+        self.flush()
+        array = np.zeros(self.shape, self.dtype)
+        array[self.row_ids(), self.indices] = self.data
+        return array
+
+    def copy(self):
+        # The CSR arrays are replaced, never written, so copies share them.
+        self.flush()
+        return SparseMatrix(self.rows, self.cols, self.indptr, self.indices, self.data)
+
+    def transpose(self):
+        self.flush()
+        return SparseMatrix.from_coo(self.cols, self.rows, self.indices, self.row_ids(), self.data)
+
+    def __getitem__(self, index):
+        if type(index) is tuple and len(index) == 2:
+            i = check_index(index[0], self.rows, 0)
+            j = check_index(index[1], self.cols, 1)
+            value = self.pending.get((i, j))
+            if value is not None:
+                return value
+            start, stop = self.indptr[i], self.indptr[i + 1]
+            k = start + np.searchsorted(self.indices[start:stop], j)
+            return self.data[k] if k < stop and self.indices[k] == j else self.dtype.type(0)
+        if type(index) is not tuple:
+            i = check_index(index, self.rows, 0)
+            self.flush()
+            row = np.zeros(self.cols, self.dtype)
+            start, stop = self.indptr[i], self.indptr[i + 1]
+            row[self.indices[start:stop]] = self.data[start:stop]
+            return row
+        return self.to_ndarray()[index]
+
+    def with_item(self, index, value):
+        """Store one element in place, converted as NumPy would store it;
+        None if the store needs NumPy or would fill more than MAX_FILL."""
+        value = scalar(value)
+        if type(index) is not tuple or len(index) != 2 or value is None:
+            return None
+        i = check_index(index[0], self.rows, 0)
+        j = check_index(index[1], self.cols, 1)
+        if self.dtype == np.int64:
+            if type(value) is float:
+                if value != value or value in (float('inf'), float('-inf')):
+                    return None
+                value = int(value)
+            if not INT_MIN <= value <= INT_MAX:
+                return None
+        if (i, j) not in self.pending and self.nnz + 1 > MAX_FILL * self.rows * self.cols:
+            return None
+        self.pending[(i, j)] = self.dtype.type(value)
+        return self
+
+    def with_data(self, data):
+        """A matrix with the same stored positions and new values."""
+        return SparseMatrix(self.rows, self.cols, self.indptr, self.indices, data)
+
+    def settled(self):
+        """self, or self as an ndarray if it fills more than MAX_FILL."""
+        return self.to_ndarray() if self.fill() > MAX_FILL else self
+
+    def __neg__(self):
+        # A float matrix would need -0 in the elements it does not store.
+        self.flush()
+        if self.dtype != np.int64:
+            return -self.to_ndarray()
+        return self.with_data(-self.data)
+
+    def binary(self, op, other, reflected=False):
+        symbol = ELEMENTWISE.get(op)
+        if symbol is None:
+            return NotImplemented
+        self.flush()
+
+        value = scalar(other)
+        if value is not None:
+            if op[0] == '.' or symbol in '+-' or (symbol == '/' and reflected):
+                return NotImplemented
+            zero = combine(symbol, value, self.dtype.type(0).item()) if reflected \
+                else combine(symbol, self.dtype.type(0).item(), value)
+            if zero is None or not positive_zero(zero):
+                return NotImplemented
+            return self.with_data(DENSE[symbol](value, self.data) if reflected else DENSE[symbol](self.data, value))
+
+        if isinstance(other, StructuredMatrix):
+            other = SparseMatrix.from_structured(other)
+            if other is None:
+                return NotImplemented
+
+        if isinstance(other, SparseMatrix):
+            other.flush()
+            a, b = (other, self) if reflected else (self, other)
+            if op == '*':
+                return sparse_matmul(a, b)
+            if a.shape != b.shape or symbol == '/':
+                return NotImplemented
+            return sparse_elementwise(symbol, a, b)
+
+        if not isinstance(other, np.ndarray) or other.ndim != 2 or other.dtype.kind not in 'biuf':
+            return NotImplemented
+        if op == '*':
+            if not finite(other):
+                return NotImplemented
+            if reflected:
+                if other.shape[1] != self.rows:
+                    return NotImplemented
+                return np.ascontiguousarray(sparse_dense_matmul(self.transpose(), other.T).T)
+            if other.shape[0] != self.cols:
+                return NotImplemented
+            return sparse_dense_matmul(self, other)
+        if other.shape != self.shape:
+            return NotImplemented
+        row = self.row_ids()
+        if symbol == '*' and self.dtype == np.int64 and other.dtype.kind in 'bi':
+            return self.with_data(self.data * other[row, self.indices])
+        return zero_filled(symbol, other, np.zeros((), self.dtype), (row, self.indices), self.data, reflected)
+
+    def __repr__(self):
+        return f"SparseMatrix({self.rows}x{self.cols}, nnz={self.nnz})"
+
+
+def sparse_elementwise(symbol, a, b):
+    """a symbol b over the union of the stored positions of a and b, whose
+    other elements 0 symbol 0 leaves positive zeros."""
+    keys_a = a.row_ids() * a.cols + a.indices
+    keys_b = b.row_ids() * b.cols + b.indices
+    keys = np.union1d(keys_a, keys_b)
+    values_a = np.zeros(len(keys), a.dtype)
+    values_a[np.searchsorted(keys, keys_a)] = a.data
+    values_b = np.zeros(len(keys), b.dtype)
+    values_b[np.searchsorted(keys, keys_b)] = b.data
+    data = DENSE[symbol](values_a, values_b)
+    return SparseMatrix.from_coo(a.rows, a.cols, keys // a.cols, keys % a.cols, data).settled()
+
+
+def sparse_dense_matmul(a, b):
+    """a @ b for a SparseMatrix a and a finite ndarray b, summing the
+    products of each row in a chunk of stored elements at a time."""
+    out = np.zeros((a.rows, b.shape[1]), np.result_type(a.dtype, b.dtype))
+    row = a.row_ids()
+    step = max(1, CHUNK // max(1, b.shape[1]))
+    for start in range(0, len(a.data), step):
+        stop = min(start + step, len(a.data))
+        products = a.data[start:stop, None] * b[a.indices[start:stop]]
+        rows, first = np.unique(row[start:stop], return_index=True)
+        out[rows] += np.add.reduceat(products, first, axis=0)
+    return out
+
+
+def sparse_matmul(a, b):
+    """a @ b for two SparseMatrix operands: every stored a[i, k] times the
+    stored elements of row k of b, summed by position."""
+    if a.cols != b.rows or not (finite(a.data) and finite(b.data)):
+        return NotImplemented
+    counts = np.diff(b.indptr)[a.indices]
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, np.int64)
+        return SparseMatrix.from_coo(a.rows, b.cols, empty, empty, np.zeros(0, np.result_type(a.dtype, b.dtype)))
+    starts = np.cumsum(counts) - counts
+    positions = np.repeat(b.indptr[a.indices] - starts, counts) + np.arange(total)
+    keys = np.repeat(a.row_ids(), counts) * b.cols + b.indices[positions]
+    products = np.repeat(a.data, counts) * b.data[positions]
+    order = np.argsort(keys, kind='stable')
+    keys, products = keys[order], products[order]
+    unique, first = np.unique(keys, return_index=True)
+    data = np.add.reduceat(products, first)
+    return SparseMatrix.from_coo(a.rows, b.cols, unique // b.cols, unique % b.cols, data).settled()
+
+
+def sparsify(value):
+    """value as a SparseMatrix if it is zeros, eye, or an int64 or float64
+    ndarray with at most half of MAX_FILL of its elements stored, and has
+    at least MIN_ELEMENTS elements; else value."""
+    if not isinstance(value, (StructuredMatrix, np.ndarray)) or np.prod(value.shape) < MIN_ELEMENTS:
+        return value
+    if isinstance(value, StructuredMatrix):
+        return SparseMatrix.from_structured(value) or value
+    if isinstance(value, np.ndarray) and value.ndim == 2 and value.dtype in (np.int64, np.float64):
+        if value.size and len(nonzero(value)[0]) <= MAX_FILL / 2 * value.size:
+            return SparseMatrix.from_ndarray(value)
+    return value
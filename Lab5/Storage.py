@@ -0,0 +1,56 @@
+import AST
+from Analysis import static_types
+from PassManager import Pass
+from TypeChecker import mat_storage
+
+
+def dense_fills(node, depth=0, names=None):
+    """Names of matrices stored into element by element inside two nested
+    loops, which usually fill them."""
+    if names is None:
+        names = set()
+    if isinstance(node, list):
+        for item in node:
+            dense_fills(item, depth, names)
+        return names
+    if not isinstance(node, AST.Node):
+        return names
+    if isinstance(node, AST.Assign) and isinstance(node.lvalue, AST.MatrixIndex) and depth >= 2:
+        names.add(node.lvalue.matrix.name)
+    if isinstance(node, (AST.For, AST.While)):
+        depth += 1
+    for value in vars(node).values():
+        dense_fills(value, depth, names)
+    return names
+
+
+class SparseStorage(Pass):
+    """Marks `A = expr` for sparse storage where the TypeChecker tags the
+    value as sparse: zeros, eye, and what operators that keep zeros make
+    of sparse operands.
+
+    A matrix later filled element by element in a nested loop is left
+    dense. The Interpreter converts a marked value to a SparseMatrix if it
+    is zeros, eye, or an ndarray at most half of MAX_FILL full, and turns it
+    back into an ndarray once stores fill more than MAX_FILL of it.
+    """
+    name = "sparse-storage"
+
+    def __init__(self):
+        super().__init__()
+        self.types = None
+        self.dense = set()
+
+    def run(self, ast):
+        self.types = static_types(ast)
+        self.dense = dense_fills(ast)
+        return self.visit(ast)
+
+    def visit_Assign(self, node):
+        if not isinstance(node.lvalue, AST.Variable) or node.operator != '=':
+            return node
+        if mat_storage(self.types.type_of(node.expr)) != "sparse" or node.lvalue.name in self.dense:
+            return node
+        node.storage = "sparse"
+        self.stats["marked"] += 1
+        return node
@@ -29,6 +29,15 @@ class SymbolTable(object):
     def set(self, name, value):
         self.symbol_table[name] = value
 
+    def update(self, name, value):
+        """Set name in the scope defining it, this one if none does."""
+        scope = self
+        while name not in scope.symbol_table and scope.parent is not None:
+            scope = scope.parent
+        if name not in scope.symbol_table:
+            scope = self
+        scope.symbol_table[name] = value
+
     def getParentScope(self):
         return self.parent
 
@@ -143,6 +143,10 @@ class TreePrinter:
     def print_tree(self, indent_level=0) -> None:
         print(TreePrinter.indent * indent_level + str(self.value))
 
+    @addToClass(AST.Colon)
+    def print_tree(self, indent_level=0) -> None:
+        print(TreePrinter.indent * indent_level + ":")
+
     @addToClass(AST.MatrixIndex)
     def print_tree(self, indent_level=0) -> None:
         print(TreePrinter.indent * indent_level + "MATRIX INDEX")
@@ -158,6 +162,16 @@ class TreePrinter:
         TreePrinter.safe_print_tree(self.lvalue, indent_level + 1)
         TreePrinter.safe_print_tree(self.expr, indent_level + 1)
 
+    @addToClass(AST.MatMulChain)
+    def print_tree(self, indent_level=0) -> None:
+        print(TreePrinter.indent * indent_level + "MATMUL CHAIN")
+        for factor in self.factors:
+            TreePrinter.safe_print_tree(factor, indent_level + 1)
+
+    @addToClass(AST.Release)
+    def print_tree(self, indent_level=0) -> None:
+        print(TreePrinter.indent * indent_level + "RELEASE " + ", ".join(self.names))
+
     @staticmethod
     def print_result(result):
         if isinstance(result, list):
@@ -1,15 +1,18 @@
 from SymbolTable import SymbolTable
+from Diagnostics import Diagnostic
+from Ranges import LazyRange
 import AST
 
 def is_scalar(t): return t in {"int", "float", "bool", "string"}
 def is_numeric(t): return t in {"int", "float"}
-def is_matrix(t): return isinstance(t, tuple) and len(t) == 3 and t[0] == "matrix"
-def is_range(t):  return isinstance(t, tuple) and len(t) == 2 and t[0] == "range"
+def is_matrix(t): return isinstance(t, tuple) and len(t) == 4 and t[0] == "matrix"
+def is_mask(t): return is_matrix(t) and t[1] == "bool"
 
 def mat_elem(t):  return t[1] if is_matrix(t) else None
 def mat_shape(t): return t[2] if is_matrix(t) else (None, None)
-def matrix_t(elem, rows, cols): return ("matrix", elem, (rows, cols))
-def range_t(elem): return ("range", elem)
+def mat_storage(t): return t[3] if is_matrix(t) else None
+def matrix_t(elem, rows, cols, storage="dense"): return ("matrix", elem, (rows, cols), storage)
+def with_storage(t, storage): return matrix_t(t[1], *t[2], storage) if is_matrix(t) else t
 
 def base_elem(t):
     while is_matrix(t):
@@ -27,12 +30,43 @@ def total_shape(t):
         return (tr, tc)
     return (r, c)
 
+def binop_storage(op, ls, rs):
+    """Storage of the result of op on operands stored as ls and rs, None
+    standing for a scalar. Sparse results are those whose zeros stay zero:
+    products and quotients by a scalar, elementwise products with a sparse
+    factor, and sums, differences and products of two sparse matrices."""
+    if rs is None:
+        return ls if op in {"*", "/"} else "dense"
+    if ls is None:
+        return rs if op == "*" else "dense"
+    if op == ".*" and "sparse" in (ls, rs):
+        return "sparse"
+    if op in {"+", "-", "*", ".+", ".-"} and ls == rs == "sparse":
+        return "sparse"
+    return "dense"
+
+def reduced(t, elem, axis):
+    """Type of a reduction of matrix t to elements of type elem: a scalar,
+    or with an axis a row (0, folding each column) or a column (1, folding
+    each row); axis holds None when it is not a constant."""
+    if not axis:
+        return elem
+    r, c = total_shape(t)
+    if axis[0] == 0:
+        return matrix_t(elem, 1, c)
+    if axis[0] == 1:
+        return matrix_t(elem, r, 1)
+    return matrix_t(elem, None, None)
+
+def sum_elem(t):
+    e = base_elem(t)
+    return "int" if e in ("int", "bool") else e
+
 def tstr(t):
     if is_matrix(t):
         (r, c) = mat_shape(t)
-        return f"matrix<{tstr(mat_elem(t))}>[{r}x{c}]"
-    if is_range(t):
-        return f"range<{tstr(t[1])}>"
+        storage = "" if mat_storage(t) == "dense" else f"{{{mat_storage(t)}}}"
+        return f"matrix<{tstr(mat_elem(t))}>[{r}x{c}]{storage}"
     return str(t)
 
 class NodeVisitor(object):
@@ -124,25 +158,38 @@ class TypeChecker(NodeVisitor):
         }
     }
 
-    def __init__(self, info=False):
+    def __init__(self, info=False, quiet=False):
         self.st = SymbolTable()
         self.functions = {
             "ones":  (["int"], lambda r, c: matrix_t("float", r, c)),
-            "zeros": (["int"], lambda r, c: matrix_t("float", r, c)),
-            "eye":   (["int"], lambda r, c: matrix_t("float", r, c)),
+            "zeros": (["int"], lambda r, c: matrix_t("float", r, c, "sparse")),
+            "eye":   (["int"], lambda r, c: matrix_t("float", r, c, "sparse")),
+            "any":   (["matrix"], lambda t: "bool"),
+            "all":   (["matrix"], lambda t: "bool"),
+            "count": (["matrix"], lambda t: "int"),
+            "find":  (["matrix"], lambda t: matrix_t("int", 1, None)),
+            "sum":   (["matrix", "axis"], lambda t, *axis: reduced(t, sum_elem(t), axis)),
+            "prod":  (["matrix", "axis"], lambda t, *axis: reduced(t, sum_elem(t), axis)),
+            "min":   (["matrix", "axis"], lambda t, *axis: reduced(t, base_elem(t), axis)),
+            "max":   (["matrix", "axis"], lambda t, *axis: reduced(t, base_elem(t), axis)),
+            "mean":  (["matrix", "axis"], lambda t, *axis: reduced(t, "float", axis)),
         }
         self.print_info = info
+        self.quiet = quiet
+        self.diagnostics = []
 
     def error(self, msg, node=None):
-        line = getattr(node, "lineno", None)
-        if line is not None:
-            print(f"[line {line}] {msg}")
-        else:
-            print(msg)
+        diagnostic = Diagnostic(getattr(node, "lineno", None), msg)
+        self.diagnostics.append(diagnostic)
+        if not self.quiet:
+            print(diagnostic)
 
     def info(self, msg, node=None):
-        if self.print_info:
-            line = getattr(node, "lineno", None)
+        if not self.print_info:
+            return
+        line = getattr(node, "lineno", None)
+        self.diagnostics.append(Diagnostic(line, msg, "info"))
+        if not self.quiet:
             if line is not None:
                 print(f"[line {line}] INFO: {msg}")
             else:
@@ -155,7 +202,7 @@ class TypeChecker(NodeVisitor):
         e = mat_elem(t)
         r, c = mat_shape(t)
         te = self._transpose_type(e, node) if is_matrix(e) else e
-        return matrix_t(te, c, r)
+        return matrix_t(te, c, r, mat_storage(t))
 
     def _promote_numeric(self, a, b):
         try:
@@ -193,6 +240,30 @@ class TypeChecker(NodeVisitor):
         c_ok = (ac is None or bc is None or ac == bc)
         return r_ok and c_ok
 
+    def _block_result(self, op, a, b, elem, storage):
+        """Type of op on two matrices of blocks whose partitions line up,
+        which keeps the blocks; None otherwise."""
+        ab, bb = mat_elem(a), mat_elem(b)
+        if not (is_matrix(ab) and is_matrix(bb)):
+            return None
+        (ar, ac), (br, bc) = mat_shape(a), mat_shape(b)
+        (abr, abc), (bbr, bbc) = mat_shape(ab), mat_shape(bb)
+        if op == "*":
+            if None in (ac, abc) or (ac, abc) != (br, bbr):
+                return None
+            return matrix_t(matrix_t(elem, abr, bbc), ar, bc, storage)
+        if None in (ar, ac, abr, abc) or (ar, ac, abr, abc) != (br, bc, bbr, bbc):
+            return None
+        return matrix_t(matrix_t(elem, abr, abc), ar, ac, storage)
+
+    def _scaled_blocks(self, t, elem, storage):
+        """Type of a matrix of blocks combined with a scalar."""
+        r, c = mat_shape(t)
+        if is_matrix(mat_elem(t)):
+            return matrix_t(matrix_t(elem, *mat_shape(mat_elem(t))), r, c, storage)
+        r, c = total_shape(t)
+        return matrix_t(elem, r, c, storage)
+
     def _can_matmul(self, a, b):
         if not (is_matrix(a) and is_matrix(b)):
             return False, None, None
@@ -203,10 +274,25 @@ class TypeChecker(NodeVisitor):
         result_cols = bc
         return can_mul, result_rows, result_cols
 
+    def _comparison_type(self, op, lt, rt, node):
+        """Type of an elementwise comparison with a matrix operand: a mask
+        of the matrix's shape."""
+        le = base_elem(lt) if is_matrix(lt) else lt
+        re = base_elem(rt) if is_matrix(rt) else rt
+        if not (is_numeric(le) and is_numeric(re)) and not (op in {"==", "!="} and le == re == "bool"):
+            self.error(f"Unsupported elementwise '{op}' between {tstr(lt)} and {tstr(rt)}", node)
+        if is_matrix(lt) and is_matrix(rt) and not self._same_shape(lt, rt):
+            self.error(f"Shape mismatch for '{op}': {tstr(lt)} {op} {tstr(rt)}", node)
+        r, c = total_shape(lt if is_matrix(lt) else rt)
+        return matrix_t("bool", r, c)
+
     def check_binop(self, op, lt, rt, node):
         if op in self.ttype and (lt in self.ttype[op]) and (rt in self.ttype[op][lt]):
             return self.ttype[op][lt][rt]
 
+        if op in {"==", "!=", "<", "<=", ">", ">="} and (is_matrix(lt) or is_matrix(rt)):
+            return self._comparison_type(op, lt, rt, node)
+
         if is_scalar(lt) and is_scalar(rt):
             if lt == "string" or rt == "string":
                 if op == "+" and lt == "string" and rt == "string":
@@ -238,24 +324,28 @@ class TypeChecker(NodeVisitor):
             elem_res = self._promote_numeric(le, re)
             if elem_res is None:
                 self.error(f"Type mismatch in elements: {tstr(le)} {op} {tstr(re)}", node)
+            storage = binop_storage(op, mat_storage(lt), mat_storage(rt))
+            blocks = self._block_result(op, lt, rt, elem_res, storage)
+            if blocks is not None:
+                return blocks
 
             if op == "*":
                 can_mul, result_rows, result_cols = self._can_matmul(lt, rt)
                 if not can_mul:
                     self.error(f"Shape mismatch for '*': {tstr(lt)} * {tstr(rt)}", node)
-                return matrix_t(elem_res, result_rows, result_cols)
+                return matrix_t(elem_res, result_rows, result_cols, storage)
 
             if self._same_shape(lt, rt):
                 r, c = total_shape(lt)
-                return matrix_t(elem_res, r, c)
+                return matrix_t(elem_res, r, c, storage)
             elif self._matrix_broadcast(lt, rt):
                 self.info(f"Matrixes can broadcast together {tstr(lt)} {op} {tstr(rt)}", node)
                 r, c = total_shape(lt)
-                return matrix_t(elem_res, r, c)
+                return matrix_t(elem_res, r, c, storage)
             else:
                 self.error(f"Shape mismatch for '{op}': {tstr(lt)} {op} {tstr(rt)}", node)
                 r, c = total_shape(lt)
-                return matrix_t(elem_res, r, c)
+                return matrix_t(elem_res, r, c, storage)
 
         if is_matrix(lt) and is_scalar(rt):
             le = base_elem(lt)
@@ -267,8 +357,7 @@ class TypeChecker(NodeVisitor):
             elem_res = self._promote_numeric(le, rt)
             if elem_res is None:
                 self.error(f"Type mismatch: {tstr(lt)} {op} {tstr(rt)}", node)
-            r, c = total_shape(lt)
-            return matrix_t(elem_res, r, c)
+            return self._scaled_blocks(lt, elem_res, binop_storage(op, mat_storage(lt), None))
 
         if is_scalar(lt) and is_matrix(rt):
             re = base_elem(rt)
@@ -280,8 +369,7 @@ class TypeChecker(NodeVisitor):
             elem_res = self._promote_numeric(lt, re)
             if elem_res is None:
                 self.error(f"Type mismatch: {tstr(lt)} {op} {tstr(rt)}", node)
-            r, c = total_shape(rt)
-            return matrix_t(elem_res, r, c)
+            return self._scaled_blocks(rt, elem_res, binop_storage(op, None, mat_storage(rt)))
 
         self.error(
             f"No rule for binary op '{op}' with {tstr(lt)} and {tstr(rt)}",
@@ -305,30 +393,51 @@ class TypeChecker(NodeVisitor):
                 lshape = mat_shape(ltype)
                 rshape = mat_shape(rtype)
 
+                # The variable takes the storage of the value assigned.
                 if lshape == rshape:
                     if lelem == relem:
-                        return ltype
+                        return with_storage(ltype, mat_storage(rtype))
                     if is_numeric(lelem) and is_numeric(relem):
                         promoted = self._promote_numeric(lelem, relem)
                         if promoted == lelem:
-                            return ltype
+                            return with_storage(ltype, mat_storage(rtype))
 
             self.error(f"Cannot assign {tstr(rtype)} to {tstr(ltype)}", node)
             return ltype
 
         if op.endswith("="):
             res = self.check_binop(op[:-1], ltype, rtype, node)
-            if res != ltype:
+            if with_storage(res, mat_storage(ltype)) != ltype:
                 self.error(
                     f"Result of '{op}' ({tstr(res)}) not assignable to {tstr(ltype)}",
                     node,
                 )
-            return ltype
+                return ltype
+            return res
         self.error(f"Unknown assignment operator '{op}'", node)
         return ltype
 
+    def _grown_type(self, node, ltype, rtype):
+        """Type of v after `v = [v, x]` or `v = [v; x]`, whose length along
+        the axis it grows is unknown; None for other assignments."""
+        expr = node.expr
+        if node.operator != "=" or not isinstance(expr, AST.Matrix) or not expr.rows or not expr.rows[0]:
+            return None
+        first = expr.rows[0][0]
+        if not (isinstance(first, AST.Variable) and first.name == node.lvalue.name):
+            return None
+        if not (is_matrix(ltype) and is_matrix(rtype)) or is_matrix(mat_elem(rtype)):
+            return None
+        elem = self._promote_numeric(base_elem(ltype), base_elem(rtype)) or base_elem(rtype)
+        (lr, lc), (rr, rc) = total_shape(ltype), total_shape(rtype)
+        if len(expr.rows) == 1 and lr == rr:
+            return matrix_t(elem, lr, None)
+        if len(expr.rows) > 1 and len(expr.rows[0]) == 1 and lc == rc:
+            return matrix_t(elem, None, lc)
+        return None
+
     def expect_bool(self, ty, ctx, node):
-        if ty != "bool":
+        if ty != "bool" and not is_mask(ty):
             self.error(f"Expected bool in {ctx}, got {tstr(ty)}", node)
 
     def visit_Statements(self, node: AST.Statements):
@@ -363,6 +472,12 @@ class TypeChecker(NodeVisitor):
         rt = self.visit(node.right)
         return self.check_binop(node.op, lt, rt, node)
 
+    def visit_MatMulChain(self, node: AST.MatMulChain):
+        result = self.visit(node.factors[0])
+        for factor in node.factors[1:]:
+            result = self.check_binop("*", result, self.visit(factor), node)
+        return result
+
     def visit_Assign(self, node: AST.Assign):
         rtype = self.visit(node.expr)
 
@@ -382,6 +497,11 @@ class TypeChecker(NodeVisitor):
             if ltype is None:
                 self.st.put(name, rtype)
                 ltype = rtype
+            grown = self._grown_type(node, ltype, rtype)
+            if grown is not None:
+                # A loop appending to v leaves it grown after the loop too.
+                self.st.update(name, grown)
+                return grown
             result = self.check_assign(node.operator, ltype, rtype, node)
             self.st.set(name, result)
             return result
@@ -403,6 +523,13 @@ class TypeChecker(NodeVisitor):
                         if expected_elem != actual_elem:
                             self.error(f"Cannot assign matrix<{tstr(actual_elem)}> to matrix<{tstr(expected_elem)}>",node)
 
+            # A scalar stored into a submatrix fills it; a matrix needs its
+            # shape, as far as the ranges selecting it tell.
+            if is_matrix(ltype) and is_numeric(rtype) and is_numeric(base_elem(ltype)):
+                return self.check_assign(node.operator, base_elem(ltype), rtype, node)
+            if node.operator == "=" and self._same_shape(ltype, rtype):
+                self.check_assign(node.operator, base_elem(ltype), base_elem(rtype), node)
+                return ltype
             result = self.check_assign(node.operator, ltype, rtype, node)
             return result
 
@@ -416,6 +543,9 @@ class TypeChecker(NodeVisitor):
             elem_ts = [self.visit(e) for e in row]
             row_types.append(elem_ts)
 
+        if any(is_matrix(t) for r in row_types for t in r) and not self._is_block_grid(row_types):
+            return self._concatenation_type(row_types, node)
+
         n_rows = len(row_types)
         n_cols = len(row_types[0])
 
@@ -434,76 +564,155 @@ class TypeChecker(NodeVisitor):
 
         return matrix_t(elem_t, n_rows, n_cols)
 
+    def _is_block_grid(self, row_types):
+        """Whether a matrix literal lists blocks of one shape in equal rows,
+        which makes it a matrix of matrices."""
+        shapes = {mat_shape(t) if is_matrix(t) else None for r in row_types for t in r}
+        return len(shapes) == 1 and None not in shapes and len({len(r) for r in row_types}) == 1
+
+    def _concatenation_type(self, row_types, node):
+        """Type of a matrix literal that lays out matrices and scalars side
+        by side and its rows one below the other."""
+        elems, heights, widths = [], [], []
+        for i, r in enumerate(row_types):
+            row_height, row_width = None, 0
+            for t in r:
+                if is_matrix(t):
+                    h, w = total_shape(t)
+                    elems.append(base_elem(t))
+                elif is_numeric(t):
+                    h, w = 1, 1
+                    elems.append(t)
+                else:
+                    self.error(f"Cannot concatenate {tstr(t)} into a matrix", node)
+                    continue
+                if row_height is not None and h is not None and h != row_height:
+                    self.error(f"Row {i} of matrix concatenation joins heights {row_height} and {h}", node)
+                row_height = h if row_height is None else row_height
+                row_width = None if row_width is None or w is None else row_width + w
+            heights.append(row_height)
+            widths.append(row_width)
+
+        known = [w for w in widths if w is not None]
+        if any(w != known[0] for w in known):
+            self.error(f"Rows of matrix concatenation have different widths: {', '.join(map(str, widths))}", node)
+
+        elem = elems[0] if elems else "float"
+        for e in elems[1:]:
+            promoted = self._promote_numeric(elem, e)
+            if promoted is None:
+                self.error(f"Cannot concatenate {tstr(elem)} and {tstr(e)} elements", node)
+            else:
+                elem = promoted
+        rows = None if None in heights else sum(heights)
+        return matrix_t(elem, rows, known[0] if known else None)
+
+    def _index_length(self, idx, t, size, dim, name):
+        """Number of positions an index of type t selects along a dimension
+        of this size (None if unknown), or "scalar" for a single int."""
+        if isinstance(idx, AST.Colon):
+            return size
+        if isinstance(idx, AST.Range):
+            if mat_elem(t) not in ("int", None):
+                self.error(f"Range index {dim} for {name} must be int, got {tstr(mat_elem(t))}", idx)
+            return mat_shape(t)[1]
+        if is_mask(t):
+            return None
+        if is_matrix(t):
+            if mat_elem(t) != "int":
+                self.error(f"Index matrix {dim} for {name} must hold ints, got {tstr(mat_elem(t))}", idx)
+            r, c = mat_shape(t)
+            return None if r is None or c is None else r * c
+        if t != "int":
+            self.error(f"Index {dim} for {name} must be int, got {tstr(t)}", idx)
+        value = self._constant(idx)
+        if type(value) is int and size is not None and not -size <= value < size:
+            self.error(f"Index {value} out of bounds for dimension {dim} of matrix {name} (size {size})", idx)
+        return "scalar"
+
     def visit_MatrixIndex(self, node: AST.MatrixIndex):
-        mt = self.st.get(node.matrix.name)
+        name = node.matrix.name
+        mt = self.st.get(name)
 
         if mt is None:
-            self.error(f"Variable '{node.matrix.name}' is not defined", node)
+            self.error(f"Variable '{name}' is not defined", node)
             return "int"
 
         if not is_matrix(mt):
             self.error(f"Indexing only supported for matrices, got {tstr(mt)}", node)
             return None
 
-        shape = mat_shape(mt)
-        indices = node.indices.accept(self) if isinstance(node.indices, AST.ExprList) else [node.indices.accept(self)]
-
-        if len(indices) == 1:
-            idx_t = indices[0]
-            if idx_t != "int":
-                self.error(f"Index for {node.matrix.name} must be int, got {tstr(idx_t)}",indices[0])
-
-            if isinstance(indices[0], AST.Literal) and indices[0].typename == "int":
-                idx_val = indices[0].value
-                rows, cols = shape
-                if rows is not None and idx_val >= rows:
-                    self.error(f"Row index {idx_val} out of bounds for matrix {node.matrix.name} (size {rows})",indices[0])
-
-            elem = mat_elem(mt)
-            _, cols = shape
-            return matrix_t(elem, 1, cols)
-
-        elif len(indices) == 2:
-            for dim, (idx_expr, dim_size) in enumerate(zip(indices, shape)):
-                idx_t = idx_expr
-                if idx_t != "int":
-                    self.error(f"Index {dim} for {node.matrix.name} must be int, "f"got {tstr(idx_t)}",idx_expr)
+        if len(node.indices) not in (1, 2):
+            self.error(f"Matrix indexing requires 1 or 2 indices, got {len(node.indices)}", node)
+            return None
 
-                if isinstance(idx_expr, AST.Literal) and idx_expr.typename == "int":
-                    idx_val = idx_expr.value
-                    if dim_size is not None and idx_val >= dim_size:
-                        self.error(f"Index {idx_val} out of bounds for dimension {dim} "f"of matrix {node.matrix.name} (size {dim_size})",idx_expr)
+        rows, cols = mat_shape(mt)
+        types = [None if isinstance(idx, AST.Colon) else self.visit(idx) for idx in node.indices]
+        elem = mat_elem(mt)
 
-            return base_elem(mt)
+        # A mask of the matrix's shape selects the elements where it is true.
+        if len(types) == 1 and is_mask(types[0]) and self._same_shape(types[0], mt):
+            return matrix_t(elem, 1, None)
+        lengths = [self._index_length(idx, t, size, dim, name)
+                   for dim, (idx, t, size) in enumerate(zip(node.indices, types, (rows, cols)))]
 
-        else:
-            self.error(f"Matrix indexing requires 1 or 2 indices, got {len(indices)}", node)
-            return None
+        # A single int selects a row; ranges, ':' and index matrices select
+        # a submatrix of the rows and columns they list.
+        if len(lengths) == 1:
+            return matrix_t(elem, 1 if lengths[0] == "scalar" else lengths[0], cols)
+        if lengths == ["scalar", "scalar"]:
+            return elem
+        return matrix_t(elem, *(1 if n == "scalar" else n for n in lengths))
 
     def visit_Transpose(self, node: AST.Transpose):
         mt = self.visit(node.matrix)
         return self._transpose_type(mt, node)
 
+    def _constant(self, node):
+        """The value of a number literal, possibly negated, else None."""
+        if isinstance(node, AST.Literal) and is_numeric(node.typename):
+            return node.value
+        if isinstance(node, AST.UnaryExpr) and node.op == '-':
+            value = self._constant(node.expr)
+            return None if value is None else -value
+        return None
+
+    def _range_length(self, node):
+        bounds = [self._constant(node.start), self._constant(node.end)]
+        bounds.append(self._constant(node.step) if node.step is not None else 1)
+        if None in bounds:
+            return None
+        try:
+            return len(LazyRange.from_bounds(*bounds))
+        except ValueError as e:
+            self.error(f"Invalid range: {e}", node)
+            return None
+
     def visit_Range(self, node: AST.Range):
-        st = self.visit(node.start)
-        en = self.visit(node.end)
-        sp = self.visit(node.step) if node.step is not None else None
-        if st != en:
-            self.error(f"Type mismatch in range bounds: {tstr(st)} vs {tstr(en)}", node)
-        if sp is not None and sp != st:
-            self.error(f"Type mismatch in range step: {tstr(st)} vs {tstr(sp)}", node)
-            
-        return range_t(st)
+        bounds = [self.visit(node.start), self.visit(node.end)]
+        if node.step is not None:
+            bounds.append(self.visit(node.step))
+        if any(t is not None and not is_numeric(t) for t in bounds):
+            self.error(f"Range bounds must be numbers, got {', '.join(tstr(t) for t in bounds)}", node)
+            return None
+        elem = "float" if "float" in bounds else "int" if all(t == "int" for t in bounds) else None
+        return matrix_t(elem, 1, self._range_length(node))
 
     def visit_For(self, node: AST.For):
         rng_t = self.visit(node._range)
-        if not is_range(rng_t):
-            self.error(f"FOR expects a range, got {tstr(rng_t)}", node)
+        if isinstance(node._range, AST.Range):
+            var_t = mat_elem(rng_t)
+        elif is_matrix(rng_t):
+            # The loop variable takes each row of the matrix in turn.
+            var_t = matrix_t(mat_elem(rng_t), 1, mat_shape(rng_t)[1])
+        else:
+            self.error(f"FOR expects a range or a matrix, got {tstr(rng_t)}", node)
+            var_t = None
 
         parent = self.st
         self.st = parent.fork(in_loop=True)
         try:
-            self.st.put(node.var.name, rng_t[1])
+            self.st.put(node.var.name, var_t)
             return self.visit(node.statement)
         finally:
             self.st = parent
@@ -536,6 +745,9 @@ class TypeChecker(NodeVisitor):
     def visit_Return(self, node: AST.Return):
         return self.visit(node.value) if node.value is not None else "void"
 
+    def visit_Release(self, node: AST.Release):
+        return "void"
+
     def visit_Break(self, node: AST.Break):
         if not self.st.in_loop:
             self.error('Break outside of the "while" or "for" loop', node)
@@ -546,12 +758,35 @@ class TypeChecker(NodeVisitor):
             self.error('Continue outside of the "while" or "for" loop', node)
         return "void"
 
+    def _matrix_function(self, fname, params, builder, node):
+        """Type of a builtin taking a matrix, such as any or sum, and for
+        the reductions an optional axis."""
+        if not 1 <= len(node.args) <= len(params):
+            self.error(f"Function '{fname}' expects {' or '.join(map(str, range(1, len(params) + 1)))} args, "
+                       f"got {len(node.args)}", node)
+        arg_types = [self.visit(a) for a in node.args]
+        axis = []
+        for a, got in zip(node.args[1:len(params)], arg_types[1:]):
+            if got != "int":
+                self.error(f"Axis of '{fname}' expected int, got {tstr(got)}", a)
+            value = self._constant(a)
+            if type(value) is int and value not in (0, 1):
+                self.error(f"Axis of '{fname}' must be 0 or 1, got {value}", a)
+            axis.append(value if type(value) is int else None)
+        t = arg_types[0] if arg_types else None
+        if not is_matrix(t) or not (is_numeric(base_elem(t)) or is_mask(t)):
+            self.error(f"Argument 0 of '{fname}' expected a numeric or bool matrix, got {tstr(t)}", node)
+            t = matrix_t(None, None, None)
+        return builder(t, *axis)
+
     def visit_Apply(self, node: AST.Apply):
         fname = node.ref
         if fname not in self.functions and fname not in self.ttype.keys():
             self.error(f"Unknown function '{fname}'", node)
         if fname in self.functions:
-            _, builder = self.functions[fname]
+            params, builder = self.functions[fname]
+            if params[0] == "matrix":
+                return self._matrix_function(fname, params, builder, node)
 
             if len(node.args) < 1 or len(node.args) > 2:
                 self.error(f"Function '{fname}' expects 1 or 2 args, got {len(node.args)}",node)
@@ -571,9 +806,7 @@ class TypeChecker(NodeVisitor):
                     self.error(f"eye expects a square shape, got {r}x{c}",node)
 
             if len(args) == 1:
-                if fname == "eye":
-                    return matrix_t("float", args[0], args[0])
-                return matrix_t("float", args[0], 1)
+                return builder(args[0], args[0])
             
             return builder(args[0], args[1])
 
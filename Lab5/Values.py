@@ -0,0 +1,602 @@
+import math
+import operator
+
+import numpy as np
+
+# Largest matrix, in rows and columns, kept as a SmallMatrix.
+SMALL = 4
+
+INT_MIN, INT_MAX = -(1 << 63), (1 << 63) - 1
+
+# Operators of the language on matrices, in terms of elementwise Python
+# operators; '*' between two matrices is the matrix product instead.
+ELEMENTWISE = {'+': '+', '-': '-', '*': '*', '/': '/', '.+': '+', '.-': '-', '.*': '*', './': '/'}
+
+# NumPy versions of the dunder operators, used when a SmallMatrix meets
+# an operand it cannot handle itself.
+DENSE = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv, '@': operator.matmul}
+
+
+class MatrixValue(object):
+    """A matrix the Interpreter holds in some form other than an ndarray.
+
+    Subclasses store the elements their own way and give the Interpreter
+    what it needs: shape and element type, conversion to an ndarray, and
+    binary(op, other, reflected) for the language's binary operators,
+    which returns NotImplemented when the Interpreter should convert both
+    operands with dense() and use NumPy instead.
+    """
+
+    shape = ()
+    dtype = None
+    # Set on values that stores change in place, which the MemoryStack
+    # copies on write like ndarrays.
+    mutable = False
+
+    def owner(self):
+        """What variables holding this value share: itself, or an ndarray."""
+        return self
+
+    def to_ndarray(self):
+        raise NotImplementedError
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.to_ndarray()
+        return array if dtype is None else array.astype(dtype)
+
+    def tolist(self):
+        return self.to_ndarray().tolist()
+
+    def copy(self):
+        return self
+
+    def transpose(self):
+        return self.to_ndarray().T
+
+    def with_item(self, index, value):
+        """A copy with one element replaced, or None if that needs NumPy."""
+        return None
+
+    def binary(self, op, other, reflected=False):
+        return NotImplemented
+
+    def __getitem__(self, index):
+        return self.to_ndarray()[index]
+
+    def __neg__(self):
+        return -self.to_ndarray()
+
+    # Make NumPy leave `ndarray op value` to the reflected methods below.
+    __array_ufunc__ = None
+
+    def _dunder(self, op, symbol, other, reflected):
+        result = self.binary(op, other, reflected)
+        if result is NotImplemented:
+            a, b = (dense(other), self.to_ndarray()) if reflected else (self.to_ndarray(), dense(other))
+            return DENSE[symbol](a, b)
+        return result
+
+    def __add__(self, other):
+        return self._dunder('+', '+', other, False)
+
+    def __radd__(self, other):
+        return self._dunder('+', '+', other, True)
+
+    def __sub__(self, other):
+        return self._dunder('-', '-', other, False)
+
+    def __rsub__(self, other):
+        return self._dunder('-', '-', other, True)
+
+    # As on ndarrays, * on two matrices multiplies elementwise and @ is the product.
+    def __mul__(self, other):
+        return self._dunder('.*' if is_matrix(other) else '*', '*', other, False)
+
+    def __rmul__(self, other):
+        return self._dunder('.*' if is_matrix(other) else '*', '*', other, True)
+
+    def __truediv__(self, other):
+        return self._dunder('/', '/', other, False)
+
+    def __rtruediv__(self, other):
+        return self._dunder('/', '/', other, True)
+
+    def __matmul__(self, other):
+        return self._dunder('*' if is_matrix(other) else '@', '@', other, False)
+
+    def __rmatmul__(self, other):
+        return self._dunder('*' if is_matrix(other) else '@', '@', other, True)
+
+
+def is_matrix(value):
+    return isinstance(value, (np.ndarray, MatrixValue))
+
+
+def dense(value):
+    """value, as an ndarray if it is a matrix of some other form."""
+    return value.to_ndarray() if isinstance(value, MatrixValue) else value
+
+
+def scalar(value):
+    """value as a Python int or float if it is one (of any width), else None."""
+    if type(value) is int or type(value) is float:
+        return value
+    if type(value) is np.int64 or type(value) is np.float64:
+        return value.item()
+    return None
+
+
+def fits(data):
+    return INT_MIN <= min(data) and max(data) <= INT_MAX
+
+
+# NumPy divides integers as float64, which matches Python's exact int
+# division only while they convert to float exactly.
+EXACT = 1 << 53
+
+
+def exact(matrix):
+    return matrix.is_float or (-EXACT <= min(matrix.data) and max(matrix.data) <= EXACT)
+
+
+_kernels = {}
+
+
+def _compile(key, source):
+    kernel = _kernels[key] = eval(source)
+    return kernel
+
+
+def elementwise_kernel(op, size, form):
+    """Unrolled `a op b` over size elements; form is 'mm' for two
+    matrices, 'ms' for a matrix and a scalar, 'sm' for a scalar and a matrix."""
+    key = (op, size, form)
+    kernel = _kernels.get(key)
+    if kernel is None:
+        left = "a[{0}]" if form[0] == 'm' else "a"
+        right = "b[{0}]" if form[1] == 'm' else "b"
+        terms = ", ".join(f"{left} {op} {right}".format(i) for i in range(size))
+        kernel = _compile(key, f"lambda a, b: ({terms},)")
+    return kernel
+
+
+def matmul_kernel(rows, inner, cols, is_float):
+    """Unrolled product of a rows x inner and an inner x cols matrix,
+    summing each element's terms left to right. Float sums start from
+    0.0, as BLAS does, so that terms which are all -0.0 give 0.0."""
+    key = ('@', rows, inner, cols, is_float)
+    kernel = _kernels.get(key)
+    if kernel is None:
+        start = "0.0 + " if is_float else ""
+        terms = ", ".join(start + " + ".join(f"a[{i * inner + k}] * b[{k * cols + j}]" for k in range(inner))
+                          for i in range(rows) for j in range(cols))
+        kernel = _compile(key, f"lambda a, b: ({terms},)")
+    return kernel
+
+
+def transpose_kernel(rows, cols):
+    key = ("'", rows, cols)
+    kernel = _kernels.get(key)
+    if kernel is None:
+        terms = ", ".join(f"a[{i * cols + j}]" for j in range(cols) for i in range(rows))
+        kernel = _compile(key, f"lambda a: ({terms},)")
+    return kernel
+
+
+class SmallMatrix(MatrixValue):
+    """An int64 or float64 matrix of at most SMALL x SMALL elements, kept as
+    a flat tuple of Python numbers in row-major order.
+
+    Arithmetic runs through unrolled kernels generated once per shape,
+    which for matrices this size is several times faster than a NumPy
+    call. A SmallMatrix is immutable, so variables can share one freely.
+    Whatever the kernels cannot reproduce exactly as NumPy would (int64
+    overflow, division by zero, broadcasting) is left to NumPy.
+    """
+
+    __slots__ = ('rows', 'cols', 'data', 'is_float')
+
+    def __init__(self, rows, cols, data, is_float):
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+        self.is_float = is_float
+
+    @staticmethod
+    def fits_shape(rows, cols):
+        return 1 <= rows <= SMALL and 1 <= cols <= SMALL
+
+    @staticmethod
+    def from_rows(rows):
+        """The SmallMatrix with these rows of scalars, or None if they are
+        not a small rectangular matrix of ints and floats."""
+        if not rows or not SmallMatrix.fits_shape(len(rows), len(rows[0])):
+            return None
+        cols = len(rows[0])
+        data = []
+        for row in rows:
+            if len(row) != cols:
+                return None
+            for value in row:
+                value = scalar(value)
+                if value is None:
+                    return None
+                data.append(value)
+        is_float = any(type(v) is float for v in data)
+        if is_float:
+            data = [float(v) for v in data]
+        elif not fits(data):
+            return None
+        return SmallMatrix(len(rows), cols, tuple(data), is_float)
+
+    @staticmethod
+    def from_ndarray(array):
+        if array.ndim != 2 or not SmallMatrix.fits_shape(*array.shape):
+            return None
+        if array.dtype == np.int64 or array.dtype == np.float64:
+            return SmallMatrix(array.shape[0], array.shape[1], tuple(array.ravel().tolist()),
+                               array.dtype == np.float64)
+        return None
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64 if self.is_float else np.int64)
+
+    def to_ndarray(self):
+        return np.array(self.data, self.dtype).reshape(self.rows, self.cols)
+
+    def tolist(self):
+        cols = self.cols
+        return [list(self.data[i:i + cols]) for i in range(0, len(self.data), cols)]
+
+    def binary(self, op, other, reflected=False):
+        symbol = ELEMENTWISE.get(op)
+        if symbol is None:
+            return NotImplemented
+        if type(other) is SmallMatrix:
+            a, b = (other, self) if reflected else (self, other)
+            if op == '*':
+                if a.cols != b.rows:
+                    return NotImplemented
+                rows, cols = a.rows, b.cols
+                kernel = matmul_kernel(a.rows, a.cols, b.cols, a.is_float or b.is_float)
+            else:
+                if a.rows != b.rows or a.cols != b.cols:
+                    return NotImplemented
+                if symbol == '/' and (0 in b.data or not (exact(a) and exact(b))):
+                    return NotImplemented
+                rows, cols = a.rows, a.cols
+                key = (symbol, len(a.data), 'mm')
+                kernel = _kernels.get(key) or elementwise_kernel(*key)
+            data = kernel(a.data, b.data)
+            is_float = a.is_float or b.is_float or symbol == '/'
+        else:
+            value = scalar(other)
+            if value is None or op[0] == '.':
+                return NotImplemented
+            if symbol == '/' and ((0 in self.data if reflected else value == 0) or not exact(self)
+                                  or (type(value) is int and abs(value) > EXACT)):
+                return NotImplemented
+            rows, cols = self.rows, self.cols
+            kernel = elementwise_kernel(symbol, len(self.data), 'sm' if reflected else 'ms')
+            data = kernel(value, self.data) if reflected else kernel(self.data, value)
+            is_float = self.is_float or type(value) is float or symbol == '/'
+        if not is_float and not fits(data):
+            return NotImplemented
+        return SmallMatrix(rows, cols, data, is_float)
+
+    def transpose(self):
+        return SmallMatrix(self.cols, self.rows, transpose_kernel(self.rows, self.cols)(self.data), self.is_float)
+
+    def __neg__(self):
+        data = tuple(-v for v in self.data)
+        if not self.is_float and not fits(data):
+            return -self.to_ndarray()
+        return SmallMatrix(self.rows, self.cols, data, self.is_float)
+
+    def __getitem__(self, index):
+        if type(index) is tuple and len(index) == 2:
+            i, j = index
+            if type(i) is int and type(j) is int and 0 <= i < self.rows and 0 <= j < self.cols:
+                return self.data[i * self.cols + j]
+        return self.to_ndarray()[index]
+
+    def with_item(self, index, value):
+        """A copy with one element replaced, converted as NumPy would store
+        it, or None if the store needs NumPy."""
+        value = scalar(value)
+        if type(index) is not tuple or len(index) != 2 or value is None:
+            return None
+        i, j = index
+        if type(i) is not int or type(j) is not int or not (0 <= i < self.rows and 0 <= j < self.cols):
+            return None
+        if self.is_float:
+            value = float(value)
+        elif type(value) is float:
+            if value != value or value in (float('inf'), float('-inf')):
+                return None
+            value = int(value)
+        if not self.is_float and not INT_MIN <= value <= INT_MAX:
+            return None
+        position = i * self.cols + j
+        return SmallMatrix(self.rows, self.cols, self.data[:position] + (value,) + self.data[position + 1:],
+                           self.is_float)
+
+    def __repr__(self):
+        return f"SmallMatrix({self.tolist()})"
+
+
+def combine(symbol, x, y):
+    """x symbol y for two scalars as NumPy computes it on int64 and float64
+    elements, or None where that differs from Python or is not finite."""
+    if symbol == '/':
+        if y == 0 or (type(x) is int and abs(x) > EXACT) or (type(y) is int and abs(y) > EXACT):
+            return None
+        result = x / y
+    elif symbol == '+':
+        result = x + y
+    elif symbol == '-':
+        result = x - y
+    else:
+        result = x * y
+    if type(result) is int:
+        return result if INT_MIN <= result <= INT_MAX else None
+    return result if math.isfinite(result) else None
+
+
+def positive_zero(value):
+    return value == 0 and math.copysign(1, value) > 0
+
+
+def zero_filled(symbol, other, zero, at, values, reflected):
+    """zero symbol other (other symbol zero if reflected) with the elements
+    at the positions at redone from values."""
+    # Apply the operator to a zero of this type everywhere, so that
+    # signs of zeros, infinities and the result type come out as in
+    # the dense operation.
+    if reflected:
+        result = DENSE[symbol](other, zero)
+        result[at] = DENSE[symbol](other[at], values)
+    else:
+        result = DENSE[symbol](zero, other)
+        result[at] = DENSE[symbol](values, other[at])
+    return result
+
+
+def check_index(index, size, axis):
+    index = operator.index(index)
+    if not -size <= index < size:
+        raise IndexError(f"index {index} is out of bounds for axis {axis} with size {size}")
+    return index + size if index < 0 else index
+
+
+class StructuredMatrix(MatrixValue):
+    """A rows x cols matrix determined by one scalar, as zeros, ones and
+    eye create them, kept symbolically until an indexed store or print
+    needs the elements.
+
+    Subclasses work out operators whose result has a structure again (or
+    is cheap to build from the other operand) and leave the rest to
+    NumPy. Results are those NumPy computes on the dense matrices,
+    except that the sign of zero entries of matrix products may differ.
+    """
+
+    def __init__(self, rows, cols, value):
+        self.rows = rows
+        self.cols = cols
+        self.value = value
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64 if type(self.value) is float else np.int64)
+
+    @property
+    def zero(self):
+        return 0.0 if type(self.value) is float else 0
+
+    def typed(self, value):
+        """value as a 0-d array of this matrix's element type, which NumPy
+        promotes with a matrix operand exactly as it would this matrix."""
+        return np.asarray(value, self.dtype)
+
+    def scaled(self, value):
+        return type(self)(self.rows, self.cols, value)
+
+
+class ConstantMatrix(StructuredMatrix):
+    """A matrix whose elements all equal value: zeros(n, m) and ones(n, m)."""
+
+    def to_ndarray(self):
+        return np.full((self.rows, self.cols), self.value, self.dtype)
+
+    def transpose(self):
+        return ConstantMatrix(self.cols, self.rows, self.value)
+
+    def __getitem__(self, index):
+        if type(index) is tuple and len(index) == 2:
+            check_index(index[0], self.rows, 0)
+            check_index(index[1], self.cols, 1)
+            return self.value
+        if type(index) is not tuple:
+            check_index(index, self.rows, 0)
+            return np.full(self.cols, self.value, self.dtype)
+        return self.to_ndarray()[index]
+
+    def __neg__(self):
+        if type(self.value) is int and self.value == INT_MIN:
+            return -self.to_ndarray()
+        return ConstantMatrix(self.rows, self.cols, -self.value)
+
+    def binary(self, op, other, reflected=False):
+        symbol = ELEMENTWISE.get(op)
+        if symbol is None:
+            return NotImplemented
+        if isinstance(other, IdentityMatrix):
+            return other.binary(op, self, not reflected)
+
+        value = scalar(other)
+        if value is not None:
+            if op[0] == '.':
+                return NotImplemented
+            result = combine(symbol, value, self.value) if reflected else combine(symbol, self.value, value)
+            return NotImplemented if result is None else self.scaled(result)
+
+        if isinstance(other, ConstantMatrix):
+            a, b = (other, self) if reflected else (self, other)
+            if op == '*':
+                return self.matmul_constant(a, b)
+            if a.shape != b.shape:
+                return NotImplemented
+            result = combine(symbol, a.value, b.value)
+            return NotImplemented if result is None else a.scaled(result)
+
+        if not isinstance(other, np.ndarray) or other.ndim != 2:
+            return NotImplemented
+        if op == '*':
+            return self.matmul_array(other, reflected)
+        if other.shape != self.shape:
+            return NotImplemented
+        constant = self.typed(self.value)
+        return DENSE[symbol](other, constant) if reflected else DENSE[symbol](constant, other)
+
+    @staticmethod
+    def matmul_constant(a, b):
+        # Every element is a.cols equal products; only integer sums are exact.
+        if a.cols != b.rows or type(a.value) is not int or type(b.value) is not int:
+            return NotImplemented
+        result = combine('*', a.value * b.value, a.cols)
+        return NotImplemented if result is None else ConstantMatrix(a.rows, b.cols, result)
+
+    def matmul_array(self, other, reflected):
+        """self @ other (other @ self if reflected): zeros, or for integers
+        value times the column (row) sums of other in every row (column)."""
+        if reflected:
+            rows, cols, chained = other.shape[0], self.cols, other.shape[1] == self.rows
+        else:
+            rows, cols, chained = self.rows, other.shape[1], other.shape[0] == self.cols
+        if not chained:
+            return NotImplemented
+        if self.value == 0 and (other.dtype.kind in 'iub' or np.isfinite(other).all()):
+            return ConstantMatrix(rows, cols, np.result_type(self.dtype, other.dtype).type(0).item())
+        if type(self.value) is not int or other.dtype.kind != 'i':
+            return NotImplemented
+        # int64 sums wrap on overflow exactly as the product's would.
+        sums = other.sum(axis=1 if reflected else 0, dtype=np.int64) * np.int64(self.value)
+        if reflected:
+            return np.repeat(sums[:, None], cols, axis=1)
+        return np.repeat(sums[None, :], rows, axis=0)
+
+
+class IdentityMatrix(StructuredMatrix):
+    """value on the diagonal and zeros elsewhere: eye(n, m) and its multiples."""
+
+    def to_ndarray(self):
+        array = np.zeros((self.rows, self.cols), self.dtype)
+        np.fill_diagonal(array, self.value)
+        return array
+
+    def transpose(self):
+        return IdentityMatrix(self.cols, self.rows, self.value)
+
+    def __getitem__(self, index):
+        if type(index) is tuple and len(index) == 2:
+            i = check_index(index[0], self.rows, 0)
+            j = check_index(index[1], self.cols, 1)
+            return self.value if i == j else self.zero
+        if type(index) is not tuple:
+            i = check_index(index, self.rows, 0)
+            row = np.zeros(self.cols, self.dtype)
+            if i < self.cols:
+                row[i] = self.value
+            return row
+        return self.to_ndarray()[index]
+
+    def __neg__(self):
+        # -0 would appear off the diagonal of a float matrix.
+        if type(self.value) is float:
+            return -self.to_ndarray()
+        value = combine('-', 0, self.value)
+        return -self.to_ndarray() if value is None else IdentityMatrix(self.rows, self.cols, value)
+
+    def diagonal(self):
+        return np.arange(min(self.rows, self.cols))
+
+    def with_zeros(self, symbol, other_zero, value, reflected):
+        """self with value on the diagonal, if symbol applied to its zeros
+        and other_zero leaves them positive zeros."""
+        off = combine(symbol, other_zero, self.zero) if reflected else combine(symbol, self.zero, other_zero)
+        if value is None or off is None or not positive_zero(off):
+            return NotImplemented
+        if type(off) is float and type(value) is int:
+            value = float(value)
+        return IdentityMatrix(self.rows, self.cols, value)
+
+    def binary(self, op, other, reflected=False):
+        symbol = ELEMENTWISE.get(op)
+        if symbol is None:
+            return NotImplemented
+
+        value = scalar(other)
+        if value is not None:
+            if op[0] == '.' or symbol in '+-':
+                return NotImplemented
+            result = combine(symbol, value, self.value) if reflected else combine(symbol, self.value, value)
+            return self.with_zeros(symbol, value, result, reflected)
+
+        if isinstance(other, StructuredMatrix):
+            a, b = (other, self) if reflected else (self, other)
+            if op == '*':
+                # Only square identities keep their structure in a product.
+                if a.cols != b.rows or not (isinstance(a, IdentityMatrix) and a.rows == a.cols
+                                            or isinstance(b, IdentityMatrix) and b.rows == b.cols):
+                    return NotImplemented
+                result = combine('*', a.value, b.value)
+                if result is None:
+                    return NotImplemented
+                kept = b if isinstance(a, IdentityMatrix) and a.rows == a.cols else a
+                return kept.scaled(result)
+            if a.shape != b.shape or symbol == '/':
+                return NotImplemented
+            if isinstance(other, ConstantMatrix):
+                # Only multiplication keeps zeros off the diagonal.
+                if symbol != '*':
+                    return NotImplemented
+                return self.with_zeros('*', other.value, combine('*', self.value, other.value), reflected)
+            return self.with_zeros(symbol, other.zero, combine(symbol, a.value, b.value), reflected)
+
+        if not isinstance(other, np.ndarray) or other.ndim != 2:
+            return NotImplemented
+        if op == '*':
+            return self.matmul_array(other, reflected)
+        if other.shape != self.shape or symbol == '/':
+            return NotImplemented
+        d = self.diagonal()
+        return zero_filled(symbol, other, self.typed(self.zero), (d, d), self.typed(self.value), reflected)
+
+    def matmul_array(self, other, reflected):
+        """self @ other (other @ self if reflected): the leading rows
+        (columns) of other, times value."""
+        if other.dtype.kind not in 'iub' and not np.isfinite(other).all():
+            return NotImplemented
+        value = self.typed(self.value)
+        if reflected:
+            if other.shape[1] != self.rows:
+                return NotImplemented
+            result = np.zeros((other.shape[0], self.cols), np.result_type(other.dtype, self.dtype))
+            q = min(self.rows, self.cols)
+            result[:, :q] = other[:, :q] * value
+            return result
+        if other.shape[0] != self.cols:
+            return NotImplemented
+        result = np.zeros((self.rows, other.shape[1]), np.result_type(other.dtype, self.dtype))
+        q = min(self.rows, self.cols)
+        result[:q] = value * other[:q]
+        return result
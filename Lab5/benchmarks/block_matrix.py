@@ -0,0 +1,63 @@
+"""Products and sums of matrices of matrices: blocks as a 4-D array and
+as one contiguous buffer.
+
+A p x p grid of b x b float blocks, as `[A, B; C, D]` builds it. The 4-D
+array needs a product per pair of blocks, one at a time or batched by
+einsum; the BlockMatrix multiplies its buffers in a single BLAS call.
+
+    python benchmarks/block_matrix.py [p] [b]
+"""
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import numpy as np
+
+from Block import BlockMatrix
+
+
+def best(f, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def block_products(nested):
+    """The block product of a 4-D array of blocks, one block at a time."""
+    p = nested.shape[0]
+    result = np.zeros_like(nested)
+    for i in range(p):
+        for j in range(p):
+            for k in range(p):
+                result[i, j] += nested[i, k] @ nested[k, j]
+    return result
+
+
+def main():
+    p = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    b = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = np.random.default_rng(0)
+    blocks = [[rng.random((b, b)) for _ in range(p)] for _ in range(p)]
+    nested = np.array(blocks)
+    flat = BlockMatrix.from_blocks(blocks)
+    product = flat.binary('*', flat)
+    assert np.allclose(block_products(nested), np.array(product.tolist()))
+
+    print(f"{p}x{p} grid of {b}x{b} blocks")
+    timings = {
+        "product, per block": (best(lambda: block_products(nested)), best(lambda: flat.binary('*', flat))),
+        "product, einsum": (best(lambda: np.einsum('ikab,kjbc->ijac', nested, nested, optimize=True)),
+                            best(lambda: flat.binary('*', flat))),
+        "A + A": (best(lambda: nested + nested), best(lambda: flat.binary('+', flat))),
+    }
+    for label, (nested_ms, flat_ms) in timings.items():
+        print(f"{label:<20} 4-D {nested_ms:8.1f} ms   buffer {flat_ms:8.1f} ms   speedup {nested_ms / flat_ms:5.1f}x")
+
+if __name__ == '__main__':
+    main()
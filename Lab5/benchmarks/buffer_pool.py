@@ -0,0 +1,62 @@
+"""Loop bodies recomputing same-shaped matrices, with and without the
+buffer pool.
+
+Runs the -O2 pipeline over a loop of matrix products and elementwise
+updates on n x n float matrices, once with a pool that keeps nothing
+and once with the default pool, and reports time and how many result
+buffers had to be allocated.
+
+    python benchmarks/buffer_pool.py [n] [iterations]
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+from Optimizer import optimizer
+
+PROGRAM = """
+A = ones({n}, {n}) ./ ones({n}, {n});
+B = eye({n}) ./ ones({n}, {n});
+E = ones({n}, {n}) + eye({n});
+F = E;
+for i = 1:{iterations} {{
+    C = A * B;
+    D = C .+ E;
+    F = D .* C .- E;
+}}
+print F[0, 0];
+"""
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    text = PROGRAM.format(n=n, iterations=iterations)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+    ast = optimizer(2, verify=False).run(ast)
+
+    print(f"{iterations} iterations of 3 statements on {n}x{n} float matrices")
+    for label, pooled in (("no pool", False), ("pool", True)):
+        interpreter = Interpreter()
+        if not pooled:
+            interpreter.pool.limit = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast.accept(interpreter)
+        elapsed = time.perf_counter() - start
+        stats = interpreter.pool.stats
+        print(f"{label:<8} {elapsed * 1000:9.1f} ms   allocated {stats['allocated']:5d}   "
+              f"reused {stats['reused']:5d}   reuse rate {interpreter.pool.reuse_rate():4.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Time and peak memory of an elementwise chain, fused and unfused.
+
+The operands are float n x n matrices (and a 1 x n row R that is
+broadcast) created before measuring, so the peak covers only the result
+and the temporaries of the statement.
+
+    python benchmarks/elementwise.py [n] [repeat]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+
+STATEMENTS = [
+    "D = A .+ B .* C ./ E;",
+    "D = -(A .- B) .* (C .+ E) ./ (A .+ R);",
+]
+
+
+def measure(program, operands, fuse, repeat):
+    best, peak = float("inf"), 0
+    for _ in range(repeat):
+        interpreter = Interpreter()
+        interpreter.fuse_elementwise = fuse
+        for name, value in operands.items():
+            interpreter.memory_stack.insert(name, value)
+        tracemalloc.start()
+        start = time.perf_counter()
+        program.accept(interpreter)
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rng = np.random.default_rng(0)
+    operands = {name: rng.random((n, n)) + 1 for name in "ABCE"}
+    operands["R"] = rng.random((1, n)) + 1
+    print(f"{n}x{n} float64 operands ({n * n * 8 / 2**20:.0f} MiB each), best of {repeat}")
+    for text in STATEMENTS:
+        program = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+        print(text)
+        for label, fuse in (("unfused", False), ("fused", True)):
+            seconds, peak = measure(program, operands, fuse, repeat)
+            print(f"  {label:<8} {seconds * 1000:9.1f} ms   peak {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
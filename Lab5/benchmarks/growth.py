@@ -0,0 +1,58 @@
+"""Growing a row vector with `v = [v, i]` in a loop.
+
+Runs the loop for n appends, once with growth buffers disabled (every
+append copies the whole vector, O(n^2) in total) and once enabled
+(appends write into spare room, amortized O(1) each). The copying run is
+skipped above 10^5 appends, where it takes minutes.
+
+    python benchmarks/growth.py [largest n]
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+
+PROGRAM = """
+v = [0];
+for i = 1:{n} {{
+    v = [v, i];
+}}
+print v[0, {n}];
+"""
+
+# Largest number of appends the copying run is timed for.
+MAX_COPYING = 10 ** 5
+
+
+def run(ast, grow):
+    interpreter = Interpreter()
+    interpreter.grow_appends = grow
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast.accept(interpreter)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    n = 1000
+    print(f"{'appends':>10} {'copying':>12} {'growth buffer':>15} {'per append':>12}")
+    while n <= largest:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(PROGRAM.format(n=n)))
+        copying = f"{run(ast, False):9.1f} ms" if n <= MAX_COPYING else "-"
+        growing = run(ast, True)
+        print(f"{n:>10} {copying:>12} {growing:12.1f} ms {growing * 1000 / n:9.2f} us")
+        n *= 10
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Matrix updates in a loop with and without in-place evaluation.
+
+Runs a loop of `A op= B` / `A = A op B` updates on n x n float matrices
+after the -O2 pipeline, once with in-place updates disabled and once
+enabled, and reports time, peak memory and how many updates allocated a
+new matrix.
+
+    python benchmarks/in_place.py [n] [iterations]
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+from Optimizer import optimizer
+
+PROGRAM = """
+A = ones({n}, {n}) ./ ones({n}, {n});
+B = eye({n}) ./ ones({n}, {n});
+C = ones({n}, {n}) + eye({n});
+for i = 1:{iterations} {{
+    A += B;
+    A = A .* C;
+    A -= B;
+    A = A ./ C;
+    A *= 0.5;
+}}
+"""
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    text = PROGRAM.format(n=n, iterations=iterations)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+    ast = optimizer(2, verify=False).run(ast)
+
+    print(f"{iterations} iterations of 5 updates on {n}x{n} float matrices")
+    for label, enabled in (("new matrix", False), ("in place", True)):
+        interpreter = Interpreter()
+        interpreter.update_in_place = enabled
+        tracemalloc.start()
+        start = time.perf_counter()
+        ast.accept(interpreter)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<12} {elapsed * 1000:9.1f} ms   peak {peak / 2**20:7.1f} MiB   "
+              f"allocating updates {interpreter.stats['copied']:5d}   in place {interpreter.stats['in-place']:5d}")
+
+
+if __name__ == '__main__':
+    main()
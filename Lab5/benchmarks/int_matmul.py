@@ -0,0 +1,47 @@
+"""Integer matrix products: native int64 loop, float64 BLAS, and the
+interpreter's routed path.
+
+zeros/ones/eye and integer literals give int64 matrices, whose product
+NumPy computes without BLAS. Times n x n products with small entries
+(exact in one float64 product) and with large entries (split into two
+exact blocks).
+
+    python benchmarks/int_matmul.py [n]
+"""
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import numpy as np
+
+from IntMatMul import int_matmul
+
+
+def best(f, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = np.random.default_rng(0)
+    print(f"{n}x{n} int64 products")
+    for label, bound in (("entries < 10", 10), ("entries < 2**22", 1 << 22)):
+        a = rng.integers(-bound + 1, bound, (n, n))
+        b = rng.integers(-bound + 1, bound, (n, n))
+        assert np.array_equal(int_matmul(a, b), a @ b)
+        af, bf = a.astype(np.float64), b.astype(np.float64)
+        native, routed, floats = best(lambda: a @ b), best(lambda: int_matmul(a, b)), best(lambda: af @ bf)
+        print(f"{label:<16} native {native:8.1f} ms   routed {routed:7.1f} ms   float64 {floats:7.1f} ms   "
+              f"speedup {native / routed:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
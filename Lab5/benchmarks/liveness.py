@@ -0,0 +1,67 @@
+"""Peak memory of a pipeline of large temporaries with and without the
+liveness pass.
+
+Each variant runs the -O2 pipeline (minus liveness for the baseline) in
+a fresh child process and reports the peak resident set size the child
+reached, so the numbers include the interpreter itself.
+
+    python benchmarks/liveness.py [n] [stages]
+"""
+import io
+import os
+import sys
+import time
+import resource
+import contextlib
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+from Liveness import Liveness
+from Optimizer import PIPELINES
+from PassManager import PassManager
+
+
+def program(n, stages):
+    lines = [f"T0 = ones({n}, {n}) ./ ones({n}, {n});"]
+    for i in range(1, stages + 1):
+        lines.append(f"T{i} = T{i - 1} .* T{i - 1} .+ T{i - 1};")
+    lines.append(f"print T{stages}[0, 0];")
+    return "\n".join(lines)
+
+
+def run(n, stages, liveness):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(program(n, stages)))
+    passes = [p() for p in PIPELINES[2] if liveness or p is not Liveness]
+    ast = PassManager(passes, verify=False).run(ast)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast.accept(Interpreter())
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed * 1000:.1f} {peak:.1f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run(int(sys.argv[2]), int(sys.argv[3]), sys.argv[4] == "1")
+        return
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    stages = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    print(f"{stages} stages of temporaries on {n}x{n} float matrices")
+    for label, liveness in (("kept", False), ("released", True)):
+        output = subprocess.run([sys.executable, __file__, "--child", str(n), str(stages), str(int(liveness))],
+                                capture_output=True, text=True, check=True).stdout
+        elapsed, peak = output.split()
+        print(f"{label:<10} {float(elapsed):9.1f} ms   peak RSS {float(peak):7.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
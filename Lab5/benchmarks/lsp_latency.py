@@ -0,0 +1,84 @@
+"""Replay a recorded editing session against the language server.
+
+Compares per-edit latency of the incremental Document against re-running
+the scanner, parser and type checker over the whole file, which is what
+main.py does today.
+
+    python benchmarks/lsp_latency.py [lines]
+"""
+import os
+import sys
+import glob
+import json
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from TypeChecker import TypeChecker
+from LanguageServer import Document
+
+
+def corpus(lines):
+    sources = [open(f).read() for f in sorted(glob.glob(os.path.join(HERE, "..", "tests", "*.m")))]
+    chunk = "\n".join(src.rstrip("\n") for src in sources) + "\n"
+    text = ""
+    while text.count("\n") < lines:
+        text += chunk
+    return text
+
+
+def full_run(text):
+    ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+    checker = TypeChecker(quiet=True)
+    for statement in ast.statements:
+        try:
+            checker.visit(statement)
+        except Exception:
+            pass
+    return checker.diagnostics
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with open(os.path.join(HERE, "data", "edit_session.json")) as f:
+        session = json.load(f)
+
+    text = corpus(lines)
+    document = Document("file:///bench.m", text)
+    start = time.perf_counter()
+    document.diagnostics()
+    print(f"document: {text.count(chr(10))} lines, {len(document.segments)} segments")
+    print(f"initial analysis: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    analysis, total = [], []
+    for change in session:
+        start = time.perf_counter()
+        document.apply_change(change)
+        document.analyze()
+        checked = time.perf_counter()
+        diagnostics = document.diagnostics()
+        done = time.perf_counter()
+        analysis.append((checked - start) * 1000)
+        total.append((done - start) * 1000)
+
+    start = time.perf_counter()
+    full_run(document.text)
+    full = (time.perf_counter() - start) * 1000
+
+    print(f"edits replayed: {len(total)}, {len(diagnostics)} diagnostics published per edit")
+    for label, values in (("re-lex/parse/check", analysis), ("with publish", total)):
+        print(f"{label}: p50 {percentile(values, 50):.3f} ms, "
+              f"p95 {percentile(values, 95):.3f} ms, max {max(values):.3f} ms")
+    print(f"full re-run: {full:.1f} ms per edit")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Zeroing the elements of an n x n matrix above a threshold.
+
+Runs once as the nested loop our scripts used, testing and storing one
+element per iteration, and once as the single masked assignment
+`A[A > t] = 0`, which compares and stores all n^2 elements in NumPy. The
+loop is skipped above n = 500, where it takes minutes.
+
+    python benchmarks/masks.py [largest n]
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+
+SETUP = """
+A = ones({n}, {n});
+A[0, 0] = 0;
+A = A * 0.5;
+A[0:{last}:2, :] = 2;
+"""
+
+LOOP = SETUP + """
+for i = 0:{last} {{
+    for j = 0:{last} {{
+        if (A[i, j] > 1) {{
+            A[i, j] = 0;
+        }}
+    }}
+}}
+print count(A);
+"""
+
+MASK = SETUP + """
+A[A > 1] = 0;
+print count(A);
+"""
+
+# Largest n the loop is timed for.
+MAX_LOOP = 500
+
+
+def run(program, n):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(program.format(n=n, last=n - 1)))
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        ast.accept(Interpreter())
+    return (time.perf_counter() - start) * 1000, output.getvalue()
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    n = 125
+    print(f"{'n':>6} {'nested loop':>14} {'mask':>12}")
+    while n <= largest:
+        masked, counted = run(MASK, n)
+        if n <= MAX_LOOP:
+            looped, expected = run(LOOP, n)
+            assert counted == expected, (counted, expected)
+            loop = f"{looped:11.1f} ms"
+        else:
+            loop = "-"
+        print(f"{n:>6} {loop:>14} {masked:9.1f} ms")
+        n *= 2
+
+
+if __name__ == '__main__':
+    main()
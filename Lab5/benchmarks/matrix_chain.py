@@ -0,0 +1,67 @@
+"""Time a tall-skinny by wide matrix chain at -O0 and -O3.
+
+The chain T * W * T * W (T is n x k, W is k x n) costs about 3 n^2 k
+multiplications as written, but only about n^2 k when reassociated. The
+script runs it once with shapes the TypeChecker knows and once with shapes
+only known at run time, and reports the best of several runs.
+
+    python benchmarks/matrix_chain.py [n] [k] [repeat]
+"""
+import io
+import os
+import sys
+import copy
+import time
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+from Optimizer import optimizer
+
+STATIC = """
+T = ones({n}, {k});
+W = ones({k}, {n});
+P = T * W * T * W;
+"""
+
+# Assigned in a branch, so the TypeChecker does not know the shapes afterwards.
+RUNTIME = """
+m = {n};
+if (m > 0) {{
+    T = ones({n}, {k});
+    W = ones({k}, {n});
+}}
+P = T * W * T * W;
+"""
+
+
+def timed(text, level, repeat):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+    ast = optimizer(level, verify=False).run(ast)
+    best = float("inf")
+    for _ in range(repeat):
+        program = copy.deepcopy(ast)
+        start = time.perf_counter()
+        program.accept(Interpreter())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    print(f"chain T * W * T * W, T: {n}x{k}, W: {k}x{n}, best of {repeat}")
+    for label, template in (("static shapes", STATIC), ("runtime shapes", RUNTIME)):
+        text = template.format(n=n, k=k)
+        before, after = timed(text, 0, repeat), timed(text, 3, repeat)
+        print(f"{label:<16} -O0 {before * 1000:9.1f} ms   -O3 {after * 1000:9.1f} ms   {before / after:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Time the test corpus under each optimization level.
+
+For every script the program is parsed once, optimized at -O0..-O3 and
+interpreted with its output discarded. Reports the best of several runs
+and the counters of all passes.
+
+    python benchmarks/optimizer.py [script.m ...]
+"""
+import io
+import os
+import sys
+import copy
+import glob
+import time
+import contextlib
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+from Optimizer import optimizer
+
+LEVELS = (0, 1, 2, 3)
+REPEAT = 3
+
+
+def run(ast):
+    best = float("inf")
+    for _ in range(REPEAT):
+        program = copy.deepcopy(ast)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            try:
+                program.accept(Interpreter())
+            except Exception:
+                pass
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    files = sys.argv[1:] or sorted(glob.glob(os.path.join(HERE, "..", "tests", "*.m")))
+    header = "".join(f"{'-O' + str(level) + ' [ms]':>12}" for level in LEVELS)
+    print(f"{'script':<32}{header}  changes at -O{LEVELS[-1]}")
+    for filename in files:
+        with open(filename) as f:
+            text = f.read()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+        if ast is None:
+            continue
+
+        times = []
+        counters = Counter()
+        for level in LEVELS:
+            manager = optimizer(level, verify=False)
+            optimized = manager.run(copy.deepcopy(ast))
+            counters = Counter()
+            for stats in manager.stats:
+                counters.update(stats.counters)
+            times.append(run(optimized))
+
+        cells = "".join(f"{t * 1000:>12.2f}" for t in times)
+        changes = ", ".join(f"{k}={v}" for k, v in sorted(counters.items()) if v)
+        print(f"{os.path.basename(filename):<32}{cells}  {changes}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Memory taken by `for i = 1:n { t = t + 1; }`.
+
+Reports the peak traced allocation of running the loop, which with lazy
+ranges stays the same as n grows, next to the size of the list of n
+ints the loop used to build before its first iteration.
+
+    python benchmarks/ranges.py [largest n]
+"""
+import io
+import os
+import sys
+import time
+import tracemalloc
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+
+PROGRAM = """
+t = 0;
+for i = 1:{n} {{
+    t = t + 1;
+}}
+print t;
+"""
+
+
+def peak(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    build()
+    elapsed = (time.perf_counter() - start) * 1000
+    result = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result / 2 ** 20, elapsed
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    n = 1000
+    print(f"{'n':>10} {'list of range':>15} {'loop peak':>12} {'loop time':>12}")
+    while n <= largest:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(PROGRAM.format(n=n)))
+        listed, _ = peak(lambda: list(range(1, n + 1)))
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                ast.accept(Interpreter())
+        loop, elapsed = peak(run)
+        print(f"{n:>10} {listed:11.2f} MiB {loop:8.2f} MiB {elapsed:9.0f} ms")
+        n *= 10
+
+
+if __name__ == '__main__':
+    main()
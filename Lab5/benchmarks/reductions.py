@@ -0,0 +1,82 @@
+"""Summing the n x n elements of a matrix.
+
+Runs once as the nested loop our scripts used, adding one element per
+iteration, and once as the builtin `sum(A)`, a single NumPy reduction;
+`sum(A, 0)` and `max(A, 1)` reduce along an axis. The loop is skipped
+above 10^5 elements, where it takes minutes. Times include filling the
+matrix, a few milliseconds at 10^7 elements.
+
+    python benchmarks/reductions.py [largest number of elements]
+"""
+import io
+import math
+import os
+import sys
+import time
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+
+SETUP = """
+A = ones({n}, {n});
+A[0, 0] = 0;
+A = A * 2;
+"""
+
+LOOP = SETUP + """
+s = 0;
+for i = 0:{last} {{
+    for j = 0:{last} {{
+        s += A[i, j];
+    }}
+}}
+print s;
+"""
+
+BUILTIN = SETUP + """
+print sum(A);
+"""
+
+AXES = SETUP + """
+c = sum(A, 0);
+r = max(A, 1);
+"""
+
+# Largest number of elements the loop is timed for.
+MAX_LOOP = 10 ** 5
+
+
+def run(program, n):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(program.format(n=n, last=n - 1)))
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        ast.accept(Interpreter())
+    return (time.perf_counter() - start) * 1000, output.getvalue()
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 7
+    elements = 10 ** 4
+    print(f"{'elements':>10} {'nested loop':>14} {'sum':>10} {'by axis':>10}")
+    while elements <= largest:
+        n = math.isqrt(elements)
+        summed, total = run(BUILTIN, n)
+        if elements <= MAX_LOOP:
+            looped, expected = run(LOOP, n)
+            assert float(total) == float(expected), (total, expected)
+            loop = f"{looped:11.1f} ms"
+        else:
+            loop = "-"
+        axes, _ = run(AXES, n)
+        print(f"{n * n:>10} {loop:>14} {summed:7.1f} ms {axes:7.1f} ms")
+        elements *= 10
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Building a report string with `s = s + line` in a loop.
+
+Appends a 100-character line n times, once with ropes disabled (every
+`+` copies the whole string, O(n^2) characters in total) and once
+enabled (each `+` appends a piece, and the characters are joined once
+when the report is printed). The copying run is skipped above 10^5
+lines, which is a 10 MB report.
+
+    python benchmarks/rope.py [largest n]
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+
+PROGRAM = """
+s = "";
+for i = 1:{n} {{
+    s = s + "{line}";
+}}
+print s;
+"""
+
+LINE = "0123456789" * 10
+
+# Largest number of lines the copying run is timed for.
+MAX_COPYING = 10 ** 5
+
+
+def run(ast, ropes):
+    interpreter = Interpreter()
+    interpreter.ropes = ropes
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast.accept(interpreter)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    n = 1000
+    print(f"{'lines':>10} {'size':>8} {'copying':>12} {'rope':>12}")
+    while n <= largest:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(PROGRAM.format(n=n, line=LINE)))
+        copying = f"{run(ast, False):9.1f} ms" if n <= MAX_COPYING else "-"
+        rope = run(ast, True)
+        print(f"{n:>10} {n * len(LINE) / 1e6:6.1f}MB {copying:>12} {rope:9.1f} ms")
+        n *= 10
+
+
+if __name__ == '__main__':
+    main()
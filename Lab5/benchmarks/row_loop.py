@@ -0,0 +1,63 @@
+"""Summing the rows of a matrix: an index loop against `for row = A`.
+
+The index loop evaluates a range element and an index per iteration;
+iterating the matrix hands the loop variable each row as a view.
+
+    python benchmarks/row_loop.py [rows] [cols]
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+
+# The store makes A a plain ndarray rather than a structured matrix.
+SETUP = """
+A = ones({rows}, {cols});
+A[0, 0] = 2;
+s = zeros(1, {cols});
+"""
+
+PROGRAMS = {
+    "A[i, :] in an index loop": """
+for i = 0:{last} {{
+    s = s + A[i, :];
+}}
+print s[0, 0];
+""",
+    "for row = A": """
+for row = A {{
+    s = s + row;
+}}
+print s[0, 0];
+""",
+}
+
+
+def run(text):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+        start = time.perf_counter()
+        ast.accept(Interpreter())
+    return (time.perf_counter() - start) * 1000, out.getvalue().split()[-1]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    print(f"summing the rows of a {rows}x{cols} matrix")
+    for label, program in PROGRAMS.items():
+        elapsed, total = run((SETUP + program).format(rows=rows, cols=cols, last=rows - 1))
+        print(f"{label:>26} {elapsed:10.1f} ms   (s[0, 0] = {total})")
+
+
+if __name__ == '__main__':
+    main()
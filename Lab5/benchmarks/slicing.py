@@ -0,0 +1,69 @@
+"""Copying rows of a matrix: element by element against slices.
+
+Runs the script below for an n x n matrix A, copying every row of A
+into B either with an inner loop over the columns (what scripts had to
+do while indices were integer literals) or with one slice store. A
+third run only reads each row, which is a view and copies nothing.
+
+    python benchmarks/slicing.py [n]
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+
+# The stores make A and B plain ndarrays rather than structured matrices.
+SETUP = """
+A = ones({n}, {n});
+A[0, 0] = 2;
+B = zeros({n}, {n});
+B[0, 0] = 1;
+"""
+
+PROGRAMS = {
+    "element by element": """
+for i = 0:{last} {{
+    for j = 0:{last} {{
+        B[i, j] = A[i, j];
+    }}
+}}
+""",
+    "slice store": """
+for i = 0:{last} {{
+    B[i, :] = A[i, :];
+}}
+""",
+    "row views": """
+for i = 0:{last} {{
+    r = A[i, :];
+}}
+""",
+}
+
+
+def run(text):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+        start = time.perf_counter()
+        ast.accept(Interpreter())
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"copying the rows of a {n}x{n} matrix")
+    for label, program in PROGRAMS.items():
+        elapsed = run((SETUP + program).format(n=n, last=n - 1))
+        print(f"{label:>20} {elapsed:10.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Interpreter operators on 2x2 to 4x4 matrices, as ndarrays and as
+SmallMatrix values.
+
+Times each binary operator through Interpreter._binary on float
+operands of each size, then a geometry-style script (rotating a point
+many times) with the SmallMatrix path disabled and enabled.
+
+    python benchmarks/small_matrix.py [iterations]
+"""
+import io
+import os
+import sys
+import time
+import timeit
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import numpy as np
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+from Values import SmallMatrix
+
+OPERATORS = ['+', '.*', '*', "'"]
+
+PROGRAM = """
+R = [0.8, -0.6; 0.6, 0.8];
+P = [1.0; 0.0];
+T = [0.5; 0.25];
+for i = 1:{iterations} {{
+    P = R * P + T;
+    P = P .* [0.5; 0.5];
+}}
+print P;
+"""
+
+
+def per_call(f, number=20000):
+    return min(timeit.repeat(f, number=number, repeat=7)) / number * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    interpreter = Interpreter()
+    rng = np.random.default_rng(0)
+    print("operator   size     ndarray [us]   SmallMatrix [us]   speedup")
+    for n in (2, 3, 4):
+        a, b = rng.standard_normal((n, n)), rng.standard_normal((n, n))
+        sa, sb = SmallMatrix.from_ndarray(a), SmallMatrix.from_ndarray(b)
+        for op in OPERATORS:
+            if op == "'":
+                dense, small = per_call(lambda: a.T), per_call(lambda: sa.transpose())
+            else:
+                dense = per_call(lambda: interpreter._binary(op, a, b))
+                small = per_call(lambda: interpreter._binary(op, sa, sb))
+            print(f"{op:<10} {n}x{n}   {dense:12.2f}   {small:16.2f}   {dense / small:7.1f}x")
+
+    text = PROGRAM.format(iterations=iterations)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+    print(f"\n{iterations} iterations of a 2x2 rotation and elementwise scaling")
+    for label, enabled in (("ndarray", False), ("SmallMatrix", True)):
+        interpreter = Interpreter()
+        interpreter.small_matrices = enabled
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast.accept(interpreter)
+        print(f"{label:<12} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
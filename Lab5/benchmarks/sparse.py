@@ -0,0 +1,65 @@
+"""A banded matrix built with zeros and element stores, kept dense and
+kept sparse.
+
+Runs a script that stores a tridiagonal n x n matrix into zeros(n, n)
+and multiplies it with itself and with a dense matrix, after the -O2
+passes, once with sparse matrices disabled and once enabled, and reports
+time and peak traced memory.
+
+    python benchmarks/sparse.py [n]
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+from Optimizer import optimizer
+
+
+def program(n):
+    lines = [f"A = zeros({n}, {n});"]
+    for i in range(n):
+        lines.append(f"A[{i}, {i}] = 2;")
+        if i > 0:
+            lines.append(f"A[{i}, {i - 1}] = -1;")
+            lines.append(f"A[{i - 1}, {i}] = -1;")
+    lines += [
+        f"D = ones({n}, {n}) + eye({n});",
+        "P = A * A;",
+        "Q = P * D;",
+        "R = A' .* P + A;",
+        "print P[0, 0], Q[0, 0], R[1, 1];",
+    ]
+    return "\n".join(lines)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(program(n)))
+        ast = optimizer(2, verify=False).run(ast)
+
+    print(f"{n}x{n} tridiagonal matrix")
+    for label, sparse in (("dense", False), ("sparse", True)):
+        interpreter = Interpreter()
+        interpreter.sparse_matrices = sparse
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast.accept(interpreter)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<12} {elapsed * 1000:9.1f} ms   peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Initialization-heavy code with zeros, ones and eye materialized and
+kept symbolic.
+
+Runs a script that builds n x n identity and constant matrices and
+combines them with a dense matrix, once with structured matrices
+disabled and once enabled, and reports time and peak traced memory.
+
+    python benchmarks/structured.py [n]
+"""
+import io
+import os
+import sys
+import time
+import contextlib
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+
+PROGRAM = """
+A = ones({n}, {n}) ./ ones({n}, {n});
+I = eye({n});
+B = A * I;
+C = I * B + zeros({n}, {n});
+D = C .* eye({n}) + ones({n}, {n}) * 2;
+print D[0, 0];
+"""
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(PROGRAM.format(n=n)))
+
+    print(f"{n}x{n} matrices built with zeros, ones and eye")
+    for label, structured in (("dense", False), ("structured", True)):
+        interpreter = Interpreter()
+        interpreter.structured_matrices = structured
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ast.accept(interpreter)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<12} {elapsed * 1000:9.1f} ms   peak {peak / 2**20:7.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
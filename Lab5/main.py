@@ -1,14 +1,31 @@
 import sys
+import argparse
 from scanner import Scanner
 from parser import Mparser
 from TreePrinter import TreePrinter
 from TypeChecker import TypeChecker
 from Interpreter import Interpreter
+from Optimizer import optimizer
+
+
+def parse_args():
+    args = argparse.ArgumentParser(description="Run a matrix language script.")
+    args.add_argument("filename", nargs="?", default="./tests/fibonacci.m")
+    args.add_argument("-O", dest="level", type=int, choices=range(4), default=0,
+                      help="optimization level, -O0 (default) to -O3")
+    args.add_argument("--pass-stats", action="store_true",
+                      help="report time and node-count changes of every optimization pass")
+    args.add_argument("--no-verify", action="store_true",
+                      help="do not re-run the type checker after each optimization pass")
+    args.add_argument("--pool-stats", action="store_true",
+                      help="report how often matrix buffers were reused from the buffer pool")
+    return args.parse_args()
 
 
 def main():
+    args = parse_args()
+    filename = args.filename
     try:
-        filename = sys.argv[1] if len(sys.argv) > 1 else "./tests/fibonacci.m"
         with open(filename, "r") as file:
             text = file.read()
     except IOError:
@@ -36,6 +53,13 @@ def main():
     except Exception as e:
         print(f"Type checking error: {e}")
 
+    if args.level > 0:
+        manager = optimizer(args.level, verify=not args.no_verify)
+        ast = manager.run(ast)
+        if args.pass_stats:
+            manager.report()
+            print()
+
     try:
         interpreter = Interpreter()
         ast.accept(interpreter)
@@ -45,8 +69,12 @@ def main():
         else:
             print(f"\nInternal error: {e}")
 
+    if args.pool_stats:
+        print()
+        interpreter.pool.report()
+
     print("\nDone")
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -4,6 +4,7 @@ from sly import Parser
 from scanner import Scanner
 import AST
 from TreePrinter import TreePrinter
+from Diagnostics import Diagnostic
 
 class Mparser(Parser):
     had_error = False
@@ -11,6 +12,10 @@ class Mparser(Parser):
     start = 'program'
     # debugfile = 'debug/parser.out'
 
+    def __init__(self, quiet=False):
+        self.quiet = quiet
+        self.diagnostics = []
+
     precedence = (
         ('nonassoc', 'IFX'),
         ('nonassoc', 'ELSE'),
@@ -21,6 +26,7 @@ class Mparser(Parser):
         ('right', 'UMINUS'),
         ('right', '\''),
         ('left', '['),
+        ('left', '('),
     )
 
     @_('statements')
@@ -61,6 +67,11 @@ class Mparser(Parser):
         var = AST.Variable(p.ID, p.lineno)
         return AST.For(var, p.range_expr, p.statement, p.lineno)
 
+    @_('FOR ID "=" expr statement')
+    def statement(self, p):
+        var = AST.Variable(p.ID, p.lineno)
+        return AST.For(var, p.expr, p.statement, p.lineno)
+
     @_('"{" statements "}"')
     def statement(self, p): return AST.Block(p.statements)
 
@@ -79,14 +90,20 @@ class Mparser(Parser):
     @_('lvalue MULASSIGN expr')
     @_('lvalue DIVASSIGN expr')
     def assignment(self, p): return AST.Assign(p.lvalue, p[1], p.expr, p.lineno)
+
+    @_('lvalue "=" range_expr')
+    def assignment(self, p): return AST.Assign(p.lvalue, p[1], p.range_expr, p.lineno)
     
+    @_('expr')
+    def condition(self, p): return p.expr
+
     @_('expr EQ expr')
     @_('expr NE expr')
     @_('expr LT expr')
     @_('expr LE expr')
     @_('expr GT expr')
     @_('expr GE expr')
-    def condition(self, p): return AST.OpExpr(p[1], p.expr0, p.expr1, p.lineno)
+    def expr(self, p): return AST.OpExpr(p[1], p.expr0, p.expr1, p.lineno)
 
     @_('expr PLUS expr')
     @_('expr MINUS expr')
@@ -107,10 +124,13 @@ class Mparser(Parser):
     @_('ID %prec "["') 
     def expr(self, p): return AST.Variable(p.ID, p.lineno)
 
-    @_('ID "[" idx_list "]"')
+    @_('ID "(" elements ")"')
+    def expr(self, p): return AST.Apply(p.ID, p.elements, p.lineno)
+
+    @_('ID "[" index_list "]"')
     def _index(self, p):     
         var = AST.Variable(p.ID, p.lineno)
-        return AST.MatrixIndex(var, p.idx_list, p.lineno)
+        return AST.MatrixIndex(var, p.index_list, p.lineno)
 
     @_('_index')
     def expr(self, p): return p._index
@@ -130,6 +150,9 @@ class Mparser(Parser):
     @_('"(" expr ")"')
     def expr(self, p): return p.expr
 
+    @_('"(" range_expr ")"')
+    def expr(self, p): return p.range_expr
+
     @_('INTNUM')
     def expr(self, p): return AST.Literal.int(int(p.INTNUM), p.lineno)
 
@@ -145,6 +168,21 @@ class Mparser(Parser):
     @_('idx_list "," INTNUM')
     def idx_list(self, p): return p.idx_list + [AST.Literal.int(int(p.INTNUM), p.lineno)]
 
+    @_('subscript')
+    def index_list(self, p): return [p.subscript]
+
+    @_('index_list "," subscript')
+    def index_list(self, p): return p.index_list + [p.subscript]
+
+    @_('expr')
+    def subscript(self, p): return p.expr
+
+    @_('range_expr')
+    def subscript(self, p): return p.range_expr
+
+    @_('":"')
+    def subscript(self, p): return AST.Colon(p.lineno)
+
     @_('elements')
     def rows(self, p): return [p.elements]
 
@@ -167,11 +205,15 @@ class Mparser(Parser):
         if p:
             lineno = getattr(p, 'lineno', '?')
             val = getattr(p, 'value', None)
-            print(f"Syntax error at line {lineno}: unexpected token {p.type} (value={val})")
+            self.diagnostics.append(Diagnostic(getattr(p, 'lineno', None), f"Syntax error: unexpected token {p.type} (value={val})", source="parser"))
+            if not self.quiet:
+                print(f"Syntax error at line {lineno}: unexpected token {p.type} (value={val})")
             self.had_error = True
             self.errok()
         else:
-            print("Syntax error at EOF (unexpected end of file)")
+            self.diagnostics.append(Diagnostic(None, "Syntax error at EOF (unexpected end of file)", source="parser"))
+            if not self.quiet:
+                print("Syntax error at EOF (unexpected end of file)")
 
 
 if __name__ == '__main__':
@@ -1,5 +1,6 @@
 import sys
 from sly import Lexer
+from Diagnostics import Diagnostic
 
 class Scanner(Lexer):
     
@@ -93,8 +94,15 @@ class Scanner(Lexer):
     def ignore_newline(self, t):
         self.lineno += t.value.count('\n')
 
+    def __init__(self, quiet=False):
+        self.quiet = quiet
+        self.diagnostics = []
+
     def error(self, t):
-        print(f"Illegal character {t.value[0]!r} at line {self.lineno}")
+        diagnostic = Diagnostic(self.lineno, f"Illegal character {t.value[0]!r}", source="scanner")
+        self.diagnostics.append(diagnostic)
+        if not self.quiet:
+            print(f"Illegal character {t.value[0]!r} at line {self.lineno}")
         self.index += 1
 
 
@@ -0,0 +1,33 @@
+# Algebraic identities applied at -O3
+A = ones(200, 100);
+B = ones(100, 200);
+
+C = (A')' .+ zeros(200, 100);
+print "C:", C[0, 0], C[199, 99];
+
+D = A * eye(100) * B;
+print "D:", D[0, 0];
+
+E = eye(200) * A .* ones(200, 100);
+print "E:", E[5, 5];
+
+# (A' * B')' is computed as B * A
+F = (A' * B')';
+print "F:", F[0, 0], F[99, 99];
+
+for x = 5:7 {
+    y = -(-x) * 1 + 0 - 0;
+    print "y:", y;
+}
+
+# G is stored into, so it must not become an alias of A
+G = A * eye(100);
+G[0, 0] = 42;
+print "G:", G[0, 0], A[0, 0];
+
+# arithmetic turns a bool mask into numbers, so these are not identities
+M = [1, 5; 7, 2] > 3;
+print "M:", M .+ zeros(2), ones(2) .* M, eye(2) * M;
+
+# shapes do not match: the product is kept and fails at run time
+H = A * eye(3);
@@ -0,0 +1,22 @@
+# matrices of matrices share one contiguous buffer and multiply block-wise
+A = [1, 2; 3, 4];
+B = [5, 6; 7, 8];
+C = [A, B; B, A];
+print C;
+D = C * C;
+print D;
+E = C + C * 2;
+print E;
+F = C';
+print F;
+X = C[0, 1];
+C[0, 1] = A;
+print X, C[0, 1];
+C[1, 0] += A;
+print C[1, 0], F[0, 1];
+G = [A, B] * [A; B];
+print G;
+R = C[1];
+print R;
+K = [[1.5, 2.0; 0.5, 1.0], A; B, A];
+print K - C;
@@ -0,0 +1,34 @@
+# Repeated subexpressions computed once at -O2
+A = ones(60, 60);
+B = eye(60) + eye(60);
+
+# A * B is computed once and shared by both statements
+C = A * B + 1;
+D = A * B - 1;
+print C[0, 0], D[0, 0];
+
+# the larger repeated expression (A * B)' is shared as a whole
+E = (A * B)' * 3;
+F = (A * B)' * 5;
+print E[1, 1], F[1, 1];
+
+# an assignment to an operand invalidates the earlier result
+x = 4;
+y = x * x + 1;
+x = 5;
+z = x * x + 1;
+print y, z;
+
+# Newton step: x / s appears twice in the same statement
+x = 2.0;
+s = 1.0;
+for i = 1:6 {
+    s = (s + x / s) / 2 + (x / s - x / s);
+}
+print s;
+
+# G is stored into by index, so it must not share A * B with H
+G = A * B;
+H = A * B;
+G[0, 0] = 100;
+print G[0, 0], H[0, 0];
@@ -0,0 +1,15 @@
+# matrix literals with matrices of different shapes among their elements concatenate
+A = [1, 2; 3, 4];
+v = [9; 8];
+w = [7, 6, 5];
+B = [A, v];
+print B;
+C = [A, v; w];
+print C;
+D = [A; 1.5, 2];
+print D;
+K = [C, [0; 0; 0]; 1, 1, 1, 1];
+print K;
+print K * [1; 1; 1; 1];
+Z = [zeros(2, 2), v; w];
+print Z;
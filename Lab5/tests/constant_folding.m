@@ -0,0 +1,38 @@
+# Expressions the -O1 constant folder evaluates at compile time
+n = 10;
+m = n - 1;
+print "m =", m;
+
+k = 2 * 3 + n;
+print "k =", k;
+
+line = "*" * 5;
+print line;
+
+I = eye(3);
+Z = zeros(2, 3) .+ ones(2, 3);
+print I, Z;
+
+A = [1, 2 ; 3, 4]';
+A[0, 0] = 42;
+B = [1, 2 ; 3, 4]';
+print A, B;
+
+if (1 == 0) {
+    print "never printed";
+} else {
+    print "always printed";
+}
+
+while (n < 0) {
+    print "never printed";
+}
+
+for i = 1:n - 7 {
+    print i;
+    continue;
+    print "never printed";
+}
+
+n += 1;
+print "n =", n;
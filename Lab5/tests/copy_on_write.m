@@ -0,0 +1,27 @@
+# Matrices have value semantics: assignment shares, a store copies
+a = ones(2, 2);
+b = a;
+b[0, 0] = 5;
+print a, b;
+
+# a row read from a matrix is a copy as far as stores are concerned
+r = a[1];
+a[1, 1] = 7;
+print r, a;
+
+# a transposed alias
+t = a';
+t[0, 1] = 9;
+print a, t;
+
+# a matrix literal evaluated in a loop starts fresh every iteration
+for i = 1:3 {
+    m = [1, 2; 3, 4];
+    m[0, 0] += i;
+    print m;
+}
+
+# after the copy, further stores go to b's own matrix
+b[1, 1] = 6;
+b[0, 1] = 8;
+print a, b;
@@ -0,0 +1,29 @@
+# Elementwise chains large enough to be evaluated in one fused pass
+A = ones(200, 200);
+B = eye(200) + ones(200, 200);
+C = A + A + A;
+
+D = A .+ B .* C ./ B;
+print D[0, 0], D[0, 1], D[199, 199];
+
+# unary minus and mixed int/float operands
+E = -(A .- B) .* (C ./ (B .+ B));
+print E[0, 0], E[3, 4];
+
+# a 1 x 200 row is broadcast over every row
+R = ones(1, 200) + ones(1, 200);
+F = (A .+ R) .* C .- R;
+print F[0, 0], F[150, 7];
+
+# small chains use the plain operators
+G = [1, 2; 3, 4] .* [5, 6; 7, 8] .- [1, 1; 1, 1];
+print G;
+
+# nested binary '-' is subtraction, not a fused negation
+b = 3;
+c = 9;
+print 0 - (-5), (b - 2) - (c - 8);
+print G - G - G;
+
+# a scalar operand is still an error
+H = A .+ B .* 2;
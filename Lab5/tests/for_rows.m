@@ -0,0 +1,35 @@
+# for row = A iterates the rows of A as views; columns through A'
+A = [1, 2, 3; 4, 5, 6; 7, 8, 9; 10, 11, 12; 13, 14, 15];
+s = [0, 0, 0];
+for row = A {
+    s = s + row;
+}
+print s;
+for col = A' {
+    print col;
+}
+for row = A {
+    A[4, 0] = 0;
+    row[0, 0] = -1;
+    print row;
+}
+print A[4, :];
+X = [1, 2; 3, 4];
+M = [X, X * 2; X * 3, X * 4];
+for r = M {
+    print r;
+}
+for r = eye(3) {
+    print r;
+}
+
+# the rows of ones(400, 400) view its dense array, which must stay owned
+# while the body rebinds row and B takes buffers from the pool
+C = ones(400, 400);
+C[0, 0] = 5;
+D = C;
+for row = ones(400, 400) {
+    row = row .* [2];
+    B = C .+ D;
+    print sum(row);
+}
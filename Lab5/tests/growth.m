@@ -0,0 +1,25 @@
+# v = [v, x] and v = [v; x] in loops append into spare room behind v
+v = [0];
+for i = 1:20 {
+    v = [v, i];
+}
+print v;
+print v[0, 20];
+w = v;
+v = [v, 100, 200];
+w = [w, -1];
+print v;
+print w;
+c = [1; 2];
+for i = 1:5 {
+    c = [c; i * 1.5];
+}
+print c';
+M = [1, 2];
+for i = 1:3 {
+    M = [M; i, i];
+}
+print M;
+u = v;
+u[0, 0] = 7;
+print u[0, 0], v[0, 0];
@@ -0,0 +1,22 @@
+# a growth buffer goes back to the buffer pool when G dies with the loop
+# scope, and M reuses it: appending to a view of M must not write into M
+for k = 1:1 {
+    G = zeros(1, 70000);
+    G = [G, 1];
+}
+Z = ones(1, 140002);
+Z[0, 0] = 3;
+M = Z .+ Z;
+V = M[0, 0:70000];
+V = [V, -7];
+print M[0, 70000], M[0, 70001], V[0, 70000], V[0, 70001];
+
+# a view left in Q keeps the buffer of P, which dies with the loop scope,
+# out of the pool, so R gets a buffer of its own
+Q = Z[0, 0:10];
+for k = 1:1 {
+    P = Z .+ Z;
+    Q = P[0, 0:10];
+}
+R = Z .* Z;
+print Q[0, 0], R[0, 0];
@@ -0,0 +1,35 @@
+# Matrix updates applied in place at -O2
+A = ones(3, 3) ./ ones(3, 3);
+C = eye(3) + ones(3, 3);
+for i = 1:4 {
+    A += C;
+    A = A .* C;
+    A -= C;
+    A = A ./ C;
+}
+print A;
+
+# an int matrix updated with floats still becomes a float matrix
+N = eye(2);
+N += 0.5;
+print N;
+N = eye(2);
+N /= 2;
+print N;
+
+# a row updated with a full matrix grows to the full shape
+R = ones(1, 3);
+R += ones(3, 3);
+print R;
+
+# S shares its matrix with T, so T must not change
+S = ones(2, 2);
+T = S;
+S += ones(2, 2);
+print S, T;
+
+# scalars are unaffected
+k = 1;
+k += 2;
+k = k * 3;
+print k;
@@ -0,0 +1,48 @@
+# big temporaries that die early
+A = ones(50, 50);
+B = A + A;
+C = B .+ A;
+print C[0, 0];
+D = C';
+print D[1, 1];
+
+# live across iterations: S is read before it is redefined
+S = zeros(3, 3);
+T = ones(3, 3);
+for i = 1:4 {
+    S = S + T;
+    if (i == 2) {
+        continue;
+    }
+    print S[0, 0];
+}
+print S;
+
+# last use inside a loop that exits early
+M = eye(4);
+k = 0;
+while (k < 10) {
+    k += 1;
+    N = M * 2;
+    if (k == 3) {
+        break;
+    }
+}
+print N;
+
+# defined in one branch only
+if (k > 2) {
+    R = ones(2, 2);
+} else {
+    R = zeros(2, 2);
+}
+print R;
+
+# dead before a loop that assigns it again: it stays in the outer scope
+W = [1, 2];
+for i = 1:1 {
+    W = [5, 6];
+    print W;
+    W = [3, 4];
+}
+print W;
@@ -0,0 +1,43 @@
+# Loop-invariant expressions hoisted at -O2
+A = ones(40, 40);
+B = eye(40) .* ones(40, 40);
+n = 200;
+
+# the product does not depend on i: computed once instead of n times
+s = 0;
+for i = 1:n {
+    C = A * B;
+    s = s + C[0, 0] * i;
+}
+print "s =", s;
+
+# nested loops: A' * B is hoisted out of both loops
+t = 0;
+for i = 1:5 {
+    for j = 1:20 {
+        D = A' * B;
+        t = t + D[1, 1] + j;
+    }
+}
+print "t =", t;
+
+# the bound n * 2 is computed before the loop
+k = 0;
+while (k < n * 2) {
+    k = k + 1;
+}
+print "k =", k;
+
+# m is unknown, so the hoisted code is guarded by 1 <= m
+m = k - 400;
+for i = 1:m {
+    E = A * B;
+    print "never printed", E[0, 0];
+}
+
+# stored into by index: the product must stay inside the loop
+for i = 1:3 {
+    F = A * B;
+    F[0, 0] += i;
+    print F[0, 0];
+}
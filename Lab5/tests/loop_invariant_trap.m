@@ -0,0 +1,17 @@
+# an invariant expression that fails must fail after the prints before it
+A = [1, 2, 3];
+k = 1;
+for i = 0:2 {
+    print i;
+    x = A[0, k] + i;
+}
+k = 7;
+n = 0;
+while (n < 3) {
+    print "n", n;
+    n += 1;
+    if (n > 1) {
+        print "late";
+    }
+    y = A[0, k] + n;
+}
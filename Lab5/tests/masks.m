@@ -0,0 +1,31 @@
+# comparisons on matrices give bool masks; masks index, assign and decide
+A = [1, 7, 3; 9, 2, 8];
+m = A > 5;
+print m;
+print any(m), all(m), count(m);
+print find(m);
+print A[m];
+print A >= [1, 1, 1; 9, 9, 9];
+print 4 < A;
+B = A;
+B[B > 5] = 0;
+print B;
+B[B == 0] += 10;
+print B;
+print A[0, :] != 3;
+if (A > 0) {
+    print "all positive";
+}
+if (A > 2) {
+    print "wrong";
+} else {
+    print "not all above 2";
+}
+n = 0;
+C = [5, 6, 7];
+while (any(C > 0)) {
+    C -= 2;
+    C[C < 0] = 0;
+    n += 1;
+}
+print C, n;
@@ -0,0 +1,33 @@
+# Products of three or more matrices reassociated at -O3
+A = ones(300, 4);
+B = ones(4, 300);
+C = ones(300, 4);
+
+# shapes known statically: computed as A * (B * C)
+D = A * B * C;
+print D[0, 0], D[299, 3];
+
+# a wide-tall-wide chain is best evaluated from the left
+E = B * A * B;
+print E[0, 0];
+
+# the shapes of F and G depend on a branch, so the order is planned
+# at run time and reused on every iteration
+n = 250;
+if (n > 100) {
+    F = ones(250, 3);
+    G = ones(3, 250);
+} else {
+    F = ones(3, 3);
+    G = ones(3, 3);
+}
+s = 0;
+for i = 1:20 {
+    H = F * G * F * G;
+    s = s + H[0, 0];
+}
+print s;
+
+# scalars in a chain keep the written order
+k = 2 * 3 * 4;
+print k;
@@ -0,0 +1,25 @@
+# ranges are iterated lazily and become row vectors when used as values
+for i = 1:3 {
+    print i;
+}
+for i = 5:1:-2 {
+    print i;
+}
+for x = 0.0:1.0:0.25 {
+    print x;
+}
+v = 1:6;
+print v;
+print v * 2, (2:9:3) + 1;
+w = 0.0:1.0:0.1;
+print w;
+c = (1:3)';
+print c;
+e = 3:1;
+print e;
+n = 4;
+s = 0;
+for k = 1:n {
+    s = s + k;
+}
+print s;
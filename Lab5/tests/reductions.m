@@ -0,0 +1,20 @@
+# sum, prod, min, max and mean over a whole matrix or along an axis
+A = [1, 7, 3; 9, 2, 8];
+print sum(A), prod(A), min(A), max(A), mean(A);
+print sum(A, 0), sum(A, 1);
+print prod(A, 0);
+print min(A, 0), max(A, 1);
+print mean(A, 0), mean(A, 1);
+F = [0.5, 1.5; 2.5, -1.0];
+print sum(F), min(F), max(F, 0);
+print sum(A > 2), mean(A > 2), max(A > 8);
+print sum(ones(3, 4)), sum(eye(3), 1);
+print sum(A[1, :]), max(A[:, 2]);
+s = 0;
+for i = 0:1 {
+    s += sum(A[i, :]);
+}
+print s == sum(A);
+print max(sum(A, 0)) - min(sum(A, 1));
+E = A[0:-1, :];
+print sum(E), sum(E, 0);
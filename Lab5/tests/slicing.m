@@ -0,0 +1,41 @@
+# ranges, ':' and index matrices select submatrices; reads are views
+A = [1, 2, 3, 4; 5, 6, 7, 8; 9, 10, 11, 12];
+i = 1;
+j = 2;
+print A[i, j], A[i + 1, j - 1];
+print A[0:1, :];
+print A[:, 1];
+print A[1:2, 1:3];
+print A[0:2:2, 0:3:3];
+print A[i, :], A[:, j]';
+print A[1:2];
+P = [2, 0];
+print A[P, 0:1];
+print A[P, P];
+
+# a view of A sees nothing of later stores: A is copied on write
+B = A[0:1, 1:2];
+A[0, 1] = 100;
+print B, A[0, 1];
+
+# vectorized stores
+A[:, 0] = 0;
+A[2, :] = [-1, -2, -3, -4];
+A[0:1, 2:3] = [20, 30; 60, 70];
+print A;
+A[0:1, 2:3] += 1;
+A[P, 0] -= 5;
+print A;
+for k = 1:2 {
+    A[k, k - 1:k] = [k, -k];
+}
+print A;
+
+# submatrices of a block matrix are block submatrices
+X = [1, 2; 3, 4];
+Y = [5, 6; 7, 8];
+M = [X, Y, X; Y, X, Y];
+print M[0, 1:2];
+print M[:, 0];
+M[1, 0:1] = 0;
+print M;
@@ -0,0 +1,19 @@
+# matrices up to 4x4 take the SmallMatrix path
+A = [1, 2; 3, 4];
+B = [0.5, 1.0; 2.0, 3.0];
+C = A * B;
+D = C';
+D[0, 1] = 7;
+E = -D .+ A;
+G = A * 2.5 - 1;
+A += B;
+H = ones(3) * eye(3);
+H[1, 1] = 2.9;
+K = zeros(5, 5);
+K[0, 0] = 1;
+print A, C, D, E, G, H, K[0, 0];
+
+# a sum of -0.0 terms is 0.0, as in the NumPy product
+N = [-1.5, -2.0, -3.0; -1.0, -2.0, -5.0; -2.0, -1.0, -4.0];
+Z = zeros(3)' * N';
+print Z, [1.0, 1.0] * [-0.0; -0.0];
@@ -0,0 +1,39 @@
+# zeros and eye with a few elements stored stay sparse at -O2 and above
+A = zeros(40, 40);
+A[0, 0] = 2;
+A[1, 1] = 2;
+A[1, 0] = -1;
+A[0, 1] = -1;
+A[2, 1] = -1;
+A[39, 39] = 4;
+print A[0, 0], A[1, 0], A[0, 1], A[5, 7];
+B = A;
+B[3, 9] = 7;
+print A[3, 9], B[3, 9];
+T = B';
+print T[9, 3], T[3, 9];
+P = A * A;
+print P[0, 0], P[1, 1], P[2, 0], P[0, 5];
+S = A + B;
+print S[3, 9], S[1, 1];
+D = A - A;
+print D[2, 2];
+H = A .* B;
+print H[1, 1], H[3, 9];
+K = 3 * A;
+print K[39, 39], K[38, 39];
+O = ones(40, 40);
+Q = A * O;
+print Q[0, 0], Q[1, 0], Q[39, 39];
+R = O * A;
+print R[0, 0], R[0, 1];
+M = A + O;
+print M[0, 0], M[0, 2];
+I = eye(40);
+I[0, 39] = 5;
+J = I * A;
+print J[0, 0], J[0, 39], J[1, 1];
+N = -A;
+print N[0, 0], N[0, 1];
+F = A / 4;
+print F[0, 0], F[0, 1];
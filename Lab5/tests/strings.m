@@ -0,0 +1,23 @@
+# s = s + t in a loop builds a rope, flattened when printed or compared
+s = "";
+for i = 1:100 {
+    s = s + "ab";
+}
+t = s;
+s = s + "!";
+t = t + "?";
+print s;
+print t;
+if (s == t) {
+    print "same";
+} else {
+    print "different";
+}
+u = "x" + s;
+if (u != s) {
+    print "prefixed";
+}
+r = "-" * 3;
+print r + s * 2;
+s += "end";
+print s;
@@ -0,0 +1,18 @@
+# zeros, ones and eye larger than 4x4 stay symbolic until stored into or printed
+I = eye(6);
+Z = zeros(6, 6);
+O = ones(6, 6);
+A = O * 3 + I;
+print A[0, 0], A[0, 1];
+B = I * A;
+print B[2, 2];
+C = Z * A;
+print C[5, 5];
+D = O .* I * 2;
+print D[1, 1], D[1, 2];
+E = I';
+E[0, 5] = 9;
+print E[0, 5], E[5, 5];
+F = -I / 2;
+print F;
+print O * O;
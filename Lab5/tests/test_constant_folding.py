@@ -0,0 +1,55 @@
+import io
+import os
+import sys
+import contextlib
+import unittest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+from Optimizer import optimizer
+
+STRUCTURED = """
+A = zeros(10) + ones(10);
+B = eye(5) * 2;
+C = ones(3, 8)';
+print A[0, 0], B[1, 1], C[7, 2];
+"""
+
+
+def parse(text):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+
+
+def run(ast):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        ast.accept(Interpreter())
+    return output.getvalue()
+
+
+class FoldedCountTest(unittest.TestCase):
+    """Folding of literal matrices and zeros/ones/eye, whose values are
+    SmallMatrix or structured matrices rather than ndarrays."""
+
+    def folded(self, text):
+        manager = optimizer(1, verify=False)
+        ast = manager.run(parse(text))
+        stats = next(s for s in manager.stats if s.name == "constant-folding")
+        self.assertEqual(run(ast), run(parse(text)))
+        return stats.counters["folded"]
+
+    def test_constant_folding_script(self):
+        with open(os.path.join(TESTS, "constant_folding.m")) as f:
+            self.assertEqual(self.folded(f.read()), 33)
+
+    def test_structured_matrices(self):
+        self.assertEqual(self.folded(STRUCTURED), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import io
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LanguageServer import LanguageServer
+
+
+def frame(payload):
+    body = json.dumps(payload).encode("utf-8")
+    return f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+
+
+def messages(data):
+    server = LanguageServer(io.BytesIO(data), io.BytesIO())
+    out = []
+    while True:
+        message = server.read_message()
+        if message is None:
+            return out
+        out.append(message)
+
+
+class NotificationTest(unittest.TestCase):
+
+    def run_server(self, *payloads):
+        writer = io.BytesIO()
+        server = LanguageServer(io.BytesIO(b"".join(frame(p) for p in payloads)), writer)
+        server.serve()
+        return messages(writer.getvalue())
+
+    def test_did_change_on_unknown_uri_is_logged(self):
+        out = self.run_server(
+            {"jsonrpc": "2.0", "method": "textDocument/didChange", "params": {
+                "textDocument": {"uri": "file:///missing.m", "version": 2},
+                "contentChanges": [{"text": "x = 1;\n"}]}},
+            {"jsonrpc": "2.0", "id": 1, "method": "shutdown", "params": None},
+        )
+        self.assertEqual(out[0]["method"], "window/logMessage")
+        self.assertIn("file:///missing.m", out[0]["params"]["message"])
+        self.assertEqual(out[1], {"jsonrpc": "2.0", "id": 1, "result": None})
+
+    def test_server_keeps_document_after_failed_change(self):
+        uri = "file:///a.m"
+        out = self.run_server(
+            {"jsonrpc": "2.0", "method": "textDocument/didOpen", "params": {
+                "textDocument": {"uri": uri, "version": 1, "text": "x = 1;\n"}}},
+            {"jsonrpc": "2.0", "method": "textDocument/didChange", "params": {
+                "textDocument": {"uri": uri, "version": 2}}},
+            {"jsonrpc": "2.0", "id": 1, "method": "textDocument/diagnostic", "params": {
+                "textDocument": {"uri": uri}}},
+        )
+        self.assertEqual([m.get("method") for m in out[:2]],
+                         ["textDocument/publishDiagnostics", "window/logMessage"])
+        self.assertEqual(out[2]["result"], {"kind": "full", "items": []})
+
+    def test_info_notes_are_not_published(self):
+        uri = "file:///b.m"
+        text = "A = [1, 2; 3, 4; 5, 6; 7, 8];\nB = [1, 2; 3, 4];\nC = A .+ B;\n"
+        out = self.run_server(
+            {"jsonrpc": "2.0", "method": "textDocument/didOpen", "params": {
+                "textDocument": {"uri": uri, "version": 1, "text": text}}},
+        )
+        self.assertEqual(out[0]["params"]["diagnostics"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
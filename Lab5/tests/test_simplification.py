@@ -0,0 +1,55 @@
+import io
+import os
+import sys
+import contextlib
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import Scanner
+from parser import Mparser
+from Interpreter import Interpreter
+from Optimizer import optimizer
+
+
+def output(text, level):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Mparser(quiet=True).parse(Scanner(quiet=True).tokenize(text))
+    if level:
+        ast = optimizer(level, verify=False).run(ast)
+    printed = io.StringIO()
+    with contextlib.redirect_stdout(printed), np.errstate(all='ignore'):
+        ast.accept(Interpreter())
+    return printed.getvalue()
+
+
+class FloatIdentityTest(unittest.TestCase):
+    """Identities -O3 applies must not change inf, nan or signed zeros."""
+
+    def assertSameAtO3(self, text):
+        self.assertEqual(output(text, 3), output(text, 0))
+
+    def test_identity_product_with_infinities(self):
+        text = """
+        A = [1.0, 2.0; 3.0, 4.0] ./ [0.0, 1.0; 1.0, 0.0];
+        print eye(2) * A, A * eye(2);
+        """
+        self.assertSameAtO3(text)
+        self.assertIn("nan", output(text, 3))
+
+    def test_add_zeros_keeps_signed_zeros(self):
+        text = """
+        A = [-0.0, 1.5; 2.5, -0.0];
+        B = A .+ zeros(2);
+        C = zeros(2) .+ A;
+        D = A .- zeros(2);
+        print B, C, D;
+        print [1.0, 1.0; 1.0, 1.0] ./ B;
+        """
+        self.assertSameAtO3(text)
+
+
+if __name__ == '__main__':
+    unittest.main()